@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# bench/bench.py
+"""
+Benchmark offline untuk bot.py, nexus_quick_install_termux.py dan tashi/bot.py.
+- Tanpa HP / jaringan: nexus-network, proot-distro, pkg, dpkg, dpkg-query, apt-get,
+  curl dan podman palsu (script sh) dipasang di PATH sebuah sandbox sementara
+- Delay tiap stub bisa diatur (--delay proot-distro=0.8) untuk meniru kelas device
+- Tiap skenario diukur: waktu (median), spawn subprocess dari Python
+  (sitecustomize membungkus subprocess.Popen) dan pemanggilan stub per binari
+- Hasil dibandingkan dengan bench/baseline.json → exit 1 bila ada regresi
+Pakai:  python bench/bench.py [--repeat 3] [--only status] [--save] [--json]
+Catatan: stub proot-distro menjalankan `bash -lc` sebagai `bash -c` (profil host
+tidak ikut); biaya login proot ditiru lewat delay-nya.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(REPO, "bench", "baseline.json")
+DISTRO = "ubuntu"
+
+# Delay default (detik) per stub — kira-kira HP kelas menengah
+DEFAULT_DELAYS = {
+    "proot-distro": 0.3,
+    "pkg": 0.05,
+    "apt-get": 0.05,
+    "curl": 0.05,
+    "podman": 0.05,
+    "nexus-network": 0.0,
+    "dpkg": 0.0,
+    "dpkg-query": 0.0,
+}
+
+# =======================
+# Stub
+# =======================
+_STUB_HEAD = """#!/bin/sh
+printf 'stub\\t%s\\t%s\\n' "{name}" "$*" >> "$BENCH_LOG"
+[ "${{BENCH_DELAY_{var}:-0}}" != 0 ] && sleep "$BENCH_DELAY_{var}"
+"""
+
+STUBS = {
+    "proot-distro": """
+R="$PREFIX/var/lib/proot-distro/installed-rootfs"
+case "$1" in
+  login)
+    d=$2; shift 2; [ "$1" = -- ] && shift
+    mkdir -p "$R/$d/root"; export HOME="$R/$d/root"
+    [ "$1" = bash ] && [ "$2" = -lc ] && { shift 2; exec bash -c "$@"; }
+    c=$1; shift
+    case "$c" in /root/*) c="$HOME${c#/root}" ;; esac  # proot asli memetakan /root ke rootfs
+    exec "$c" "$@" ;;
+  install) mkdir -p "$R/$2/root" "$R/$2/etc"; echo "[*] Installed $2" ;;
+  list) for d in "$R"/*; do [ -d "$d" ] && echo "  $(basename "$d")"; done ;;
+esac
+exit 0
+""",
+    "pkg": """
+case "$1" in
+  install) shift; for p in "$@"; do case "$p" in -*) ;; *) echo "$p" >> "$BENCH_ROOT/dpkg-installed" ;; esac; done ;;
+  update) mkdir -p "$PREFIX/var/lib/apt/lists"; touch "$PREFIX/var/lib/apt/lists/index" ;;
+esac
+exit 0
+""",
+    "apt-get": """
+case "$1" in
+  install) shift; for p in "$@"; do case "$p" in -*) ;; *) echo "$p" >> "$BENCH_ROOT/dpkg-installed" ;; esac; done ;;
+esac
+exit 0
+""",
+    "dpkg-query": """
+for p in "$@"; do
+  case "$p" in -*) continue ;; esac
+  grep -qx "$p" "$BENCH_ROOT/dpkg-installed" 2>/dev/null && echo "$p ii "
+done
+exit 0
+""",
+    "dpkg": """
+[ "$1" = --print-architecture ] && echo aarch64
+exit 0
+""",
+    "curl": """
+case "$*" in *-I*|*--head*) exit 0 ;; esac
+case "$*" in
+  *nexus*) body='mkdir -p "$HOME/.nexus/bin" && cp "$BENCH_ROOT/tmpl/nexus-network" "$HOME/.nexus/bin/" && chmod +x "$HOME/.nexus/bin/nexus-network"' ;;
+  *) body='echo "[bench] installer OK"' ;;
+esac
+out=""
+while [ $# -gt 0 ]; do [ "$1" = -o ] && out=$2; shift; done
+if [ -n "$out" ]; then echo "$body" > "$out"; else echo "$body"; fi
+exit 0
+""",
+    "podman": """
+case "$1" in
+  ps) printf 'NAMES\\tIMAGE\\tSTATUS\\ntashi-depin-worker\\tghcr.io/tashigg/tashi-depin-worker:0\\tUp 2 hours\\n' ;;
+  inspect)
+    case "$*" in
+      *--format*) echo "running ghcr.io/tashigg/tashi-depin-worker:0" ;;
+      *) printf '[{"State":{"Status":"running","Running":true,"StartedAt":"2025-01-01T00:00:00.123456789Z","ExitCode":0,"Health":{"Status":"healthy"}},"ImageName":"ghcr.io/tashigg/tashi-depin-worker:0","RestartCount":1}]\n' ;;
+    esac ;;
+  --version) echo "podman version 4.9.3" ;;
+  image) [ "$2" = inspect ] && { [ -f "$BENCH_ROOT/podman-image" ] && cat "$BENCH_ROOT/podman-image" || exit 125; } ;;
+  save) shift; while [ $# -gt 0 ]; do [ "$1" = -o ] && head -c 4000000 /dev/zero > "$HOME${2#/root}"; shift; done ;;
+  load) echo "sha256:5e1f0c0ffee" > "$BENCH_ROOT/podman-image"; echo "Loaded image" ;;
+esac
+exit 0
+""",
+}
+
+NEXUS_NETWORK = """
+case "$*" in
+  --version) echo "nexus-network 0.10.0" ;;
+  --help) printf 'Usage: nexus-network <COMMAND>\\n\\nCommands:\\n  start     Start the prover\\n  register-user\\n  register-node\\n  stop\\n' ;;
+  "start --help") printf 'Options:\\n  --node-id <ID>\\n  --max-threads <N>\\n  --headless\\n' ;;
+  start*) echo "Starting node"; sleep "${BENCH_NODE_RUN:-0}" ;;
+  status*) echo "Node running" ;;
+esac
+exit 0
+"""
+
+SITECUSTOMIZE = """
+import os, subprocess
+_orig = subprocess.Popen.__init__
+def _counted(self, args, *a, **kw):
+    try:
+        name = args if isinstance(args, (str, bytes)) else args[0]
+        with open(os.environ["BENCH_LOG"], "a") as f:
+            f.write("py\\t%s\\t%s\\n" % (os.path.basename(str(name).split()[0] if name else "?"),
+                                          "shell" if kw.get("shell") else ""))
+    except Exception:
+        pass
+    return _orig(self, args, *a, **kw)
+subprocess.Popen.__init__ = _counted
+"""
+
+
+def _write_exec(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.chmod(path, 0o755)
+
+
+def make_sandbox(delays):
+    """Sandbox baru: bin/ (stub), HOME, PREFIX Termux, state dir, TMPDIR (socket broker)."""
+    root = tempfile.mkdtemp(prefix="nexus-bench-")
+    for d in ("bin", "tmpl", "py", "home", "state", "tmp", "prefix/usr"):
+        os.makedirs(os.path.join(root, d))
+    for name, body in STUBS.items():
+        var = name.upper().replace("-", "_")
+        _write_exec(os.path.join(root, "bin", name), _STUB_HEAD.format(name=name, var=var) + body)
+    _write_exec(os.path.join(root, "tmpl", "nexus-network"),
+                _STUB_HEAD.format(name="nexus-network", var="NEXUS_NETWORK") + NEXUS_NETWORK)
+    with open(os.path.join(root, "py", "sitecustomize.py"), "w", encoding="utf-8") as f:
+        f.write(SITECUSTOMIZE)
+    env = {
+        "PATH": os.path.join(root, "bin") + os.pathsep + os.environ.get("PATH", ""),
+        "HOME": os.path.join(root, "home"),
+        "PREFIX": os.path.join(root, "prefix", "com.termux", "files", "usr"),
+        "TMPDIR": os.path.join(root, "tmp"),
+        "NEXUS_STATE_DIR": os.path.join(root, "state"),
+        "NEXUS_PROOT_BROKER_IDLE": "30",
+        "PYTHONPATH": os.path.join(root, "py"),
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "BENCH_ROOT": root,
+        "BENCH_LOG": os.path.join(root, "spawns.log"),
+        "LANG": "C.UTF-8",
+    }
+    for name, secs in delays.items():
+        env["BENCH_DELAY_" + name.upper().replace("-", "_")] = str(secs)
+    return root, env
+
+
+def install_fixture(root, env):
+    """Kondisi 'sudah terpasang': rootfs Ubuntu + Nexus CLI di proot dan di HOME native."""
+    rootfs_home = os.path.join(env["PREFIX"], "var", "lib", "proot-distro", "installed-rootfs", DISTRO, "root")
+    for home in (rootfs_home, env["HOME"]):
+        os.makedirs(os.path.join(home, ".nexus", "bin"), exist_ok=True)
+        shutil.copy(os.path.join(root, "tmpl", "nexus-network"), os.path.join(home, ".nexus", "bin"))
+    with open(os.path.join(root, "dpkg-installed"), "w", encoding="utf-8") as f:
+        f.write("\n".join(["proot-distro", "curl", "wget", "tar", "ca-certificates", "git", "openssh",
+                           "procps", "bash", "iproute2", "uidmap", "slirp4netns", "fuse-overlayfs", "podman"]) + "\n")
+    lists = os.path.join(env["PREFIX"], "var", "lib", "apt", "lists")
+    os.makedirs(lists, exist_ok=True)
+    open(os.path.join(lists, "index"), "w").close()
+    with open(os.path.join(root, "podman-image"), "w", encoding="utf-8") as f:
+        f.write("sha256:5e1f0c0ffee\n")
+
+
+def cleanup(root, env):
+    subprocess.run([sys.executable, os.path.join(REPO, "proot_broker.py"), "stop"], env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+    shutil.rmtree(root, ignore_errors=True)
+
+
+# =======================
+# Skenario
+# =======================
+def _py(code):
+    return [sys.executable, "-c", f"import sys; sys.path.insert(0, {REPO!r}); " + code]
+
+
+BOT = os.path.join(REPO, "bot.py")
+TASHI = os.path.join(REPO, "tashi", "bot.py")
+
+# (nama, argv, fixture terpasang?, warm = satu run pemanasan di sandbox yang sama)
+SCENARIOS = [
+    ("bot --node-id (provision dingin)", [sys.executable, BOT, "--node-id", "bench-node-0001"], False, False),
+    ("bot --node-id (hangat)", [sys.executable, BOT, "--node-id", "bench-node-0001"], False, True),
+    ("bot --status (dingin)", [sys.executable, BOT, "--status"], True, False),
+    ("bot --status (hangat)", [sys.executable, BOT, "--status"], True, True),
+    ("bot --stop (hangat)", [sys.executable, BOT, "--stop"], True, True),
+    ("nqi start_node_smart (dingin)", _py("import nexus_quick_install_termux as q; q.start_node_smart('bench-node-0001')"), True, False),
+    ("nqi start_node_smart (hangat)", _py("import nexus_quick_install_termux as q; q.start_node_smart('bench-node-0001')"), True, True),
+    ("nqi preflight_ensure_ready", _py("import nexus_quick_install_termux as q; q.preflight_ensure_ready()"), True, True),
+    ("nqi provision_proot (dingin)", _py("import nexus_quick_install_termux as q; q.provision_proot()"), False, False),
+    ("tashi status (dingin)", [sys.executable, TASHI, "status"], True, False),
+    ("tashi status (hangat)", [sys.executable, TASHI, "status"], True, True),
+    ("tashi status --json (hangat, cache)", [sys.executable, TASHI, "status", "--json"], True, True),
+    ("tashi status --json --max-age 0", [sys.executable, TASHI, "status", "--json", "--max-age", "0"], True, True),
+    ("tashi install (dingin)", [sys.executable, TASHI, "install"], False, False),
+]
+
+
+def _count_spawns(log_path):
+    """(spawn Python, shell, {stub: jumlah}). Shell = Popen(shell=True) + bash di proot login."""
+    py, shells, stubs = 0, 0, {}
+    try:
+        with open(log_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                kind, name, rest = (line.rstrip("\n").split("\t", 2) + ["", ""])[:3]
+                if kind == "py":
+                    py += 1
+                    shells += rest == "shell"
+                elif kind == "stub":
+                    stubs[name] = stubs.get(name, 0) + 1
+                    shells += name == "proot-distro" and rest.startswith("login ") and " -- bash " in rest
+    except OSError:
+        pass
+    return py, shells, stubs
+
+
+def _run_once(argv, env, out):
+    try:
+        os.remove(env["BENCH_LOG"])
+    except OSError:
+        pass
+    t0 = time.perf_counter()
+    p = subprocess.run(argv, env=env, cwd=env["HOME"], stdin=subprocess.DEVNULL,
+                       stdout=out, stderr=subprocess.STDOUT, timeout=300)
+    wall = time.perf_counter() - t0
+    py, shells, stubs = _count_spawns(env["BENCH_LOG"])
+    return wall, p.returncode, py, shells, stubs
+
+
+def run_scenario(argv, installed, warm, repeat, delays, verbose=False):
+    walls, last = [], None
+    sandbox = None
+    for _ in range(repeat):
+        if sandbox is None or not warm:
+            if sandbox:
+                cleanup(*sandbox)
+            sandbox = make_sandbox(delays)
+            if installed:
+                install_fixture(*sandbox)
+            if warm:
+                _run_once(argv, sandbox[1], subprocess.DEVNULL)
+        out = None if verbose else subprocess.DEVNULL
+        wall, code, py, shells, stubs = _run_once(argv, sandbox[1], out)
+        walls.append(wall)
+        last = (code, py, shells, stubs)
+    cleanup(*sandbox)
+    code, py, shells, stubs = last
+    return {
+        "median_s": round(statistics.median(walls), 4),
+        "min_s": round(min(walls), 4),
+        "exit": code,
+        "py_spawns": py,
+        "shell_spawns": shells,
+        "stub_calls": sum(stubs.values()),
+        "by_stub": stubs,
+    }
+
+
+def compare(results, baseline, tolerance, slack):
+    """Daftar regresi: waktu > base*(1+tol) dan > base+slack, atau jumlah spawn naik."""
+    problems = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        limit = max(b["median_s"] * (1 + tolerance), b["median_s"] + slack)
+        if r["median_s"] > limit:
+            problems.append(f"{name}: waktu {r['median_s']:.3f}s > {limit:.3f}s (baseline {b['median_s']:.3f}s)")
+        for key in ("py_spawns", "shell_spawns", "stub_calls"):
+            if r[key] > b.get(key, r[key]):
+                problems.append(f"{name}: {key} {r[key]} > baseline {b[key]}")
+        if r["exit"] != b.get("exit", r["exit"]):
+            problems.append(f"{name}: exit {r['exit']} (baseline {b['exit']})")
+    return problems
+
+
+def format_table(results, baseline):
+    width = max(len(n) for n in results)
+    lines = [f"{'SKENARIO':<{width}}  {'MEDIAN s':>9} {'BASE s':>8} {'PY':>4} {'SH':>4} {'STUB':>5} {'PROOT':>5}  EXIT"]
+    for name, r in results.items():
+        b = baseline.get(name, {})
+        base = f"{b['median_s']:.3f}" if b else "-"
+        lines.append(f"{name:<{width}}  {r['median_s']:>9.3f} {base:>8} {r['py_spawns']:>4} {r['shell_spawns']:>4} "
+                     f"{r['stub_calls']:>5} {r['by_stub'].get('proot-distro', 0):>5}  {r['exit']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark offline (stub) untuk skrip Nexus/Tashi")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--only", help="hanya skenario yang namanya mengandung teks ini")
+    ap.add_argument("--delay", action="append", default=[], metavar="STUB=DETIK",
+                    help="override delay stub, mis. proot-distro=0.8 (boleh berulang)")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save", action="store_true", help="simpan hasil sebagai baseline baru")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="toleransi waktu relatif (default 25%%)")
+    ap.add_argument("--slack", type=float, default=0.1, help="toleransi waktu absolut (detik)")
+    ap.add_argument("--json", action="store_true", help="cetak hasil sebagai JSON")
+    ap.add_argument("-v", "--verbose", action="store_true", help="tampilkan output skrip")
+    args = ap.parse_args(argv)
+
+    delays = dict(DEFAULT_DELAYS)
+    for spec in args.delay:
+        name, _, secs = spec.partition("=")
+        delays[name] = float(secs)
+
+    results = {}
+    for name, cmd, installed, warm in SCENARIOS:
+        if args.only and args.only not in name:
+            continue
+        if not args.json:
+            print(f"[i] {name} ...", flush=True)
+        results[name] = run_scenario(cmd, installed, warm, args.repeat, delays, args.verbose)
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    except (OSError, ValueError):
+        baseline = {}
+
+    if args.json:
+        print(json.dumps(results, indent=1))
+    else:
+        print(format_table(results, baseline))
+    if args.save:
+        merged = dict(baseline)
+        merged.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"delays": delays, "results": merged}, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"[✓] Baseline disimpan: {args.baseline}")
+        return 0
+    problems = compare(results, baseline, args.tolerance, args.slack)
+    for p in problems:
+        print(f"[x] Regresi: {p}")
+    if not baseline:
+        print("[i] Belum ada baseline. Jalankan dengan --save.")
+    elif not problems:
+        print("[✓] Tidak ada regresi dibanding baseline.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,94 +2,428 @@
 """
 Nexus CLI Node — super-simpel wrapper
 - Mengikuti langkah resmi: curl https://cli.nexus.xyz/ | sh → start/register
-- Otomatis deteksi Termux dan jalankan via Ubuntu proot (glibc)
+- Otomatis deteksi Termux dan jalankan via Ubuntu proot (glibc); backend lain (native /
+  podman / chroot) lewat --backend atau hasil --select-backend (lihat nexus_backends.py)
 - Pakai:  python bot.py --node-id <ID>
          python bot.py --wallet <WALLET_ADDRESS>
-Opsional: --login  --status  --stop
+         python bot.py --fleet <FILE>      (banyak node ID, satu proses)
+         python bot.py --fleet <FILE> --logs --node-id <ID> [--since T --grep REGEX]
+         python bot.py --snapshot create|list   /   --restore <NAMA|FILE>
+         python bot.py --node-id <ID> --tune [--tune-seconds N]   (cari thread/core terbaik)
+         python bot.py --select-backend [--node-id <ID>]   (benchmark native/proot/podman/chroot)
+Opsional: --backend native|proot|podman|chroot
+          --login  --status  --stop  --logs [--tail N | --since T --until T --grep REGEX]
+          --restart   (node di background lewat watchdog; dipakai nexus_hosts.py)
+          --stats [--since T]   (CPU/RSS/thread/I/O node: p50/p95/max + tren, lihat nexus_sampler.py)
+          --metrics   (output node juga ke ~/.nexus-run/node.log + /metrics Prometheus)
+          --trace     (durasi tiap langkah → ringkasan + Chrome trace JSON)
+          --governor  (throttle node menurut suhu SoC / baterai, lihat nexus_governor.py)
+          --budget N|status|off   (N% core/RAM untuk Nexus, sisanya Tashi; lihat nexus_budget.py)
 """
-import os, sys, subprocess, shlex
+import os, sys, subprocess, shlex, shutil
 
+import nexus_trace
+from nexus_trace import span, traced
 
-def run(cmd: str) -> None:
-    print(f"$ {cmd}")
-    rc = subprocess.run(cmd, shell=True)
-    if rc.returncode != 0:
+# Modul yang hanya dipakai satu flag / saat provisioning diimpor di fungsinya → --status / --stop tetap ringan
+from proot_broker import direct_argv, proot_exec, proot_home, rootfs_path
+from stream_exec import display, resolve_command
+
+PROOT_DISTRO = "ubuntu"
+NEXUS_INSTALL_URL = "https://cli.nexus.xyz/"
+PROOT_APT_PKGS = ["curl", "ca-certificates"]
+PROOT_NN = "$HOME/.nexus/bin/nexus-network"
+PROOT_NN_ABS = "/root/.nexus/bin/nexus-network"  # untuk argv langsung (tanpa bash di proot)
+# Installer dijalankan ulang (update CLI) paling cepat tiap N hari
+CLI_REFRESH = float(os.environ.get("NEXUS_CLI_REFRESH_DAYS", "7")) * 86400
+
+
+def run(cmd, check: bool = True) -> int:
+    """cmd = argv list atau string; /bin/sh hanya dipakai bila string butuh fitur shell."""
+    print(f"$ {display(cmd)}")
+    args, shell = resolve_command(cmd)
+    with span(nexus_trace.short(cmd), cat="run", cmd=display(cmd)) as sp:
+        rc = subprocess.run(args, shell=shell)
+        sp["rc"] = rc.returncode
+    if check and rc.returncode != 0:
         sys.exit(rc.returncode)
+    return rc.returncode
+
+
+def run_first(cmds) -> None:
+    """Jalankan argv satu per satu sampai ada yang sukses (pengganti `a || b || c` tanpa shell)."""
+    code = 0
+    for cmd in cmds:
+        code = run(cmd, check=False)
+        if code == 0:
+            return
+    sys.exit(code)
+
+
+def run_node(cmd, log_path: str, metrics: bool = False) -> None:
+    """Jalankan node di foreground. metrics=True: output di-tee ke node.log + exporter HTTP."""
+    if not metrics:
+        run(cmd)
+        return
+    import nexus_metrics
+    import nexus_sampler
+    from nexus_logs import RotatingLog
+    from stream_exec import run_streaming
+
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    httpd = nexus_metrics.serve([nexus_metrics.NodeMetrics(node_backend().name, log_path)])
+    if nexus_sampler.INTERVAL > 0:
+        # Node = anak proses ini; node lain di host (fleet, watchdog) tidak ikut terhitung
+        nexus_sampler.Sampler(os.path.dirname(log_path), pids=nexus_sampler.descendants).start_thread()
+    if httpd:
+        print(f"[i] Metrik: http://127.0.0.1:{nexus_metrics.DEFAULT_PORT}/metrics  (log: {log_path})")
+    print(f"$ {display(cmd)}")
+    with RotatingLog(log_path) as log, span(nexus_trace.short(cmd), cat="run", cmd=display(cmd)) as sp:
+        def tee(chunk):
+            log.write(chunk)
+            log.flush()
+        code, _, _ = run_streaming(cmd, on_chunk=tee)
+        sp["rc"] = code
+    if code != 0:
+        sys.exit(code)
+
+
+def start_governor() -> None:
+    """Governor suhu/baterai di thread latar; hanya node anak proses ini (juga di dalam proot)."""
+    import nexus_governor
+    import nexus_sampler
+
+    gov = nexus_governor.Governor(pids=nexus_sampler.descendants)
+    print(f"[i] Governor aktif: band {gov.low:.0f}–{gov.high:.0f}°C, baterai min {gov.battery_min}%")
+    gov.start_thread()
+
 
+def node_backend():
+    """Backend node: --backend / NEXUS_BACKEND → hasil --select-backend → proot (Termux) / native."""
+    import nexus_backends
 
-def is_termux() -> bool:
-    prefix = os.environ.get("PREFIX", "")
-    return prefix.endswith("/usr") and "com.termux" in prefix
+    return nexus_backends.resolve(distro=PROOT_DISTRO)
 
 
-def start_nexus_linux(node_id=None, wallet=None, login=False, status=False, stop=False):
+@traced()
+def ensure_cli_linux() -> str:
     home = os.path.expanduser("~")
     nn = os.path.join(home, ".nexus", "bin", "nexus-network")
 
     # Pastikan CLI terpasang (sesuai docs resmi)
     if not os.path.isfile(nn):
         run("curl https://cli.nexus.xyz/ | sh")
+    return nn
+
+
+def stop_watchdog() -> None:
+    # Node yang dijalankan lewat --restart diawasi watchdog → hentikan dulu agar tidak di-restart
+    import nexus_watchdog
+
+    if nexus_watchdog.stop_watchdog(node_backend().distro):
+        print("[✓] Watchdog dihentikan.")
+
+
+def show_logs(tail_n: int = 80, since=None, until=None, grep=None, log_path=None) -> None:
+    """Tail node.log (--metrics / --restart), dibaca langsung dari host tanpa proot.
+    since/until/grep: cari di seluruh log termasuk arsip terkompresi (lewat indeks waktu).
+    log_path: log lain (mis. node fleet), default node.log backend aktif."""
+    import nexus_watchdog
+    from nexus_logs import list_archives, parse_time, print_search, tail_lines
+
+    log_path = log_path or os.path.join(nexus_watchdog.run_dir(node_backend().distro), "node.log")
+    if not os.path.exists(log_path) and not list_archives(log_path):
+        print(f"[i] Belum ada log: {log_path}  (node dijalankan dengan --metrics atau --restart)")
+        return
+    if since or until or grep:
+        print_search(log_path, since and parse_time(since), until and parse_time(until), grep)
+        return
+    sys.stdout.write(tail_lines(log_path, tail_n).decode("utf-8", "replace"))
+
+
+def show_stats(since=None) -> None:
+    """Ringkasan sampel /proc yang dicatat watchdog (samples.ring)."""
+    import nexus_sampler
+    import nexus_watchdog
+    from nexus_logs import parse_time
+
+    rd = nexus_watchdog.run_dir(node_backend().distro)
+    print(nexus_sampler.format_summary(nexus_sampler.stats(rd, since and parse_time(since))))
+
+
+def budget(value) -> None:
+    """--budget N: planner CPU/RAM Nexus vs Tashi di background; status = share tercapai; off = lepas batas."""
+    import nexus_budget
+
+    if value == "status":
+        sys.exit(nexus_budget.main(["status"]))
+    if value == "off":
+        sys.exit(nexus_budget.main(["reset"]))
+    try:
+        share = float(value.rstrip("%"))
+    except ValueError:
+        share = -1
+    if not 5 <= share <= 95:
+        print("Usage: python bot.py --budget <5-95>|status|off")
+        sys.exit(2)
+    sys.exit(nexus_budget.main(["run", "--nexus", str(share), "--detach"]))
+
+
+def restart_detached(node_id=None, governor=False) -> None:
+    """(Re)start node di background di bawah watchdog; terminal / sesi SSH boleh ditutup."""
+    import nexus_watchdog
+
+    if not node_id:
+        print("Usage: python bot.py --node-id <ID> --restart")
+        sys.exit(2)
+    backend = prepare_backend(node_backend())
+    stop_watchdog()
+    pid = nexus_watchdog.spawn_detached(node_id, backend.distro, restart=True, governor=governor,
+                                        backend=backend.name)
+    print(f"[✓] Node berjalan di background (watchdog PID {pid}). Lihat: python bot.py --logs")
+
+
+def start_nexus_linux(node_id=None, wallet=None, login=False, status=False, stop=False, metrics=False, governor=False):
+    nn = ensure_cli_linux()
 
     if login:
-        run(f"{shlex.quote(nn)} login --no-open")
+        run([nn, "login", "--no-open"])
         return
     if status:
-        run(f"{shlex.quote(nn)} status || {shlex.quote(nn)} ps || {shlex.quote(nn)} --version")
+        run_first([[nn, "status"], [nn, "ps"], [nn, "--version"]])
         return
     if stop:
-        run(f"{shlex.quote(nn)} stop || true")
+        stop_watchdog()
+        run([nn, "stop"], check=False)
         return
 
+    import nexus_tune
+
+    log_path = os.path.join(os.path.expanduser("~"), ".nexus-run", "node.log")
+    if governor and (node_id or wallet):
+        start_governor()
     if node_id:
-        run(f"{shlex.quote(nn)} start --node-id {shlex.quote(node_id)}")
+        run_node(nexus_tune.apply_on_start([nn, "start", "--node-id", node_id]), log_path, metrics)
     elif wallet:
-        run(f"{shlex.quote(nn)} register-user --wallet-address {shlex.quote(wallet)}")
-        run(f"{shlex.quote(nn)} register-node")
-        run(f"{shlex.quote(nn)} start")
+        run([nn, "register-user", "--wallet-address", wallet])
+        run([nn, "register-node"])
+        run_node(nexus_tune.apply_on_start([nn, "start"]), log_path, metrics)
     else:
         print("Usage: python bot.py --node-id <ID>  |  --wallet <WALLET_ADDRESS>\nOpsional: --login, --status, --stop")
         sys.exit(2)
 
 
-def start_nexus_termux(node_id=None, wallet=None, login=False, status=False, stop=False):
-    # Persiapan Termux → Ubuntu proot
-    run("pkg update -y && pkg install -y proot-distro curl")
-    run("proot-distro install ubuntu || true")
+def run_proot(script) -> None:
+    # script string → bash -c (tanpa profil login); argv list → exec langsung di proot
+    run(direct_argv(PROOT_DISTRO, script))
+
+
+def ensure_termux_pkgs(pkgs) -> None:
+    # Satu dpkg-query; `pkg update` hanya jika index basi, install hanya yang kurang
+    from pkg_resolver import termux_plan
+
+    for cmd in termux_plan(pkgs):
+        run(cmd)
 
-    inner_lines = [
-        "set -e",
-        "apt-get update -y && apt-get install -y curl ca-certificates",
-        "curl https://cli.nexus.xyz/ | sh",
-        "echo 'export PATH=\"$HOME/.nexus/bin:$PATH\"' >> ~/.bashrc",
-        ". ~/.bashrc",
-    ]
 
+def proot_nexus_bin() -> str:
+    return os.path.join(proot_home(PROOT_DISTRO), ".nexus", "bin", "nexus-network")
+
+
+@traced()
+def provision_termux():
+    # Persiapan Termux → Ubuntu proot → Nexus CLI. Langkah yang sudah siap dilewati (stamp).
+    import proot_snapshot
+    from pkg_resolver import apt_ensure_script
+    from provision_cache import ProvisionState, file_fingerprint
+
+    state = ProvisionState()
+    state.step(
+        "termux-pkgs", {"pkgs": ["proot-distro", "curl"]},
+        lambda: ensure_termux_pkgs(["proot-distro", "curl"]),
+        verify=lambda: shutil.which("proot-distro") and shutil.which("curl"),
+    )
+    # NEXUS_SNAPSHOT: rootfs golden = satu extract lokal; stamp dari snapshot ikut dimuat
+    if proot_snapshot.restore_if_configured(PROOT_DISTRO):
+        state = ProvisionState()
+    state.step(
+        "proot-rootfs", {"distro": PROOT_DISTRO},
+        lambda: run(["proot-distro", "install", PROOT_DISTRO], check=False),
+        verify=lambda: os.path.isdir(rootfs_path(PROOT_DISTRO)),
+    )
+    state.step(
+        "proot-apt", {"distro": PROOT_DISTRO, "pkgs": PROOT_APT_PKGS},
+        lambda: run_proot(apt_ensure_script(PROOT_APT_PKGS)),
+        verify=lambda: os.path.isdir(rootfs_path(PROOT_DISTRO)),
+    )
+    state.step(
+        "nexus-cli", {"distro": PROOT_DISTRO, "url": NEXUS_INSTALL_URL},
+        lambda: run_proot("\n".join([
+            "set -e",
+            f"curl {NEXUS_INSTALL_URL} | sh",
+            "grep -qs '.nexus/bin' ~/.bashrc || echo 'export PATH=\"$HOME/.nexus/bin:$PATH\"' >> ~/.bashrc",
+        ])),
+        verify=lambda: os.path.isfile(proot_nexus_bin()),
+        max_age=CLI_REFRESH,
+        info=lambda: {"binary": file_fingerprint(proot_nexus_bin())},
+    )
+
+
+def start_nexus_termux(node_id=None, wallet=None, login=False, status=False, stop=False, metrics=False, governor=False):
+    nn = PROOT_NN
+    if stop:
+        stop_watchdog()
+    if status or stop:
+        # Tanpa provisioning: kalau CLI belum ada, node pasti tidak jalan
+        if not os.path.isfile(proot_nexus_bin()):
+            print("[i] Nexus CLI belum terpasang di proot. Jalankan dulu dengan --node-id.")
+            return
+        cmd = f"{nn} status || {nn} ps || {nn} --version" if status else f"{nn} stop || true"
+        print(f"$ [proot] {cmd}")
+        with span(nexus_trace.short(cmd), cat="proot", cmd=cmd) as sp:
+            code, out, err = proot_exec(cmd, PROOT_DISTRO)
+            sp["rc"] = code
+        sys.stdout.write(out)
+        sys.stderr.write(err)
+        if code != 0:
+            sys.exit(code)
+        return
+
+    provision_termux()
     if login:
-        inner_lines.append("$HOME/.nexus/bin/nexus-network login --no-open")
-    elif status:
-        inner_lines.append("$HOME/.nexus/bin/nexus-network status || $HOME/.nexus/bin/nexus-network ps || $HOME/.nexus/bin/nexus-network --version")
-    elif stop:
-        inner_lines.append("$HOME/.nexus/bin/nexus-network stop || true")
-    elif node_id:
-        inner_lines.append(f"$HOME/.nexus/bin/nexus-network start --node-id {shlex.quote(node_id)}")
+        run_proot([PROOT_NN_ABS, "login", "--no-open"])
+        return
+    if node_id:
+        # Satu perintah → exec langsung di proot, tanpa bash di tengah
+        cmd = [PROOT_NN_ABS, "start", "--node-id", node_id]
     elif wallet:
-        inner_lines.append(f"$HOME/.nexus/bin/nexus-network register-user --wallet-address {shlex.quote(wallet)}")
-        inner_lines.append("$HOME/.nexus/bin/nexus-network register-node")
-        inner_lines.append("$HOME/.nexus/bin/nexus-network start")
+        cmd = "\n".join([
+            "set -e",
+            f"{nn} register-user --wallet-address {shlex.quote(wallet)}",
+            f"{nn} register-node",
+            f"exec {nn} start",
+        ])
     else:
-        inner_lines.append('echo "Set --node-id <ID> atau --wallet <ADDR>" && exit 2')
+        print("Set --node-id <ID> atau --wallet <ADDR>")
+        sys.exit(2)
+    # Hasil --tune: flag thread + affinity/nice (diwarisi proot → node)
+    import nexus_tune
 
-    inner_script = "\n".join(inner_lines)
-    cmd = "proot-distro login ubuntu -- bash -lc " + shlex.quote(inner_script)
-    run(cmd)
+    cmd = nexus_tune.apply_on_start(cmd)
+    if governor:
+        start_governor()
+
+    if metrics:
+        log_path = os.path.join(proot_home(PROOT_DISTRO), ".nexus-run", "node.log")
+        run_node(direct_argv(PROOT_DISTRO, cmd), log_path, metrics)
+    else:
+        run_proot(cmd)
+
+
+def prepare_backend(backend):
+    """Provisioning sesuai backend (langkah ber-stamp yang sudah ada), lalu persiapan khusus backend."""
+    if backend.name in ("proot", "chroot"):
+        provision_termux()  # chroot memakai rootfs proot yang sama
+    else:
+        ensure_cli_linux()  # podman me-mount CLI host ke container
+    if not backend.prepare():
+        print(f"[x] Backend {backend.name} belum siap: {backend.missing()}")
+        sys.exit(1)
+    return backend
+
+
+def start_nexus_backend(backend, node_id=None, wallet=None, login=False, status=False, stop=False, metrics=False,
+                        governor=False):
+    """Backend selain default platform (podman / chroot, atau native di Termux): interface nexus_backends."""
+    if status:
+        import nexus_backends
+
+        print(nexus_backends.format_status(backend.status()))
+        return
+    if stop:
+        print("[✓] Node dihentikan." if backend.stop() else "[i] Node tidak berjalan.")
+        return
+    prepare_backend(backend)
+    if login:
+        run(backend.argv(["login", "--no-open"]))
+        return
+    if node_id:
+        cmd = backend.argv(["start", "--node-id", node_id])
+    elif wallet:
+        run(backend.argv(["register-user", "--wallet-address", wallet]))
+        run(backend.argv(["register-node"]))
+        cmd = backend.argv(["start"])
+    else:
+        print("Set --node-id <ID> atau --wallet <ADDR>")
+        sys.exit(2)
+    import nexus_tune
+
+    cmd = nexus_tune.apply_on_start(cmd)
+    if governor:
+        start_governor()
+    run_node(cmd, os.path.join(backend.run_dir(), "node.log"), metrics)
+
+
+def select_backend(node_id=None, seconds=None) -> None:
+    """Benchmark backend yang siap; yang tercepat dipakai otomatis saat start berikutnya."""
+    import nexus_backends
+    import nexus_tune
+
+    if node_id:
+        print(f"[i] Dengan --node-id: tiap backend juga menjalankan node {seconds or nexus_tune.SECONDS:.0f}s.")
+    sys.exit(0 if nexus_backends.select(node_id, seconds, distro=PROOT_DISTRO) else 1)
+
+
+def tune_node(node_id, seconds=None):
+    """Trial thread × set core dengan node sungguhan; hasil terbaik dipakai otomatis saat start."""
+    import nexus_tune
+
+    if not node_id:
+        print("Usage: python bot.py --node-id <ID> --tune [--tune-seconds N]")
+        sys.exit(2)
+    backend = prepare_backend(node_backend())
+    base = [backend.cli, "start", "--node-id", node_id]
+    best = nexus_tune.tune(base, backend.wrap, seconds=seconds or nexus_tune.SECONDS)
+    sys.exit(0 if best else 1)
+
+
+def start_fleet(fleet_file, status=False, stop=False, metrics=False):
+    import nexus_fleet
+
+    if status:
+        sys.exit(nexus_fleet.print_status())
+    if stop:
+        sys.exit(nexus_fleet.stop_fleet())
+
+    node_ids = nexus_fleet.load_fleet(fleet_file)
+    # Satu kali persiapan backend, lalu tiap node = satu child (mis. satu proot-distro per node)
+    backend = prepare_backend(node_backend())
+
+    def build_argv(node_id):
+        return backend.argv(["start", "--node-id", node_id])
+
+    if metrics:
+        import nexus_metrics
+
+        if nexus_metrics.serve([
+            nexus_metrics.NodeMetrics(n, nexus_fleet.log_path(n))
+            for n in node_ids
+        ]):
+            print(f"[i] Metrik fleet: http://127.0.0.1:{nexus_metrics.DEFAULT_PORT}/metrics")
+    sys.exit(nexus_fleet.run_fleet(node_ids, build_argv))
 
 
 def parse_args(argv):
     node_id = None
     wallet = None
+    fleet = None
     login = False
     status = False
     stop = False
+    extra = {"metrics": False, "trace": False, "snapshot": None, "restore": None, "tune": False, "tune_seconds": None,
+             "governor": False, "logs": False, "tail": 80, "restart": False,
+             "since": None, "until": None, "grep": None, "stats": False, "backend": None, "select_backend": False,
+             "budget": None}
 
     i = 0
     while i < len(argv):
@@ -100,12 +434,52 @@ def parse_args(argv):
         elif a == "--wallet" and i + 1 < len(argv):
             wallet = argv[i + 1]
             i += 1
+        elif a == "--fleet" and i + 1 < len(argv):
+            fleet = argv[i + 1]
+            i += 1
         elif a == "--login":
             login = True
         elif a == "--status":
             status = True
         elif a == "--stop":
             stop = True
+        elif a == "--metrics":
+            extra["metrics"] = True
+        elif a == "--trace":
+            extra["trace"] = True
+        elif a == "--logs":
+            extra["logs"] = True
+        elif a == "--tail" and i + 1 < len(argv):
+            extra["tail"] = int(argv[i + 1])
+            i += 1
+        elif a in ("--since", "--until", "--grep") and i + 1 < len(argv):
+            extra[a[2:]] = argv[i + 1]
+            i += 1
+        elif a == "--restart":
+            extra["restart"] = True
+        elif a == "--stats":
+            extra["stats"] = True
+        elif a == "--governor":
+            extra["governor"] = True
+        elif a == "--tune":
+            extra["tune"] = True
+        elif a == "--backend" and i + 1 < len(argv):
+            extra["backend"] = argv[i + 1]
+            i += 1
+        elif a == "--budget" and i + 1 < len(argv):
+            extra["budget"] = argv[i + 1]
+            i += 1
+        elif a == "--select-backend":
+            extra["select_backend"] = True
+        elif a == "--tune-seconds" and i + 1 < len(argv):
+            extra["tune_seconds"] = float(argv[i + 1])
+            i += 1
+        elif a == "--snapshot" and i + 1 < len(argv):
+            extra["snapshot"] = argv[i + 1]
+            i += 1
+        elif a == "--restore" and i + 1 < len(argv):
+            extra["restore"] = argv[i + 1]
+            i += 1
         else:
             print(f"Unknown arg: {a}")
             sys.exit(2)
@@ -114,12 +488,53 @@ def parse_args(argv):
     # Fallback dari env var
     node_id = node_id or os.getenv("NODE_ID")
     wallet = wallet or os.getenv("WALLET_ADDRESS")
-    return node_id, wallet, login, status, stop
+    return node_id, wallet, fleet, login, status, stop, extra
 
 
 if __name__ == "__main__":
-    node_id, wallet, login, status, stop = parse_args(sys.argv[1:])
-    if is_termux():
-        start_nexus_termux(node_id, wallet, login, status, stop)
+    node_id, wallet, fleet, login, status, stop, extra = parse_args(sys.argv[1:])
+    if extra["trace"]:
+        nexus_trace.enable()
+    if extra["backend"]:
+        import nexus_backends
+
+        nexus_backends.get(extra["backend"])  # nama salah → keluar sebelum apa pun dijalankan
+        os.environ["NEXUS_BACKEND"] = extra["backend"]  # ikut terbaca watchdog / helper lain
+    if extra["snapshot"]:
+        import proot_snapshot
+
+        sys.exit(proot_snapshot.main([extra["snapshot"], "--distro", PROOT_DISTRO]))
+    elif extra["restore"]:
+        import proot_snapshot
+
+        sys.exit(proot_snapshot.main(["restore", extra["restore"], "--distro", PROOT_DISTRO]))
+    elif extra["logs"] and fleet:
+        import nexus_fleet
+
+        if not node_id:
+            print("[x] --fleet --logs butuh --node-id <ID> (node mana yang dibaca).")
+            sys.exit(2)
+        show_logs(extra["tail"], extra["since"], extra["until"], extra["grep"], nexus_fleet.log_path(node_id))
+    elif extra["logs"]:
+        show_logs(extra["tail"], extra["since"], extra["until"], extra["grep"])
+    elif extra["stats"]:
+        show_stats(extra["since"])
+    elif extra["budget"]:
+        budget(extra["budget"])
+    elif extra["restart"]:
+        restart_detached(node_id, extra["governor"])
+    elif extra["tune"]:
+        tune_node(node_id, extra["tune_seconds"])
+    elif extra["select_backend"]:
+        select_backend(node_id, extra["tune_seconds"])
+    elif fleet:
+        start_fleet(fleet, status, stop, extra["metrics"])
     else:
-        start_nexus_linux(node_id, wallet, login, status, stop)
+        backend = node_backend()
+        args = (node_id, wallet, login, status, stop, extra["metrics"], extra["governor"])
+        if backend.name == "proot":
+            start_nexus_termux(*args)
+        elif backend.name == "native":
+            start_nexus_linux(*args)
+        else:
+            start_nexus_backend(backend, *args)
@@ -0,0 +1,526 @@
+# nexus_backends.py
+"""
+Backend eksekusi nexus-network: native / proot / podman / chroot.
+- Interface seragam: missing() (cek murah, tanpa spawn) / prepare() / argv(args) /
+  start(node_id) (background lewat watchdog) / stop() / status() / logs()
+- proot & chroot memakai rootfs proot-distro yang sama (run dir $HOME/.nexus-run milik
+  Ubuntu); chroot = tanpa lapisan ptrace, butuh root. native & podman memakai ~/.nexus-run host
+- podman: binari host (~/.nexus di-mount) dijalankan di image NEXUS_PODMAN_IMAGE
+- select(): workload singkat di tiap backend yang siap — NEXUS_BACKEND_BENCH_RUNS (default 20)
+  kali `nexus-network --version` dalam satu sesi backend, dikurangi waktu start sesi itu
+  sendiri → biaya exec + loader + syscall per run (tempat overhead ptrace proot terasa).
+  Dengan --node-id: ditambah trial node sungguhan (proof/menit, nexus_tune.run_trial).
+  Tercepat yang berhasil disimpan per perangkat di <state_dir>/backend.json
+- resolve(): NEXUS_BACKEND / --backend → hasil select yang masih siap → default
+  (proot di Termux, selain itu native)
+Pakai:  python bot.py --select-backend [--node-id <ID>]
+        python bot.py --node-id <ID> --backend chroot
+        python nexus_backends.py list | select [--node-id ID] | show | reset
+        python nexus_backends.py start --node-id ID | stop | status | logs [--backend NAMA]
+"""
+import abc
+import argparse
+import json
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import time
+
+# nexus_tune (fingerprint / trial) diimpor di fungsi yang memakainya → watchdog --status / --stop ringan
+from proot_broker import direct_argv, proot_home, rootfs_path
+from provision_cache import pid_alive, read_pid, state_dir, write_json
+
+DEFAULT_DISTRO = "ubuntu"
+NEXUS_INSTALL_URL = "https://cli.nexus.xyz/"
+INNER_CLI = "/root/.nexus/bin/nexus-network"  # path CLI di dalam rootfs / container
+PODMAN_IMAGE = os.environ.get("NEXUS_PODMAN_IMAGE", "docker.io/library/ubuntu:24.04")
+PODMAN_NAME = "nexus-node"
+BENCH_RUNS = int(os.environ.get("NEXUS_BACKEND_BENCH_RUNS", "20"))
+BENCH_TIMEOUT = 300
+KILL_GRACE = 10.0
+CHROOT_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+
+
+def backend_path():
+    return os.path.join(state_dir(), "backend.json")
+
+
+def is_termux():
+    prefix = os.environ.get("PREFIX", "")
+    return prefix.endswith("/usr") and "com.termux" in prefix
+
+
+def _pid_file_argv(cli_args, tuned):
+    """bash -c: tulis $$ ke node.pid lalu exec CLI (PID node asli, dipakai proot & chroot)."""
+    import nexus_tune
+
+    inner = (
+        'mkdir -p "$HOME/.nexus-run" && echo $$ > "$HOME/.nexus-run/node.pid" && '
+        f'exec "$HOME/.nexus/bin/nexus-network" {shlex.join(cli_args)}'
+    )
+    return nexus_tune.apply_argv(inner, tuned)
+
+
+# =======================
+# Backend
+# =======================
+class Backend(abc.ABC):
+    name = ""
+    distro = None  # None = ~/.nexus-run host; nama distro = $HOME/.nexus-run di rootfs
+    write_pid = True  # False: node.pid ditulis dari dalam backend (bukan PID child watchdog)
+    cli = INNER_CLI
+
+    @abc.abstractmethod
+    def missing(self):
+        """Alasan backend belum bisa dipakai, atau None. Hanya cek file/PATH (murah)."""
+
+    def prepare(self):
+        """Pasang / siapkan yang kurang. Return True bila siap."""
+        return self.missing() is None
+
+    @abc.abstractmethod
+    def wrap(self, argv):
+        """argv (argv[0] = path di dalam backend) → argv yang di-exec dari host."""
+
+    def argv(self, args):
+        return self.wrap([self.cli, *args])
+
+    def shell_argv(self, script):
+        return self.wrap(["/bin/sh", "-c", script])
+
+    def node_argv(self, node_id, tuned=None):
+        import nexus_tune
+
+        return nexus_tune.apply_argv(self.argv(["start", "--node-id", node_id]), tuned)
+
+    def run_dir(self):
+        import nexus_watchdog
+
+        return nexus_watchdog.run_dir(self.distro)
+
+    def node_pids(self, pid):
+        """PID host milik node ini: pid (anak watchdog) + turunannya → sampler / governor tidak
+        menyentuh node lain di host."""
+        from nexus_sampler import process_tree
+
+        return process_tree(roots=[pid])
+
+    # ---- operasi seragam ----
+    def start(self, node_id, restart=True, governor=False):
+        """Node di background di bawah watchdog. Return PID watchdog atau None."""
+        import nexus_watchdog
+
+        if not self.prepare():
+            print(f"[x] Backend {self.name} belum siap: {self.missing()}")
+            return None
+        nexus_watchdog.stop_watchdog(self.distro)
+        return nexus_watchdog.spawn_detached(node_id, self.distro, restart=restart, governor=governor,
+                                             backend=self.name)
+
+    def _node_pid(self):
+        pid = read_pid(os.path.join(self.run_dir(), "node.pid"))
+        return pid if pid_alive(pid) else None
+
+    def stop(self):
+        """Hentikan watchdog lalu node. Return True bila ada yang dihentikan."""
+        import nexus_watchdog
+
+        stopped = nexus_watchdog.stop_watchdog(self.distro)
+        pid = self._node_pid()
+        if pid:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                deadline = time.time() + KILL_GRACE
+                while time.time() < deadline and pid_alive(pid):
+                    time.sleep(0.2)
+                if pid_alive(pid):
+                    os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            stopped = True
+        try:
+            os.remove(os.path.join(self.run_dir(), "node.pid"))
+        except OSError:
+            pass
+        return stopped
+
+    def status(self):
+        import nexus_sampler
+        import nexus_watchdog
+
+        return {
+            "backend": self.name,
+            "ready": self.missing() is None,
+            "watchdog_pid": nexus_watchdog.watchdog_pid(self.distro),
+            "node_pid": self._node_pid(),
+            "sample": nexus_sampler.latest(self.run_dir()),
+        }
+
+    def logs(self, tail=80, since=None, until=None, grep=None):
+        from nexus_logs import parse_time, print_search, tail_lines
+
+        log_path = os.path.join(self.run_dir(), "node.log")
+        if since or until or grep:
+            print_search(log_path, since and parse_time(since), until and parse_time(until), grep)
+        else:
+            sys.stdout.write(tail_lines(log_path, tail).decode("utf-8", "replace"))
+
+
+class NativeBackend(Backend):
+    name = "native"
+
+    def __init__(self, distro=None):
+        # Lokasi installer resmi dulu (sama dengan bot.py / watchdog), lalu PATH
+        self.cli = os.path.join(os.path.expanduser("~"), ".nexus", "bin", "nexus-network")
+        if not os.path.isfile(self.cli):
+            self.cli = shutil.which("nexus-network") or self.cli
+
+    def missing(self):
+        return None if os.path.isfile(self.cli) else f"CLI belum terpasang ({self.cli})"
+
+    def prepare(self):
+        if self.missing():
+            subprocess.run(["sh", "-c", f"curl -fsSL {NEXUS_INSTALL_URL} | sh"])
+        return self.missing() is None
+
+    def wrap(self, argv):
+        return list(argv)
+
+    def shell_argv(self, script):
+        return ["sh", "-c", script]
+
+
+class ProotBackend(Backend):
+    name = "proot"
+    write_pid = False
+
+    def __init__(self, distro=None):
+        self.distro = distro or DEFAULT_DISTRO
+
+    def missing(self):
+        if not shutil.which("proot-distro"):
+            return "proot-distro tidak ada"
+        if not os.path.isfile(os.path.join(proot_home(self.distro), ".nexus", "bin", "nexus-network")):
+            return f"CLI belum terpasang di proot {self.distro}"
+        return None
+
+    def prepare(self):
+        if self.missing():
+            import nexus_quick_install_termux
+
+            nexus_quick_install_termux.provision_proot()
+        return self.missing() is None
+
+    def wrap(self, argv):
+        return direct_argv(self.distro, list(argv))
+
+    def node_argv(self, node_id, tuned=None):
+        return direct_argv(self.distro, ["bash", "-c", _pid_file_argv(["start", "--node-id", node_id], tuned)])
+
+
+class ChrootBackend(Backend):
+    """Rootfs proot-distro dijalankan lewat chroot asli (root / HP rooted): tanpa ptrace."""
+
+    name = "chroot"
+    write_pid = False
+
+    def __init__(self, distro=None):
+        self.distro = distro or DEFAULT_DISTRO
+        self.rootfs = rootfs_path(self.distro)
+
+    def missing(self):
+        if not hasattr(os, "geteuid") or os.geteuid() != 0:
+            return "butuh root"
+        if not shutil.which("chroot"):
+            return "chroot tidak ada"
+        if not os.path.isfile(os.path.join(self.rootfs, INNER_CLI.lstrip("/"))):
+            return f"CLI belum terpasang di rootfs {self.distro} (provision proot dulu)"
+        return None
+
+    def prepare(self):
+        if self.missing():
+            return False
+        # /proc, /sys, /dev di rootfs (proot memalsukannya; chroot butuh mount asli)
+        for src, dst, args in (("proc", "proc", ["-t", "proc"]), ("/sys", "sys", ["--rbind"]),
+                               ("/dev", "dev", ["--rbind"])):
+            target = os.path.join(self.rootfs, dst)
+            if not os.path.ismount(target):
+                os.makedirs(target, exist_ok=True)
+                if subprocess.run(["mount", *args, src, target]).returncode != 0:
+                    print(f"[!] Gagal mount {target}")
+                    return False
+        return True
+
+    def wrap(self, argv):
+        return ["chroot", self.rootfs, "/usr/bin/env", "-i", "HOME=/root", f"PATH={CHROOT_PATH}",
+                "TERM=xterm", *argv]
+
+    def node_argv(self, node_id, tuned=None):
+        return self.wrap(["/bin/bash", "-c", _pid_file_argv(["start", "--node-id", node_id], tuned)])
+
+
+class PodmanBackend(Backend):
+    """Binari host di container (network host, ~/.nexus di-mount → config & node-id sama)."""
+
+    name = "podman"
+
+    def __init__(self, distro=None):
+        self.home_nexus = os.path.join(os.path.expanduser("~"), ".nexus")
+
+    def missing(self):
+        if not shutil.which("podman"):
+            return "podman tidak ada"
+        if not os.path.isfile(os.path.join(self.home_nexus, "bin", "nexus-network")):
+            return "CLI native belum terpasang (di-mount ke container)"
+        return None
+
+    def prepare(self):
+        if not shutil.which("podman") or not NativeBackend().prepare():
+            return False
+        if subprocess.run(["podman", "image", "exists", PODMAN_IMAGE]).returncode != 0:
+            return subprocess.run(["podman", "pull", PODMAN_IMAGE]).returncode == 0
+        return True
+
+    def wrap(self, argv, name=None):
+        run = ["podman", "run", "--rm", "--network", "host", "-e", "HOME=/root",
+               "-v", f"{self.home_nexus}:/root/.nexus"]
+        if name:
+            run += ["--name", name, "--replace"]  # sisa container dari crash sebelumnya diganti
+        return run + [PODMAN_IMAGE, *argv]
+
+    def node_argv(self, node_id, tuned=None):
+        # --name tetap → stop() bisa `podman stop` walau client podman sudah mati
+        import nexus_tune
+
+        argv = self.wrap([self.cli, "start", "--node-id", node_id], name=PODMAN_NAME)
+        return nexus_tune.apply_argv(argv, tuned)
+
+    def node_pids(self, pid):
+        # Proses container anak conmon, bukan turunan `podman run` → tambahkan PID container
+        try:
+            p = subprocess.run(["podman", "inspect", "--format", "{{.State.Pid}}", PODMAN_NAME],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            value = p.stdout.strip() if p.returncode == 0 else ""
+        except OSError:
+            value = ""
+        roots = [pid] + ([int(value)] if value.isdigit() and int(value) > 0 else [])
+        from nexus_sampler import process_tree
+
+        return process_tree(roots=roots)
+
+    def stop(self):
+        stopped = super().stop()
+        if shutil.which("podman"):
+            code = subprocess.run(["podman", "rm", "-f", "-t", str(int(KILL_GRACE)), PODMAN_NAME],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+            stopped = stopped or code == 0
+        return stopped
+
+
+BACKENDS = {cls.name: cls for cls in (NativeBackend, ProotBackend, PodmanBackend, ChrootBackend)}
+
+
+def get(name, distro=None):
+    if name not in BACKENDS:
+        raise SystemExit(f"[x] Backend tidak dikenal: {name} (pilihan: {', '.join(BACKENDS)})")
+    return BACKENDS[name](distro)
+
+
+def default_name():
+    return "proot" if is_termux() else "native"
+
+
+# =======================
+# Pilihan tersimpan
+# =======================
+def load():
+    try:
+        with open(backend_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"devices": {}}
+
+
+def save(data):
+    write_json(backend_path(), data)
+
+
+def chosen():
+    """Nama backend hasil select() untuk perangkat ini, atau None."""
+    devices = load()["devices"]
+    if not devices:
+        return None  # belum pernah select → tanpa baca sidik jari CPU
+    import nexus_tune
+
+    rec = devices.get(nexus_tune.device_key(nexus_tune.fingerprint()))
+    return rec["backend"] if rec else None
+
+
+def resolve(name=None, distro=None):
+    """--backend / NEXUS_BACKEND → pilihan tersimpan (bila masih siap) → default platform."""
+    name = name or os.environ.get("NEXUS_BACKEND")
+    if name:
+        return get(name, distro)
+    picked = chosen()
+    if picked in BACKENDS:
+        backend = get(picked, distro)
+        if backend.missing() is None:
+            return backend
+    return get(default_name(), distro)
+
+
+# =======================
+# Benchmark & select
+# =======================
+def _timed(argv, timeout=BENCH_TIMEOUT):
+    start = time.perf_counter()
+    try:
+        p = subprocess.run(argv, stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return None, None, str(e)
+    return time.perf_counter() - start, p.returncode, (p.stdout or "") + (p.stderr or "")
+
+
+def benchmark(backend, runs=BENCH_RUNS):
+    """Biaya per run `nexus-network --version` di backend (ms), start sesi backend tidak dihitung."""
+    r = {"backend": backend.name, "ok": False}
+    elapsed, code, out = _timed(backend.argv(["--version"]))
+    # Exit negatif / "Bad system call" = binari tidak jalan di backend ini (mis. native di Android)
+    if elapsed is None or code != 0 or "bad system call" in out.lower():
+        r["error"] = (out.strip().splitlines() or [f"exit={code}"])[-1][:200]
+        return r
+    r["version"] = (out.strip().splitlines() or [""])[-1][:80]
+    empty, _, _ = _timed(backend.shell_argv("true"))
+    loop = (f"i=0; while [ $i -lt {runs} ]; do {shlex.quote(backend.cli)} --version >/dev/null 2>&1 "
+            "|| exit 3; i=$((i+1)); done")
+    elapsed, code, out = _timed(backend.shell_argv(loop))
+    if elapsed is None or code != 0 or empty is None:
+        r["error"] = f"workload gagal (exit={code})"
+        return r
+    r.update(ok=True, startup_ms=round(empty * 1000, 1), per_run_ms=round(max(0.0, elapsed - empty) / runs * 1000, 2))
+    return r
+
+
+def _score(r):
+    # proof/menit dari trial (bila ada) menang; selain itu biaya per run terkecil
+    return (-(r.get("proofs_per_min") or 0), r["per_run_ms"])
+
+
+def select(node_id=None, seconds=None, names=None, distro=None):
+    """Benchmark semua backend yang siap; simpan & return nama tercepat (None bila tidak ada)."""
+    import nexus_tune
+
+    results = []
+    for name in names or BACKENDS:
+        backend = get(name, distro)
+        reason = backend.missing()
+        if reason:
+            print(f"[-] {name:<7} dilewati: {reason}")
+            continue
+        print(f"[→] {name:<7} {BENCH_RUNS}× --version ...")
+        r = benchmark(backend)
+        if r["ok"] and node_id:
+            print(f"[→] {name:<7} trial node {seconds or nexus_tune.SECONDS:.0f}s ...")
+            cfg = nexus_tune.load_best()
+            trial = nexus_tune.run_trial(backend.node_argv(node_id, cfg), cfg, seconds or nexus_tune.SECONDS)
+            r.update(proofs_per_min=trial["proofs_per_min"], tasks=trial["tasks"])
+        results.append(r)
+        print(f"    {format_result(r)}")
+    ok = [r for r in results if r["ok"]]
+    if not ok:
+        print("[x] Tidak ada backend yang berhasil menjalankan nexus-network.")
+        return None
+    best = min(ok, key=_score)["backend"]
+    fp = nexus_tune.fingerprint()
+    data = load()
+    data["devices"][nexus_tune.device_key(fp)] = {
+        "fingerprint": fp,
+        "backend": best,
+        "selected_at": time.time(),
+        "results": results,
+    }
+    save(data)
+    print(f"[✓] Backend tercepat: {best} → disimpan ({backend_path()})")
+    return best
+
+
+def format_result(r):
+    if not r["ok"]:
+        return f"gagal: {r.get('error', '')}"
+    text = f"{r['per_run_ms']:.1f} ms/run (start sesi {r['startup_ms']:.0f} ms)"
+    if r.get("proofs_per_min") is not None:
+        text += f" · {r['proofs_per_min']:.2f} proof/menit"
+    return text
+
+
+def format_status(st):
+    sample = st["sample"]
+    lines = [f"BACKEND: {st['backend']}{'' if st['ready'] else ' (belum siap)'}",
+             f"NODE: {'RUNNING (PID %s)' % st['node_pid'] if st['node_pid'] else 'NOT RUNNING'}"
+             f"  watchdog={'PID %s' % st['watchdog_pid'] if st['watchdog_pid'] else '-'}"]
+    if sample and st["node_pid"]:
+        lines.append(f"RESOURCE: CPU {sample['cpu']:.0f}%  RSS {sample['rss'] / 2**20:.0f} MB  thread {sample['threads']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Backend eksekusi nexus-network (native/proot/podman/chroot)")
+    ap.add_argument("op", choices=["list", "select", "show", "reset", "start", "stop", "status", "logs"])
+    ap.add_argument("--backend", choices=list(BACKENDS), help="default: NEXUS_BACKEND / hasil select / platform")
+    ap.add_argument("--distro", default=None, help=f"rootfs proot/chroot (default {DEFAULT_DISTRO})")
+    ap.add_argument("--node-id")
+    ap.add_argument("--seconds", type=float, default=None, help="select: durasi trial node per backend")
+    ap.add_argument("--tail", type=int, default=80)
+    args = ap.parse_args(argv)
+    import nexus_tune
+
+    if args.op == "list":
+        current = resolve(args.backend, args.distro).name
+        for name in BACKENDS:
+            reason = get(name, args.distro).missing()
+            mark = "*" if name == current else " "
+            print(f"{mark} {name:<7} {'siap' if reason is None else reason}")
+        return 0
+    if args.op == "select":
+        names = [args.backend] if args.backend else None
+        return 0 if select(args.node_id, args.seconds, names, args.distro) else 1
+    if args.op == "show":
+        data = load()
+        key = nexus_tune.device_key(nexus_tune.fingerprint())
+        if not data["devices"]:
+            print("[i] Belum ada hasil select.")
+        for k, rec in data["devices"].items():
+            at = time.strftime("%Y-%m-%d %H:%M", time.localtime(rec["selected_at"]))
+            print(f"{'*' if k == key else ' '} {k}  {rec['fingerprint']['model']} · {at} → {rec['backend']}")
+            for r in rec["results"]:
+                print(f"    {r['backend']:<7} {format_result(r)}")
+        return 0
+    if args.op == "reset":
+        data = load()
+        data["devices"].pop(nexus_tune.device_key(nexus_tune.fingerprint()), None)
+        save(data)
+        print("[✓] Pilihan backend perangkat ini dihapus.")
+        return 0
+
+    backend = resolve(args.backend, args.distro)
+    if args.op == "start":
+        if not args.node_id:
+            ap.error("start butuh --node-id")
+        pid = backend.start(args.node_id)
+        if not pid:
+            return 1
+        print(f"[✓] Node ({backend.name}) berjalan di background (watchdog PID {pid}).")
+    elif args.op == "stop":
+        print("[✓] Node dihentikan." if backend.stop() else "[i] Node tidak berjalan.")
+    elif args.op == "status":
+        print(format_status(backend.status()))
+    else:
+        backend.logs(args.tail)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,544 @@
+# nexus_budget.py
+"""
+Pembagian CPU / RAM host antara node Nexus (bot.py) dan worker Tashi (tashi/bot.py).
+- Rencana dari satu angka: NEXUS_BUDGET_SHARE (default 70) % core untuk Nexus, sisanya
+  untuk Tashi. Core dibagi utuh (Nexus dapat cluster tercepat, lihat nexus_tune.core_clusters),
+  kuota CPU = share × jumlah core, RAM (MemTotal − NEXUS_BUDGET_RESERVE_MB) dibagi sama
+  (atau --memory N% untuk Nexus)
+- Nexus: cgroup v2 (cpu.max, cpuset.cpus, memory.max di <NEXUS_CGROUP_ROOT>/nexus-budget/nexus)
+  bila bisa ditulis, plus affinity tiap thread (sched_setaffinity) → tetap berlaku tanpa root
+- Tashi: `podman update --cpus --cpuset-cpus --memory` ke container worker (lewat broker proot
+  bila rootfs Ubuntu ada); bila ditolak (rootless tanpa cgroup) → affinity ke proses container
+- Tiap NEXUS_BUDGET_PERIOD detik (default 30) CPU kedua pohon proses diukur dari /proc.
+  Workload yang idle (< NEXUS_BUDGET_IDLE % satu core, 2 periode berturut) atau tidak jalan
+  meminjamkan core-nya ke yang lain; peminjam diberi nice 10 → pemilik langsung menang
+  saat aktif lagi, lalu pembagian normal dipulihkan di periode berikutnya
+- Laporan share tercapai per workload (dari CPU yang terpakai dan dari kapasitas host),
+  RSS vs batas, mekanisme yang berhasil → <state_dir>/budget.json
+Pakai:  python bot.py --budget 70          (planner di background; --budget status / off)
+        python nexus_budget.py plan|apply|run|status|reset [--nexus 70] [--memory 60]
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import nexus_tune
+from nexus_sampler import CLK_TCK, each_task, process_tree, read_stat
+from provision_cache import pid_alive, read_pid, read_text, state_dir, write_json
+
+SHARE = float(os.environ.get("NEXUS_BUDGET_SHARE", "70"))
+PERIOD = float(os.environ.get("NEXUS_BUDGET_PERIOD", "30"))
+RESERVE_MB = int(os.environ.get("NEXUS_BUDGET_RESERVE_MB", "512"))
+IDLE = float(os.environ.get("NEXUS_BUDGET_IDLE", "5"))
+CGROUP_ROOT = os.environ.get("NEXUS_CGROUP_ROOT", "/sys/fs/cgroup")
+CGROUP_NAME = "nexus-budget"
+CPU_PERIOD_US = 100000
+IDLE_PERIODS = 2
+BORROW_NICE = 10
+AVG_ALPHA = 0.2
+TASHI_RECHECK = 120.0  # detik antar `podman inspect` saat container tidak ditemukan
+# Sama dengan tashi/bot.py
+TASHI_CONTAINER = "tashi-depin-worker"
+TASHI_DISTRO = "ubuntu"
+WORKLOADS = ("nexus", "tashi")
+
+
+def report_path():
+    return os.path.join(state_dir(), "budget.json")
+
+
+def pid_path():
+    return os.path.join(state_dir(), "budget.pid")
+
+
+def _gb(n, unlimited=False):
+    if unlimited and not n:
+        return "tanpa batas"
+    return f"{n / 2**30:.1f} GB" if n >= 2**30 else f"{n / 2**20:.0f} MB"
+
+
+def mem_total(meminfo="/proc/meminfo"):
+    for line in read_text(meminfo).splitlines():
+        if line.startswith("MemTotal:"):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+# =======================
+# Rencana
+# =======================
+def plan(share=SHARE, mem_share=None, clusters=None, memory=None):
+    """Share Nexus (%) → {"cores", "share", "nexus": {cpus, quota, memory}, "tashi": {...}}."""
+    share = min(95.0, max(5.0, share)) / 100
+    mem_share = share if mem_share is None else min(95.0, max(5.0, mem_share)) / 100
+    # Cluster tercepat dulu → untuk Nexus (proving = komputasi murni)
+    cores = [c for cl in (clusters or nexus_tune.core_clusters()) for c in cl]
+    n = len(cores)
+    k = min(n - 1, max(1, round(n * share))) if n > 1 else n
+    memory = max(0, (mem_total() if memory is None else memory) - RESERVE_MB * 2**20)
+    return {
+        "cores": n,
+        "share": share,
+        "nexus": {"cpus": sorted(cores[:k]), "quota": round(n * share, 2), "memory": int(memory * mem_share)},
+        # 1 core → keduanya berbagi core yang sama, hanya kuota yang membedakan
+        "tashi": {"cpus": sorted(cores[k:]) or sorted(cores), "quota": round(n * (1 - share), 2),
+                  "memory": int(memory * (1 - mem_share))},
+    }
+
+
+def targets(p, mode="split"):
+    """Batas efektif per workload; mode "nexus" / "tashi" = workload itu meminjam semua core."""
+    every = sorted(set(p["nexus"]["cpus"]) | set(p["tashi"]["cpus"]))
+    out = {}
+    for w in WORKLOADS:
+        out[w] = dict(p[w], nice=None)
+        if mode == w:
+            out[w].update(cpus=every, quota=float(p["cores"]), nice=BORROW_NICE)
+    return out
+
+
+# =======================
+# Penerapan
+# =======================
+def set_affinity(pids, cpus):
+    return each_task(pids, lambda tid: os.sched_setaffinity(tid, cpus))
+
+
+def set_borrow_nice(pids, borrowing):
+    """Peminjam core → nice BORROW_NICE; selesai meminjam → kembali 0. Nice dari governor
+    (kelipatan 4, tidak pernah 10) tidak disentuh."""
+    def fn(tid):
+        cur = os.getpriority(os.PRIO_PROCESS, tid)
+        if borrowing and cur < BORROW_NICE:
+            os.setpriority(os.PRIO_PROCESS, tid, BORROW_NICE)
+        elif not borrowing and cur == BORROW_NICE:
+            os.setpriority(os.PRIO_PROCESS, tid, 0)  # butuh root / RLIMIT_NICE
+    return each_task(pids, fn)
+
+
+class Cgroup:
+    """Sub-cgroup v2 untuk node Nexus: <root>/nexus-budget/nexus."""
+
+    def __init__(self, root=CGROUP_ROOT, name="nexus"):
+        self.root = root
+        self.parent = os.path.join(root, CGROUP_NAME)
+        self.path = os.path.join(self.parent, name)
+        self.error = None
+
+    @staticmethod
+    def _write(path, value):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(value)
+
+    def setup(self):
+        """Buat cgroup + aktifkan controller cpu/cpuset/memory. Return False (alasan di self.error)."""
+        if not os.path.exists(os.path.join(self.root, "cgroup.controllers")):
+            self.error = "cgroup v2 tidak ada"
+            return False
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            for d in (self.root, self.parent):
+                have = read_text(os.path.join(d, "cgroup.controllers")).split()
+                want = [c for c in ("cpu", "cpuset", "memory") if c in have]
+                if want:
+                    self._write(os.path.join(d, "cgroup.subtree_control"), " ".join("+" + c for c in want))
+        except OSError as e:
+            self.error = f"cgroup v2 tidak bisa ditulis ({e.strerror})"
+            return False
+        return True
+
+    def apply(self, t, pids):
+        """Tulis batas lalu pindahkan proses ke cgroup. Return daftar kegagalan."""
+        errors = []
+        files = {
+            "cpu.max": f"{max(1000, int(t['quota'] * CPU_PERIOD_US))} {CPU_PERIOD_US}",
+            "cpuset.cpus": nexus_tune.cpu_list(t["cpus"]),
+            "memory.max": str(t["memory"]) if t["memory"] else "max",
+        }
+        for name, value in files.items():
+            try:
+                self._write(os.path.join(self.path, name), value)
+            except OSError as e:
+                errors.append(f"{name}: {e.strerror}")
+        for pid in pids:
+            try:
+                self._write(os.path.join(self.path, "cgroup.procs"), str(pid))
+            except ProcessLookupError:
+                pass
+            except OSError as e:
+                errors.append(f"cgroup.procs {pid}: {e.strerror}")
+        return errors
+
+    def reset(self):
+        """Kembalikan proses ke cgroup root lalu hapus sub-cgroup."""
+        for pid in read_text(os.path.join(self.path, "cgroup.procs")).split():
+            try:
+                self._write(os.path.join(self.root, "cgroup.procs"), pid)
+            except OSError:
+                pass
+        for d in (self.path, self.parent):
+            try:
+                os.rmdir(d)
+            except OSError:
+                pass
+
+
+def tashi_podman(args):
+    """podman untuk worker Tashi: di proot bila rootfs ada (seperti tashi/bot.py), selain itu di host.
+    Return (exit code, stdout+stderr)."""
+    from proot_broker import proot_exec, rootfs_path
+
+    argv = ["podman"] + list(args)
+    if os.path.isdir(rootfs_path(TASHI_DISTRO)):
+        code, out, err = proot_exec(argv, TASHI_DISTRO)
+        return code, out + err
+    if not shutil.which("podman"):
+        return 127, "podman tidak ditemukan"
+    try:
+        p = subprocess.run(argv, capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return 1, str(e)
+    return p.returncode, p.stdout + p.stderr
+
+
+def tashi_root_pid():
+    """PID proses utama container worker (terlihat dari /proc host), atau None."""
+    code, out = tashi_podman(["inspect", "--format", "{{.State.Pid}}", TASHI_CONTAINER])
+    value = out.split()[0] if code == 0 and out.split() else ""
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+def tashi_update(t):
+    """Batas container lewat `podman update`. Return None bila berhasil, selain itu pesan error."""
+    args = ["update", "--cpus", f"{t['quota']:.2f}", "--cpuset-cpus", nexus_tune.cpu_list(t["cpus"])]
+    if t["memory"]:
+        args += ["--memory", f"{t['memory'] // 2**20}m"]
+    code, out = tashi_podman(args + [TASHI_CONTAINER])
+    return None if code == 0 else (out.strip().splitlines() or [f"exit {code}"])[-1]
+
+
+# =======================
+# Planner
+# =======================
+class Planner:
+    def __init__(self, share=SHARE, mem_share=None, period=PERIOD, idle=IDLE, proc="/proc",
+                 cgroup_root=CGROUP_ROOT, pids=None, log=print):
+        # pids: callable → {"nexus": [...], "tashi": [...]} (mis. untuk uji coba); default /proc + podman
+        self.plan = plan(share, mem_share)
+        self.period = period
+        self.idle = idle
+        self.proc = proc
+        self.cgroup = Cgroup(cgroup_root)
+        self.find_pids = pids
+        self.log = log
+        self.mode = "split"  # split / nexus (Nexus meminjam core Tashi) / tashi
+        self.use_cgroup = None  # diputuskan saat pertama kali menerapkan batas ke Nexus
+        self.mechanism = {w: [] for w in WORKLOADS}
+        self.errors = {w: None for w in WORKLOADS}
+        self.avg = {}
+        self._idle = dict.fromkeys(WORKLOADS, 0)
+        self._applied = {}  # workload → (mode, PID) terakhir diterapkan; proses baru perlu diterapkan lagi
+        self._tashi_pid = None
+        self._tashi_checked = 0.0
+        self._prev = None  # (t, {workload: {pid: ticks}})
+        self._stop = threading.Event()
+
+    def _tashi_root(self):
+        # PID container jarang berubah → `podman inspect` (spawn proot) hanya bila PID hilang
+        if self._tashi_pid and os.path.exists(f"{self.proc}/{self._tashi_pid}"):
+            return self._tashi_pid
+        if time.time() - self._tashi_checked >= TASHI_RECHECK:
+            self._tashi_checked = time.time()
+            self._tashi_pid = tashi_root_pid()
+        return self._tashi_pid if self._tashi_pid and os.path.exists(f"{self.proc}/{self._tashi_pid}") else None
+
+    def pids(self):
+        if self.find_pids:
+            return self.find_pids()
+        root = self._tashi_root()
+        return {"nexus": process_tree(self.proc), "tashi": process_tree(self.proc, roots=[root]) if root else []}
+
+    def measure(self, pids):
+        """(CPU % per workload sejak pengukuran sebelumnya atau None, RSS per workload)."""
+        now = time.time()
+        cur, rss = {}, {}
+        for w in WORKLOADS:
+            stats = {p: read_stat(p, self.proc) for p in pids[w]}
+            cur[w] = {p: st[3] for p, st in stats.items() if st}
+            rss[w] = sum(st[5] for st in stats.values() if st)
+        cpu = None
+        if self._prev:
+            dt = max(1e-6, now - self._prev[0])
+            # Hanya PID yang ada di kedua pengukuran (proses baru dihitung mulai periode berikutnya)
+            cpu = {w: sum(max(0, t - self._prev[1][w][p]) for p, t in cur[w].items() if p in self._prev[1][w])
+                   / CLK_TCK / dt * 100 for w in WORKLOADS}
+        self._prev = (now, cur)
+        return cpu, rss
+
+    def decide(self, cpu, pids):
+        """Update mode pinjam dari satu pengukuran. Return True bila mode berubah."""
+        for w in WORKLOADS:
+            busy = bool(pids[w]) and cpu[w] >= self.idle
+            self._idle[w] = 0 if busy else self._idle[w] + 1
+        mode = "split"
+        for w, other in (("nexus", "tashi"), ("tashi", "nexus")):
+            if self._idle[other] >= IDLE_PERIODS and not self._idle[w]:
+                mode = w
+        if mode == self.mode:
+            return False
+        self.mode = mode
+        return True
+
+    def describe(self):
+        if self.mode == "split":
+            return f"pembagian normal: Nexus {self.plan['share']:.0%}, Tashi {1 - self.plan['share']:.0%}"
+        lender = "tashi" if self.mode == "nexus" else "nexus"
+        return f"{lender} idle → {self.mode} memakai semua {self.plan['cores']} core (nice {BORROW_NICE})"
+
+    def _apply_nexus(self, t, pids):
+        mech, errors = [], []
+        if self.use_cgroup is None:
+            self.use_cgroup = self.cgroup.setup()
+            if not self.use_cgroup:
+                self.log(f"[budget] {self.cgroup.error} → Nexus dibatasi lewat affinity + nice")
+        if self.use_cgroup:
+            errors = self.cgroup.apply(t, pids)
+            mech.append("cgroup v2")
+        if set_affinity(pids, t["cpus"]):
+            mech.append("affinity")
+        else:
+            errors.append("affinity ditolak")
+        return mech, errors
+
+    def _apply_tashi(self, t, pids):
+        error = tashi_update(t)
+        if not error:
+            return ["podman update"], []
+        # Rootless tanpa delegasi cgroup (mis. proot) → minimal core-nya dibatasi dari host
+        if set_affinity(pids, t["cpus"]):
+            return ["affinity"], [f"podman update: {error}"]
+        return [], [f"podman update: {error}", "affinity ditolak"]
+
+    def apply(self, pids):
+        t = targets(self.plan, self.mode)
+        for w in WORKLOADS:
+            # Thread / anak baru mewarisi affinity → cukup diterapkan ulang saat mode / proses utama berubah
+            key = (self.mode, tuple(pids[w]) if w == "nexus" else self._tashi_pid)
+            if not pids[w] or self._applied.get(w) == key:
+                continue
+            mech, errors = (self._apply_nexus if w == "nexus" else self._apply_tashi)(t[w], pids[w])
+            if not set_borrow_nice(pids[w], t[w]["nice"] is not None):
+                errors.append("nice ditolak (menurunkan nice butuh root)")
+            if errors and errors != self.errors[w]:
+                self.log(f"[budget] {w}: " + "; ".join(errors))
+            self.mechanism[w], self.errors[w] = mech, errors or None
+            self._applied[w] = key
+
+    def save_report(self, cpu, rss, pids):
+        t = targets(self.plan, self.mode)
+        used = sum(cpu.values())
+        capacity = self.plan["cores"] * 100
+        workloads = {}
+        for w in WORKLOADS:
+            share = cpu[w] / used if used else None
+            if share is not None:
+                self.avg[w] = share if w not in self.avg else self.avg[w] * (1 - AVG_ALPHA) + share * AVG_ALPHA
+            workloads[w] = {
+                "running": bool(pids[w]),
+                "target": round(self.plan["share"] if w == "nexus" else 1 - self.plan["share"], 3),
+                "share": None if share is None else round(share, 3),
+                "share_avg": round(self.avg[w], 3) if w in self.avg else None,
+                "cpu_pct": round(cpu[w], 1),
+                "host_share": round(cpu[w] / capacity, 3) if capacity else None,
+                "rss": rss[w],
+                "memory_limit": t[w]["memory"],
+                "cpus": nexus_tune.cpu_list(t[w]["cpus"]),
+                "quota": t[w]["quota"],
+                "mechanism": self.mechanism[w],
+                "errors": self.errors[w],
+            }
+        data = {"updated_at": time.time(), "mode": self.mode, "cores": self.plan["cores"],
+                "period": self.period, "workloads": workloads}
+        write_json(report_path(), data)
+        return data
+
+    def step(self):
+        """Satu periode: cari proses, ukur CPU, putuskan pinjam / normal, terapkan batas, simpan laporan."""
+        pids = self.pids()
+        cpu, rss = self.measure(pids)
+        if cpu is not None and self.decide(cpu, pids):
+            self.log(f"[budget] {self.describe()}")
+        self.apply(pids)
+        return self.save_report(cpu, rss, pids) if cpu is not None else None
+
+    def run(self):
+        try:
+            while not self._stop.is_set():
+                self.step()
+                self._stop.wait(self.period)
+        finally:
+            # Berhenti saat meminjam → jangan tinggalkan satu workload memegang semua core
+            if self.mode != "split":
+                self.mode = "split"
+                self._applied.clear()
+                self.apply(self.pids())
+
+    def stop(self):
+        self._stop.set()
+
+
+# =======================
+# Laporan & daemon
+# =======================
+def load_report():
+    try:
+        with open(report_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _pct(value):
+    return "-" if value is None else f"{value:.0%}"
+
+
+def format_workload(name, w):
+    if not w["running"]:
+        state = "tidak jalan"
+    else:
+        state = (f"tercapai {_pct(w['share'])} (rata-rata {_pct(w['share_avg'])}), "
+                 f"CPU {w['cpu_pct']:.0f}% = {_pct(w['host_share'])} host")
+    mech = ", ".join(w["mechanism"]) or "-"
+    line = (f"  {name:<6} target {_pct(w['target'])}  {state}\n"
+            f"         core {w['cpus']} kuota {w['quota']:g}  RSS {_gb(w['rss'])} / {_gb(w['memory_limit'], True)}  [{mech}]")
+    if w.get("errors"):
+        line += "\n         [!] " + "; ".join(w["errors"])
+    return line
+
+
+def format_report(data, alive=None):
+    if not data:
+        return "[i] Planner budget belum pernah berjalan. Mulai: python bot.py --budget 70"
+    age = int(time.time() - data["updated_at"])
+    mode = "normal" if data["mode"] == "split" else f"{data['mode']} meminjam semua core"
+    running = "" if alive is None else (f"RUNNING (PID {alive})  " if alive else "NOT RUNNING  ")
+    lines = [f"BUDGET: {running}{mode} · {data['cores']} core · diperbarui {age}s lalu"]
+    lines += [format_workload(name, data["workloads"][name]) for name in WORKLOADS]
+    return "\n".join(lines)
+
+
+def daemon_pid():
+    pid = read_pid(pid_path())
+    return pid if pid and pid_alive(pid) else None
+
+
+def stop_daemon(timeout=10.0):
+    pid = daemon_pid()
+    if not pid:
+        return False
+    os.kill(pid, signal.SIGTERM)
+    deadline = time.time() + timeout
+    while time.time() < deadline and daemon_pid():
+        time.sleep(0.2)
+    return True
+
+
+def spawn_detached(share=SHARE, mem_share=None, period=PERIOD):
+    argv = [sys.executable, os.path.abspath(__file__), "run", "--nexus", str(share), "--period", str(period)]
+    if mem_share is not None:
+        argv += ["--memory", str(mem_share)]
+    p = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, start_new_session=True)
+    return p.pid
+
+
+def reset(cgroup_root=CGROUP_ROOT):
+    """Lepas semua batas: cgroup dihapus, affinity semua core, container tanpa batas CPU/RAM."""
+    cores = sorted(c for cl in nexus_tune.core_clusters() for c in cl)
+    Cgroup(cgroup_root).reset()
+    pids = process_tree()
+    set_affinity(pids, cores)
+    set_borrow_nice(pids, False)
+    root = tashi_root_pid()
+    if root:
+        tashi = process_tree(roots=[root])
+        set_affinity(tashi, cores)
+        set_borrow_nice(tashi, False)
+        tashi_update({"quota": float(len(cores)), "cpus": cores, "memory": mem_total()})
+    try:
+        os.remove(report_path())
+    except OSError:
+        pass
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pembagian CPU / RAM antara node Nexus dan worker Tashi")
+    ap.add_argument("op", choices=["plan", "apply", "run", "status", "reset"])
+    ap.add_argument("--nexus", type=float, default=SHARE, help="%% core untuk Nexus, 5–95 (default %(default)g)")
+    ap.add_argument("--memory", type=float, default=None, help="%% RAM untuk Nexus (default sama dengan --nexus)")
+    ap.add_argument("--period", type=float, default=PERIOD, help="detik antar rebalance (default %(default)g)")
+    ap.add_argument("--detach", action="store_true", help="run: jalankan di background")
+    ap.add_argument("--json", action="store_true", help="plan / status: output JSON")
+    args = ap.parse_args(argv)
+    if not 5 <= args.nexus <= 95 or (args.memory is not None and not 5 <= args.memory <= 95):
+        ap.error("--nexus / --memory harus 5–95")
+
+    if args.op == "status":
+        data = load_report()
+        print(json.dumps(data, indent=1) if args.json else format_report(data, daemon_pid() or 0))
+        return 0
+    if args.op == "reset":
+        if stop_daemon():
+            print("[✓] Planner budget dihentikan.")
+        reset()
+        print("[✓] Batas CPU / RAM dilepas.")
+        return 0
+    if args.op == "plan":
+        p = plan(args.nexus, args.memory)
+        if args.json:
+            print(json.dumps(p, indent=1))
+            return 0
+        print(f"[i] {p['cores']} core, RAM dibagi setelah cadangan {RESERVE_MB} MB:")
+        for w in WORKLOADS:
+            print(f"  {w:<6} core {nexus_tune.cpu_list(p[w]['cpus'])} kuota {p[w]['quota']:g}  RAM {_gb(p[w]['memory'], True)}")
+        return 0
+    if args.op == "run" and args.detach:
+        if stop_daemon():
+            print("[i] Planner lama dihentikan.")
+        pid = spawn_detached(args.nexus, args.memory, args.period)
+        print(f"[✓] Planner budget berjalan di background (PID {pid}). Lihat: python nexus_budget.py status")
+        return 0
+
+    planner = Planner(args.nexus, args.memory, args.period)
+    if args.op == "apply":
+        # Dua pengukuran berdekatan → laporan share langsung tersedia; batas tetap berlaku setelah keluar
+        planner.step()
+        time.sleep(2)
+        print(format_report(planner.step()))
+        return 0
+    if daemon_pid():
+        print(f"[x] Planner budget sudah berjalan (PID {daemon_pid()}).")
+        return 1
+    with open(pid_path(), "w", encoding="utf-8") as f:
+        f.write(str(os.getpid()))
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: planner.stop())
+    print(f"[i] Planner budget aktif: {planner.describe()}, periode {args.period:g}s")
+    try:
+        planner.run()
+    finally:
+        try:
+            os.remove(pid_path())
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
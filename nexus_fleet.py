@@ -0,0 +1,283 @@
+# nexus_fleet.py
+"""
+Nexus fleet supervisor — banyak node ID dari satu proses Python.
+- Satu child `nexus-network start --node-id <ID>` per node (asyncio subprocess)
+- stdout/stderr tiap node dipipe ke ~/.nexus-fleet/<ID>.log (nexus_logs.RotatingLog: rotasi,
+  arsip terkompresi, indeks waktu → `bot.py --fleet FILE --logs --node-id ID [--since T --grep RE]`)
+- Status semua node (pid, state, exit code) di ~/.nexus-fleet/status.json
+Pakai:  python bot.py --fleet nodes.txt
+        python bot.py --fleet nodes.txt --status | --stop
+"""
+import asyncio
+import json
+import os
+import re
+import signal
+import sys
+import time
+
+from nexus_logs import RotatingLog
+from provision_cache import pid_alive, read_pid, write_json
+
+FLEET_DIR = os.path.join(os.path.expanduser("~"), ".nexus-fleet")
+STATUS_FILE = "status.json"
+PID_FILE = "supervisor.pid"
+STOP_GRACE = 10.0      # detik sebelum SIGKILL
+STATUS_INTERVAL = float(os.environ.get("NEXUS_FLEET_STATUS_INTERVAL", "60"))
+
+
+# =======================
+# Fleet file
+# =======================
+def load_fleet(path):
+    """Baca file fleet: satu node ID per baris, '#' untuk komentar."""
+    node_ids = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            node_id = line.split()[0]
+            if node_id not in node_ids:
+                node_ids.append(node_id)
+    return node_ids
+
+
+def safe_name(node_id):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", node_id)
+
+
+def log_path(node_id, fleet_dir=FLEET_DIR):
+    return os.path.join(fleet_dir, safe_name(node_id) + ".log")
+
+
+# =======================
+# Supervisor
+# =======================
+class NodeProc:
+    def __init__(self, node_id, argv, log_path):
+        self.node_id = node_id
+        self.argv = argv
+        self.log_path = log_path
+        self.proc = None
+        self.state = "pending"
+        self.pid = None
+        self.exit_code = None
+        self.started_at = None
+        self.ended_at = None
+        self.last_line = ""
+
+    def as_dict(self):
+        return {
+            "node_id": self.node_id,
+            "state": self.state,
+            "pid": self.pid,
+            "exit_code": self.exit_code,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "log": self.log_path,
+            "last_line": self.last_line,
+        }
+
+
+class FleetSupervisor:
+    """Start, pantau dan hentikan N proses nexus-network secara bersamaan."""
+
+    def __init__(self, node_ids, build_argv, fleet_dir=FLEET_DIR, status_interval=STATUS_INTERVAL):
+        self.fleet_dir = fleet_dir
+        self.status_interval = status_interval
+        os.makedirs(fleet_dir, exist_ok=True)
+        self.nodes = [
+            NodeProc(n, build_argv(n), log_path(n, fleet_dir))
+            for n in node_ids
+        ]
+        self._stopping = False
+
+    async def _pump(self, node, stream, logf):
+        buf = b""
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                break
+            logf.write(chunk)
+            logf.flush()
+            buf = (buf + chunk)[-1024:]
+            lines = [ln for ln in re.split(rb"[\r\n]+", buf) if ln.strip()]
+            if lines:
+                node.last_line = lines[-1].decode("utf-8", "replace").strip()[:120]
+
+    async def _run_node(self, node):
+        with RotatingLog(node.log_path) as logf:
+            logf.write(f"\n=== {time.strftime('%Y-%m-%d %H:%M:%S')} start: {' '.join(node.argv)} ===\n".encode())
+            try:
+                node.proc = await asyncio.create_subprocess_exec(
+                    *node.argv,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+            except OSError as e:
+                node.state = "failed"
+                node.last_line = str(e)
+                node.ended_at = time.time()
+                self.write_status()
+                return
+            node.pid = node.proc.pid
+            node.state = "running"
+            node.started_at = time.time()
+            self.write_status()
+            await asyncio.gather(
+                self._pump(node, node.proc.stdout, logf),
+                self._pump(node, node.proc.stderr, logf),
+            )
+            node.exit_code = await node.proc.wait()
+            node.ended_at = time.time()
+            node.state = "stopped" if self._stopping else "exited"
+            logf.write(f"=== exit={node.exit_code} ===\n".encode())
+        self.write_status()
+
+    async def _terminate(self):
+        self._stopping = True
+        live = [n for n in self.nodes if n.proc and n.proc.returncode is None]
+        for n in live:
+            n.state = "stopping"
+            try:
+                os.killpg(n.proc.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.time() + STOP_GRACE
+        while time.time() < deadline and any(n.proc.returncode is None for n in live):
+            await asyncio.sleep(0.2)
+        for n in live:
+            if n.proc.returncode is None:
+                try:
+                    os.killpg(n.proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    async def _status_loop(self):
+        while True:
+            await asyncio.sleep(self.status_interval)
+            print(format_table([n.as_dict() for n in self.nodes]), flush=True)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        stop_event = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+        tasks = [asyncio.create_task(self._run_node(n)) for n in self.nodes]
+        status_task = asyncio.create_task(self._status_loop())
+        all_done = asyncio.create_task(asyncio.wait(tasks))
+        stopper = asyncio.create_task(stop_event.wait())
+        await asyncio.wait({all_done, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        if stop_event.is_set():
+            print("\n[i] Menghentikan semua node...", flush=True)
+            await self._terminate()
+        await asyncio.wait(tasks)
+        status_task.cancel()
+        stopper.cancel()
+        self.write_status()
+        return 0 if all(n.exit_code == 0 or n.state == "stopped" for n in self.nodes) else 1
+
+    def write_status(self):
+        data = {
+            "supervisor_pid": os.getpid(),
+            "updated_at": time.time(),
+            "nodes": [n.as_dict() for n in self.nodes],
+        }
+        write_json(os.path.join(self.fleet_dir, STATUS_FILE), data)
+
+
+# =======================
+# Status table / control
+# =======================
+def format_table(rows):
+    now = time.time()
+    header = ("NODE_ID", "STATE", "PID", "EXIT", "UPTIME", "LAST")
+    lines = [header]
+    for r in rows:
+        uptime = ""
+        if r.get("started_at"):
+            end = r.get("ended_at") or now
+            uptime = f"{int(end - r['started_at'])}s"
+        lines.append((
+            r["node_id"], r["state"], str(r.get("pid") or "-"),
+            "-" if r.get("exit_code") is None else str(r["exit_code"]),
+            uptime or "-", r.get("last_line") or "",
+        ))
+    widths = [max(len(row[i]) for row in lines) for i in range(len(header) - 1)]
+    return "\n".join(
+        "  ".join(col.ljust(w) for col, w in zip(row[:-1], widths)) + "  " + row[-1]
+        for row in lines
+    )
+
+
+def read_status(fleet_dir=FLEET_DIR):
+    path = os.path.join(fleet_dir, STATUS_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    # Supervisor mati tanpa sempat update → tandai node yang masih "running"
+    if not pid_alive(data.get("supervisor_pid")):
+        for n in data["nodes"]:
+            if n["state"] in ("running", "stopping") and not pid_alive(n.get("pid")):
+                n["state"] = "lost"
+    return data
+
+
+def print_status(fleet_dir=FLEET_DIR):
+    data = read_status(fleet_dir)
+    if not data:
+        print(f"[i] Belum ada status fleet di {fleet_dir}")
+        return 1
+    print(format_table(data["nodes"]))
+    return 0
+
+
+def stop_fleet(fleet_dir=FLEET_DIR):
+    pid_path = os.path.join(fleet_dir, PID_FILE)
+    pid = read_pid(pid_path)
+    if not pid:
+        print("[i] Tidak ada supervisor fleet yang berjalan.")
+        return 0
+    if not pid_alive(pid):
+        print("[i] Supervisor fleet tidak aktif. Hapus pid file.")
+        os.remove(pid_path)
+        return 0
+    os.kill(pid, signal.SIGTERM)
+    print(f"[✓] SIGTERM dikirim ke supervisor fleet (PID {pid}).")
+    return 0
+
+
+def run_fleet(node_ids, build_argv, fleet_dir=FLEET_DIR):
+    """Jalankan supervisor di foreground sampai semua node keluar atau dihentikan."""
+    if not node_ids:
+        print("[x] File fleet kosong.")
+        return 2
+    os.makedirs(fleet_dir, exist_ok=True)
+    pid_path = os.path.join(fleet_dir, PID_FILE)
+    old = read_pid(pid_path)
+    if old and old != os.getpid() and pid_alive(old):
+        print(f"[x] Supervisor fleet sudah berjalan (PID {old}). Pakai --stop dulu.")
+        return 1
+    with open(pid_path, "w", encoding="utf-8") as f:
+        f.write(str(os.getpid()))
+
+    sup = FleetSupervisor(node_ids, build_argv, fleet_dir)
+    print(f"[i] Menjalankan {len(node_ids)} node. Log: {fleet_dir}/<NODE_ID>.log")
+    try:
+        rc = asyncio.run(sup.run())
+    finally:
+        try:
+            os.remove(pid_path)
+        except OSError:
+            pass
+    print(format_table([n.as_dict() for n in sup.nodes]))
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(print_status())
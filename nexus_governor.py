@@ -0,0 +1,290 @@
+# nexus_governor.py
+"""
+Governor suhu & baterai untuk node Nexus di HP (Termux / proot).
+- Baca thermal_zone*/temp dan power_supply/*/(capacity,status) dari sysfs;
+  root sysfs bisa diganti (NEXUS_SYSFS_ROOT / --root) → bisa dites dengan pohon palsu
+- Tiap periode (NEXUS_GOV_PERIOD, default 10s) level throttle naik bila suhu > batas
+  atas band, turun bila < batas bawah:
+    level k → nice 4k (maks 19) + duty cycle: node di-SIGSTOP (1 - 0.15k) bagian periode
+- Suhu ≥ kritis atau baterai ≤ minimum saat tidak dicas → node di-pause (SIGSTOP) sampai
+  kembali ke band / dicas; SIGCONT selalu dikirim saat governor berhenti
+- Di bawah watchdog hanya node watchdog itu yang di-renice / di-pause (node lain di host tidak
+  tersentuh); jumlah thread ikut diturunkan (node di-restart dengan flag thread
+  hasil nexus_tune), paling cepat tiap NEXUS_GOV_THREAD_HOLD detik
+Status terakhir: <state_dir>/governor.json.
+Pakai:  python bot.py --node-id <ID> --governor
+        start_in_proot_detached(node_id, watchdog=True, governor=True)
+        python nexus_governor.py [--root DIR] [--once] [--status]
+"""
+import argparse
+import atexit
+import glob
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from nexus_sampler import each_task, process_tree
+from provision_cache import read_text, state_dir, write_json
+
+SYSFS_ROOT = os.environ.get("NEXUS_SYSFS_ROOT", "/sys")
+TEMP_LOW = float(os.environ.get("NEXUS_GOV_TEMP_LOW", "40"))
+TEMP_HIGH = float(os.environ.get("NEXUS_GOV_TEMP_HIGH", "46"))
+TEMP_CRIT = float(os.environ.get("NEXUS_GOV_TEMP_CRIT", "55"))
+BATTERY_MIN = int(os.environ.get("NEXUS_GOV_BATTERY_MIN", "25"))
+BATTERY_HYST = 5
+PERIOD = float(os.environ.get("NEXUS_GOV_PERIOD", "10"))
+THREAD_HOLD = float(os.environ.get("NEXUS_GOV_THREAD_HOLD", "300"))
+# Regex tipe thermal zone yang dipakai (kosong = semua); mis. "cpu|soc|tsens"
+ZONES = os.environ.get("NEXUS_GOV_ZONES", "")
+MAX_LEVEL = 5
+TERMUX_BATTERY_TTL = 60.0
+
+
+def status_path():
+    return os.path.join(state_dir(), "governor.json")
+
+
+# =======================
+# Sensor
+# =======================
+def _celsius(raw):
+    """sysfs: milli-°C (45000) atau °C (45); nilai ngawur (≤0, ≥150) dibuang."""
+    try:
+        val = float(raw)
+    except ValueError:
+        return None
+    if abs(val) >= 1000:
+        val /= 1000.0
+    return val if 0 < val < 150 else None
+
+
+def thermal_zones(root=None):
+    """{tipe/zona: °C} dari <root>/class/thermal/thermal_zone*."""
+    zones = {}
+    pattern = re.compile(ZONES, re.I) if ZONES else None
+    for path in sorted(glob.glob(os.path.join(root or SYSFS_ROOT, "class", "thermal", "thermal_zone*"))):
+        kind = read_text(os.path.join(path, "type")) or os.path.basename(path)
+        if pattern and not pattern.search(kind):
+            continue
+        temp = _celsius(read_text(os.path.join(path, "temp")))
+        if temp is not None:
+            zones[f"{kind}/{os.path.basename(path)}"] = temp
+    return zones
+
+
+def max_temp(root=None):
+    zones = thermal_zones(root)
+    return max(zones.values()) if zones else None
+
+
+_termux_battery = {"at": 0.0, "value": None}
+
+
+def _termux_battery_status():
+    """Fallback Android 10+ (sysfs baterai tidak bisa dibaca): termux-battery-status, di-cache."""
+    now = time.time()
+    if now - _termux_battery["at"] < TERMUX_BATTERY_TTL:
+        return _termux_battery["value"]
+    _termux_battery["at"] = now
+    if not shutil.which("termux-battery-status"):
+        return None
+    try:
+        out = subprocess.run(["termux-battery-status"], capture_output=True, text=True, timeout=15).stdout
+        data = json.loads(out)
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+    _termux_battery["value"] = {
+        "capacity": data.get("percentage"),
+        "charging": data.get("status", "").upper() in ("CHARGING", "FULL") or data.get("plugged", "UNPLUGGED") != "UNPLUGGED",
+    }
+    return _termux_battery["value"]
+
+
+def battery(root=None):
+    """{"capacity": %, "charging": bool} dari power_supply tipe Battery; None bila tidak diketahui."""
+    for path in sorted(glob.glob(os.path.join(root or SYSFS_ROOT, "class", "power_supply", "*"))):
+        if read_text(os.path.join(path, "type")).lower() != "battery":
+            continue
+        cap = read_text(os.path.join(path, "capacity"))
+        if cap.isdigit():
+            status = read_text(os.path.join(path, "status")).lower()
+            return {"capacity": int(cap), "charging": status in ("charging", "full") if status else None}
+    if root is None and SYSFS_ROOT == "/sys":
+        return _termux_battery_status() or {"capacity": None, "charging": None}
+    return {"capacity": None, "charging": None}
+
+
+# =======================
+# Proses node: di bawah watchdog / bot.py = pohon proses node itu sendiri (pids=...);
+# default semua nexus-network di host hanya untuk governor yang berdiri sendiri
+# =======================
+def _signal(pids, sig):
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _renice(pids, value):
+    """Nice ke semua thread. Return False bila ditolak (turunkan nice butuh root)."""
+    return each_task(pids, lambda tid: os.setpriority(os.PRIO_PROCESS, tid, value))
+
+
+# =======================
+# Governor
+# =======================
+class Governor:
+    def __init__(self, root=None, low=TEMP_LOW, high=TEMP_HIGH, crit=TEMP_CRIT,
+                 battery_min=BATTERY_MIN, period=PERIOD, threads=None, on_threads=None,
+                 pids=process_tree, log=print):
+        self.root = root
+        self.low, self.high, self.crit = low, high, crit
+        self.battery_min = battery_min
+        self.period = period
+        self.base_threads = threads
+        self.threads = threads
+        self.on_threads = on_threads
+        self.pids = pids
+        self.log = log
+        self.level = 0
+        self.paused = None  # None / "thermal" / "battery"
+        self.sample = {}
+        self._nice = (None, ())  # (nilai, pids) terakhir; node hasil restart perlu di-renice lagi
+        self._threads_at = 0.0
+        self._stop = threading.Event()
+
+    def nice(self):
+        return min(19, 4 * self.level)
+
+    def duty(self):
+        return 0.0 if self.paused else 1.0 - 0.15 * self.level
+
+    def throttled(self):
+        return bool(self.paused or self.level)
+
+    def decide(self, temp, batt):
+        """Update level / pause dari satu sampel. Return True bila ada perubahan."""
+        before = (self.level, self.paused)
+        cap, charging = batt.get("capacity"), batt.get("charging")
+        reason = None
+        if cap is not None and charging is False:
+            limit = self.battery_min + (BATTERY_HYST if self.paused == "battery" else 0)
+            if cap <= limit:
+                reason = "battery"
+        if temp is not None:
+            if temp >= self.crit or (self.paused == "thermal" and temp > self.low):
+                reason = reason or "thermal"
+            if temp > self.high:
+                self.level = min(MAX_LEVEL, self.level + 1)
+            elif temp < self.low:
+                self.level = max(0, self.level - 1)
+        self.paused = reason
+        return (self.level, self.paused) != before
+
+    def _update_threads(self):
+        if not self.base_threads or not self.on_threads:
+            return
+        target = max(1, round(self.base_threads * max(self.duty(), 0.25)))
+        if target != self.threads and time.time() - self._threads_at >= THREAD_HOLD:
+            self.threads = target
+            self._threads_at = time.time()
+            self.on_threads(target)
+
+    def describe(self):
+        temp = self.sample.get("temp")
+        cap = self.sample.get("battery", {}).get("capacity")
+        state = f"PAUSE ({self.paused})" if self.paused else f"level {self.level} (nice {self.nice()}, duty {self.duty():.0%})"
+        return (f"{'-' if temp is None else f'{temp:.1f}°C'} · baterai {'-' if cap is None else f'{cap}%'}"
+                f" → {state}" + (f", threads {self.threads}" if self.threads else ""))
+
+    def save_status(self):
+        data = dict(self.sample, level=self.level, paused=self.paused, nice=self.nice(),
+                    duty=round(self.duty(), 2), threads=self.threads, updated_at=time.time())
+        write_json(status_path(), data)
+
+    def step(self):
+        """Satu periode: baca sensor, putuskan, lalu jalankan/pause node sesuai duty cycle."""
+        temp, batt = max_temp(self.root), battery(self.root)
+        self.sample = {"temp": temp, "battery": batt}
+        if self.decide(temp, batt):
+            self.log(f"[governor] {self.describe()}")
+        self._update_threads()
+        self.save_status()
+        pids = self.pids()
+        if pids and (self.nice(), sorted(pids)) != self._nice:
+            if not _renice(pids, self.nice()) and self.nice() < (self._nice[0] or 0):
+                self.log("[governor] nice tidak bisa diturunkan tanpa root; duty cycle tetap dipulihkan")
+            self._nice = (self.nice(), sorted(pids))
+        run_for = self.period * self.duty()
+        if run_for > 0:
+            _signal(pids, signal.SIGCONT)
+            self._stop.wait(run_for)
+        if run_for < self.period and not self._stop.is_set():
+            _signal(self.pids(), signal.SIGSTOP)
+            self._stop.wait(self.period - run_for)
+
+    def run(self):
+        try:
+            while not self._stop.is_set():
+                self.step()
+        finally:
+            self.resume()
+
+    def resume(self):
+        _signal(self.pids(), signal.SIGCONT)
+
+    def stop(self):
+        self._stop.set()
+
+    def start_thread(self):
+        # Keluar di tengah fase pause → node jangan sampai tertinggal dalam keadaan SIGSTOP
+        atexit.register(self.resume)
+        t = threading.Thread(target=self.run, name="governor", daemon=True)
+        t.start()
+        return t
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Governor suhu & baterai untuk node Nexus")
+    ap.add_argument("--root", default=None, help=f"root sysfs (default {SYSFS_ROOT})")
+    ap.add_argument("--low", type=float, default=TEMP_LOW)
+    ap.add_argument("--high", type=float, default=TEMP_HIGH)
+    ap.add_argument("--crit", type=float, default=TEMP_CRIT)
+    ap.add_argument("--battery-min", type=int, default=BATTERY_MIN)
+    ap.add_argument("--period", type=float, default=PERIOD)
+    ap.add_argument("--once", action="store_true", help="baca sensor sekali, cetak keputusan, keluar")
+    ap.add_argument("--status", action="store_true", help="status terakhir governor yang berjalan")
+    args = ap.parse_args(argv)
+
+    if args.status:
+        try:
+            with open(status_path(), encoding="utf-8") as f:
+                print(json.dumps(json.load(f), indent=1))
+        except (OSError, ValueError):
+            print("[i] Governor belum pernah berjalan.")
+        return 0
+    gov = Governor(args.root, args.low, args.high, args.crit, args.battery_min, args.period)
+    if args.once:
+        for zone, temp in thermal_zones(args.root).items():
+            print(f"  {zone:<40} {temp:5.1f}°C")
+        gov.sample = {"temp": max_temp(args.root), "battery": battery(args.root)}
+        gov.decide(gov.sample["temp"], gov.sample["battery"])
+        print(f"[i] {gov.describe()}  · node PID {process_tree() or '-'}")
+        return 0
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: gov.stop())
+    print(f"[i] Governor aktif: band {args.low:.0f}–{args.high:.0f}°C, kritis {args.crit:.0f}°C, "
+          f"baterai min {args.battery_min}%")
+    gov.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
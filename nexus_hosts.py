@@ -0,0 +1,303 @@
+# nexus_hosts.py
+"""
+Kontrol banyak host (HP Termux / VPS) sekaligus lewat SSH.
+- Inventory: satu host per baris  `<nama> <[user@]host[:port]|local> [key=value ...]`
+    key: app=nexus|tashi (default nexus), dir=<repo di host> (default ~/nexus),
+         node=<NODE_ID> (restart nexus), python=python3, identity=<file kunci>
+  Contoh:  hp-1  u0_a211@192.168.1.21:8022  node=abc123
+           vps-1 root@203.0.113.7           app=tashi dir=/opt/nexus
+- Aksi: status / logs / restart / stop → bot.py (atau tashi/bot.py) di tiap host;
+  check (koneksi saja), exec -- <perintah> [arg...] (argumen di-quote apa adanya; pipeline: exec -- sh -c '...'),
+  close (tutup koneksi master)
+- Koneksi SSH multiplex (ControlMaster=auto + ControlPersist): sweep berikutnya
+  tidak handshake ulang. Host in-flight dibatasi NEXUS_HOSTS_PARALLEL (default 32)
+- Hasil: tabel, atau --json (per host: ok, exit_code, seconds, stdout, data bila stdout JSON)
+- Target `local` / --transport local: perintah dijalankan lokal lewat sh (tanpa sshd,
+  untuk uji coba); key home=<dir> menjadi $HOME perintah tersebut
+Pakai:  python nexus_hosts.py hosts.txt status [--json] [--parallel N] [--only NAMA,...] [--timeout S]
+        python nexus_hosts.py hosts.txt logs --tail 50
+        python nexus_hosts.py hosts.txt exec -- uptime
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import signal
+import sys
+import time
+
+from provision_cache import fmt_uptime, state_dir
+
+PARALLEL = int(os.environ.get("NEXUS_HOSTS_PARALLEL", "32"))
+TIMEOUT = float(os.environ.get("NEXUS_HOSTS_TIMEOUT", "60"))
+CONNECT_TIMEOUT = int(os.environ.get("NEXUS_HOSTS_CONNECT_TIMEOUT", "10"))
+PERSIST = os.environ.get("NEXUS_HOSTS_PERSIST", "10m")
+OUTPUT_MAX = 64 * 1024
+ACTIONS = ["status", "logs", "restart", "stop", "check", "exec", "close"]
+
+
+# =======================
+# Inventory
+# =======================
+class Host:
+    def __init__(self, name, target, **opts):
+        self.name = name
+        self.target = target
+        self.opts = opts
+        self.app = opts.get("app", "nexus")
+        self.dir = opts.get("dir", "~/nexus")
+        self.python = opts.get("python", "python3")
+
+    @property
+    def local(self):
+        return self.target == "local"
+
+    def ssh_target(self):
+        """user@host:port → (user@host, port)."""
+        host, port = self.target, None
+        if host.count(":") == 1:
+            host, port = host.split(":")
+        return host, port
+
+
+def load_inventory(path):
+    hosts = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            parts = shlex.split(line, comments=True)
+            if not parts:
+                continue
+            if len(parts) < 2 or any("=" not in p for p in parts[2:]):
+                raise SystemExit(f"[x] {path}:{n}: format `<nama> <target> [key=value ...]`")
+            opts = dict(p.split("=", 1) for p in parts[2:])
+            if any(h.name == parts[0] for h in hosts):
+                raise SystemExit(f"[x] {path}:{n}: nama host ganda: {parts[0]}")
+            hosts.append(Host(parts[0], parts[1], **opts))
+    return hosts
+
+
+def remote_command(host, action, tail=80, extra=None):
+    """Perintah shell yang dijalankan di host untuk satu aksi."""
+    # ~ di dir harus diekspansi shell remote → jangan di-quote
+    cd = f"cd {host.dir} && " if host.dir.startswith("~") else f"cd {shlex.quote(host.dir)} && "
+    py = host.python
+    if action == "check":
+        return "echo ok"
+    if action == "exec":
+        return shlex.join(extra or [])
+    if host.app == "tashi":
+        argv = {
+            "status": ["status", "--json"],
+            "logs": ["logs", "--tail", str(tail)],
+            "restart": ["restart"],
+            "stop": ["stop"],
+        }[action]
+        return cd + shlex.join([py, "tashi/bot.py"] + argv)
+    argv = {
+        "status": ["--status"],
+        "logs": ["--logs", "--tail", str(tail)],
+        "stop": ["--stop"],
+        "restart": ["--restart"] + (["--node-id", host.opts["node"]] if host.opts.get("node") else []),
+    }[action]
+    return cd + shlex.join([py, "bot.py"] + argv)
+
+
+# =======================
+# Transport
+# =======================
+class SshTransport:
+    """ssh dengan koneksi master bersama per host (ControlMaster=auto, socket di state_dir/ssh)."""
+
+    def __init__(self, control_dir=None, persist=PERSIST, connect_timeout=CONNECT_TIMEOUT, ssh="ssh"):
+        self.control_dir = control_dir or os.path.join(state_dir(), "ssh")
+        os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+        self.persist = persist
+        self.connect_timeout = connect_timeout
+        self.ssh = ssh
+
+    def _base(self, host):
+        target, port = host.ssh_target()
+        argv = [
+            self.ssh,
+            "-o", "ControlMaster=auto",
+            # %C = hash(host, port, user) → path socket pendek (batas 108 byte)
+            "-o", f"ControlPath={self.control_dir}/%C",
+            "-o", f"ControlPersist={self.persist}",
+            "-o", "BatchMode=yes",
+            "-o", f"ConnectTimeout={self.connect_timeout}",
+            "-o", "ServerAliveInterval=15",
+            "-o", "StrictHostKeyChecking=accept-new",
+        ]
+        if port:
+            argv += ["-p", port]
+        if host.opts.get("identity"):
+            argv += ["-i", os.path.expanduser(host.opts["identity"])]
+        return argv, target
+
+    def argv(self, host, command):
+        base, target = self._base(host)
+        return base + [target, command], None
+
+    def close_argv(self, host):
+        base, target = self._base(host)
+        return base + ["-O", "exit", target], None
+
+
+class LocalTransport:
+    """Pengganti ssh untuk uji coba: perintah dijalankan lokal lewat sh, $HOME = opsi home host."""
+
+    def argv(self, host, command):
+        env = dict(os.environ)
+        if host.opts.get("home"):
+            env["HOME"] = os.path.expanduser(host.opts["home"])
+        return ["sh", "-c", command], env
+
+    def close_argv(self, host):
+        return ["true"], None
+
+
+# =======================
+# Fan-out
+# =======================
+def _text(data):
+    text = data.decode("utf-8", "replace")
+    return text if len(text) <= OUTPUT_MAX else "…" + text[-OUTPUT_MAX:]
+
+
+async def _run_host(sem, transport, host, argv, env, timeout):
+    result = {"host": host.name, "target": host.target, "ok": False, "exit_code": None,
+              "seconds": 0.0, "stdout": "", "stderr": ""}
+    async with sem:
+        start = time.perf_counter()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv, env=env, stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except OSError as e:
+            result["error"] = str(e)
+            return result
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            # Satu session per host → anak yang memegang pipe ikut mati
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            out, err = await proc.communicate()
+            result["error"] = f"timeout {timeout:g}s"
+        result["seconds"] = round(time.perf_counter() - start, 3)
+    result["exit_code"] = proc.returncode
+    result["stdout"], result["stderr"] = _text(out), _text(err)
+    result["ok"] = proc.returncode == 0 and "error" not in result
+    if proc.returncode == 255 and not host.local:
+        last = (result["stderr"].strip().splitlines() or [""])[-1]
+        result["error"] = "ssh: tidak bisa terhubung" + (f" ({last[:80]})" if last else "")
+    stripped = result["stdout"].strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            result["data"] = json.loads(stripped)
+        except ValueError:
+            pass
+    return result
+
+
+async def _sweep(jobs, parallel, timeout):
+    sem = asyncio.Semaphore(max(1, parallel))
+    return await asyncio.gather(*(_run_host(sem, t, h, a, e, timeout) for t, h, a, e in jobs))
+
+
+def run_action(hosts, action, transport=None, parallel=PARALLEL, timeout=TIMEOUT, tail=80, extra=None):
+    """Jalankan aksi di semua host (maks `parallel` bersamaan). Return dict hasil agregat."""
+    ssh = transport or SshTransport()
+    local = LocalTransport()
+    jobs = []
+    for h in hosts:
+        t = local if h.local else ssh
+        if action == "close":
+            argv, env = t.close_argv(h)
+        else:
+            argv, env = t.argv(h, remote_command(h, action, tail, extra))
+        jobs.append((t, h, argv, env))
+    start = time.perf_counter()
+    results = asyncio.run(_sweep(jobs, parallel, timeout))
+    ok = sum(1 for r in results if r["ok"])
+    return {
+        "action": action,
+        "seconds": round(time.perf_counter() - start, 3),
+        "ok": ok,
+        "failed": len(results) - ok,
+        "hosts": results,
+    }
+
+
+def _summary_line(r):
+    if r.get("error"):
+        return r["error"]
+    data = r.get("data")
+    if isinstance(data, dict) and "state" in data:
+        return f"state={data['state']}" + (f" uptime={fmt_uptime(data['uptime_s'])}" if data.get("uptime_s") is not None else "")
+    lines = [ln.strip() for ln in (r["stdout"] or r["stderr"]).splitlines() if ln.strip()]
+    return lines[-1][:100] if lines else ""
+
+
+def format_table(report):
+    rows = [("HOST", "OK", "EXIT", "DETIK", "RINGKASAN")]
+    for r in report["hosts"]:
+        rows.append((r["host"], "✓" if r["ok"] else "x",
+                     "-" if r["exit_code"] is None else str(r["exit_code"]),
+                     f"{r['seconds']:.2f}", _summary_line(r)))
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    lines = ["  ".join(col.ljust(w) for col, w in zip(row[:-1], widths)) + "  " + row[-1] for row in rows]
+    lines.append(f"[i] {report['action']}: {report['ok']} ok, {report['failed']} gagal, {report['seconds']:.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Jalankan status/logs/restart/stop di banyak host lewat SSH")
+    ap.add_argument("inventory")
+    ap.add_argument("action", choices=ACTIONS)
+    ap.add_argument("--only", help="nama host dipisah koma")
+    ap.add_argument("--parallel", type=int, default=PARALLEL, help="host in-flight maksimum")
+    ap.add_argument("--timeout", type=float, default=TIMEOUT, help="batas detik per host")
+    ap.add_argument("--tail", type=int, default=80, help="logs: jumlah baris")
+    ap.add_argument("--transport", choices=["ssh", "local"], default="ssh",
+                    help="local = semua host dijalankan lokal (uji coba tanpa sshd)")
+    ap.add_argument("--json", action="store_true", help="output JSON (satu objek, semua host)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="tampilkan stdout/stderr tiap host")
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # exec -- <perintah>: semua setelah "--" adalah perintah remote, bukan opsi
+    command = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = ap.parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+
+    hosts = load_inventory(args.inventory)
+    if args.only:
+        wanted = set(args.only.split(","))
+        hosts = [h for h in hosts if h.name in wanted]
+    if not hosts:
+        print("[x] Tidak ada host.")
+        return 2
+    extra = command or None
+    if args.action == "exec" and not extra:
+        ap.error("exec butuh perintah: exec -- <perintah>")
+    transport = LocalTransport() if args.transport == "local" else None
+    report = run_action(hosts, args.action, transport, args.parallel, args.timeout, args.tail, extra)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        if args.verbose:
+            for r in report["hosts"]:
+                print(f"=== {r['host']} ({r['target']}) exit={r['exit_code']} ===")
+                sys.stdout.write(r["stdout"])
+                sys.stdout.write(r["stderr"])
+        print(format_table(report))
+    return 0 if not report["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,499 @@
+# nexus_logs.py
+"""
+Log node: rotasi + arsip terkompresi + follow incremental.
+- RotatingLog: node.log dirotasi saat > NEXUS_LOG_MAX_MB (default 10) atau lebih tua
+  dari NEXUS_LOG_MAX_HOURS (0 = nonaktif); arsip node.log.<waktu>-<seq>.gz/.zst,
+  hanya NEXUS_LOG_KEEP (default 5) arsip terbaru yang disimpan
+- Nomor segmen aktif ada di node.log.seq (inode bisa dipakai ulang, jadi tidak dipakai)
+- LogFollower: simpan (seq, offset) → tiap cek hanya membaca byte baru,
+  tetap benar walau file sudah dirotasi (sisa segmen lama dibaca dari arsip)
+- Indeks jarang node.log.idx (baris "seq waktu offset", append-only): RotatingLog
+  mencatat satu titik tiap NEXUS_LOG_INDEX_KB (default 256) / NEXUS_LOG_INDEX_SECONDS (60)
+- search(): --since/--until/--grep; segmen di luar rentang waktu tidak dibuka, segmen
+  polos dibaca lewat mmap mulai dari offset indeks, arsip .gz/.zst di-stream
+zstd dipakai jika modul `zstandard` terpasang dan NEXUS_LOG_COMPRESS=zstd.
+"""
+import bisect
+import glob
+import gzip
+import json
+import mmap
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+
+from provision_cache import write_json, write_text
+
+try:
+    import zstandard
+except ImportError:  # opsional
+    zstandard = None
+
+MAX_BYTES = int(float(os.environ.get("NEXUS_LOG_MAX_MB", "10")) * 1024 * 1024)
+MAX_AGE = float(os.environ.get("NEXUS_LOG_MAX_HOURS", "0")) * 3600
+KEEP = int(os.environ.get("NEXUS_LOG_KEEP", "5"))
+COMPRESS = os.environ.get("NEXUS_LOG_COMPRESS", "gzip")
+
+INDEX_BYTES = int(float(os.environ.get("NEXUS_LOG_INDEX_KB", "256")) * 1024)
+INDEX_SECONDS = float(os.environ.get("NEXUS_LOG_INDEX_SECONDS", "60"))
+TIMESTAMP_RE = re.compile(r"(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})")
+_TIMESTAMP_BYTES_RE = re.compile(TIMESTAMP_RE.pattern.encode())
+
+_ARCHIVE_RE = re.compile(r"\.(\d{8}-\d{6})-(\d+)(\.gz|\.zst)?$")
+
+
+def _compression():
+    if COMPRESS == "zstd" and zstandard is not None:
+        return ".zst"
+    if COMPRESS == "none":
+        return ""
+    return ".gz"
+
+
+def list_archives(path):
+    """Arsip hasil rotasi, terlama → terbaru (urut nomor segmen)."""
+    by_seq = {}
+    for p in glob.glob(glob.escape(path) + ".*"):
+        m = _ARCHIVE_RE.search(p[len(path):])
+        if not m:
+            continue
+        seq = int(m.group(2))
+        # Saat kompresi, versi polos & .gz sempat ada bersamaan → pilih yang terkompresi
+        if seq not in by_seq or m.group(3):
+            by_seq[seq] = p
+    return [by_seq[k] for k in sorted(by_seq)]
+
+
+def archive_seq(archive):
+    m = _ARCHIVE_RE.search(archive)
+    return int(m.group(2)) if m else None
+
+
+def current_seq(path):
+    """Nomor segmen node.log yang sedang aktif (0 untuk log lama tanpa file .seq)."""
+    try:
+        with open(path + ".seq", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_seq(path, seq):
+    write_text(path + ".seq", str(seq))
+
+
+def open_segment(path):
+    """Buka segmen log (polos / .gz / .zst) untuk dibaca sebagai stream byte."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise OSError(f"modul zstandard tidak ada untuk membaca {path}")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+def _compress_file(src, ext):
+    if not ext:
+        return
+    dst = src + ext
+    tmp = dst + ".tmp"
+    with open(src, "rb") as fin:
+        if ext == ".gz":
+            with gzip.open(tmp, "wb", compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout, 1 << 20)
+        else:
+            with open(tmp, "wb") as raw:
+                with zstandard.ZstdCompressor(level=6).stream_writer(raw) as fout:
+                    shutil.copyfileobj(fin, fout, 1 << 20)
+    os.replace(tmp, dst)
+    os.remove(src)
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def read_index(path):
+    """{seq: [(waktu, offset), ...]} dari <log>.idx; baris rusak (tulisan terpotong) dilewati."""
+    points = {}
+    try:
+        with open(index_path(path), encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 3:
+                    continue
+                try:
+                    seq, ts, off = int(parts[0]), float(parts[1]), int(parts[2])
+                except ValueError:
+                    continue
+                points.setdefault(seq, []).append((ts, off))
+    except OSError:
+        pass
+    for pts in points.values():
+        pts.sort()
+    return points
+
+
+def _prune_index(path, min_seq):
+    """Buang titik milik segmen yang arsipnya sudah dihapus retensi."""
+    try:
+        with open(index_path(path), encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return
+    keep = [ln for ln in lines if ln.split(" ", 1)[0].isdigit() and int(ln.split(" ", 1)[0]) >= min_seq]
+    if len(keep) == len(lines):
+        return
+    write_text(index_path(path), "".join(keep))
+
+
+class RotatingLog:
+    """File log (mode append, byte) dengan rotasi ukuran/waktu dan retensi arsip."""
+
+    def __init__(self, path, max_bytes=MAX_BYTES, max_age=MAX_AGE, keep=KEEP):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep = keep
+        self._threads = []
+        self.seq = current_seq(path)
+        self._open()
+
+    def _open(self):
+        self.f = open(self.path, "ab")
+        st = os.fstat(self.f.fileno())
+        self.size = st.st_size
+        self.opened_at = st.st_ctime if st.st_size else time.time()
+        self.idx = open(index_path(self.path), "a", encoding="utf-8")
+        self._idx_t, self._idx_off = 0.0, -INDEX_BYTES
+
+    def _mark(self, now):
+        """Titik indeks: byte mulai offset ini ditulis pada/sesudah `now`."""
+        self.idx.write(f"{self.seq} {now:.3f} {self.size}\n")
+        self._idx_t, self._idx_off = now, self.size
+
+    def _due(self):
+        if self.max_bytes and self.size >= self.max_bytes:
+            return True
+        return bool(self.max_age and self.size and time.time() - self.opened_at >= self.max_age)
+
+    def write(self, data):
+        now = time.time()
+        if self.size - self._idx_off >= INDEX_BYTES or now - self._idx_t >= INDEX_SECONDS:
+            self._mark(now)
+        self.f.write(data)
+        self.size += len(data)
+        if self._due():
+            self.rotate()
+
+    def flush(self):
+        self.f.flush()
+        self.idx.flush()
+
+    def rotate(self):
+        self.f.flush()
+        self.f.close()
+        self._mark(time.time())  # titik akhir = ukuran segmen (dipakai search untuk melewati arsip)
+        self.idx.close()
+        archive = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}-{self.seq}"
+        # Urutan penting untuk LogFollower: arsipkan → naikkan seq → buka file baru
+        os.replace(self.path, archive)
+        self.seq += 1
+        _write_seq(self.path, self.seq)
+        _prune_index(self.path, self.seq - self.keep)
+        self._open()
+        # Kompresi di thread supaya pipe node tidak tertahan
+        t = threading.Thread(target=self._finish_archive, args=(archive,), daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def _finish_archive(self, archive):
+        try:
+            _compress_file(archive, _compression())
+        except OSError:
+            pass
+        for old in list_archives(self.path)[:-self.keep or None]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def close(self):
+        self.f.close()
+        self.idx.close()
+        for t in self._threads:
+            t.join(timeout=60)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =======================
+# Membaca log
+# =======================
+def tail_lines(path, n=80, block=65536):
+    """n baris terakhir tanpa membaca seluruh file."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            end = pos = f.tell()
+            data = b""
+            while pos > 0 and data.count(b"\n") <= n:
+                step = min(block, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+    except OSError:
+        return b""
+    lines = data.splitlines(keepends=True)
+    return b"".join(lines[-n:]) if end else b""
+
+
+class LogFollower:
+    """Baca hanya byte baru sejak panggilan terakhir; posisi disimpan di state_path."""
+
+    def __init__(self, path, state_path=None):
+        self.path = path
+        self.state_path = state_path or path + ".follow.json"
+        self.seq, self.offset = None, 0
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                st = json.load(f)
+            self.seq, self.offset = st.get("seq"), st.get("offset", 0)
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        write_json(self.state_path, {"seq": self.seq, "offset": self.offset}, indent=None)
+
+    def _read_from(self, path, offset):
+        with open_segment(path) as f:
+            if path.endswith((".gz", ".zst")):
+                # Stream terkompresi: lewati offset byte
+                remaining = offset
+                while remaining > 0:
+                    skipped = f.read(min(remaining, 1 << 20))
+                    if not skipped:
+                        break
+                    remaining -= len(skipped)
+            else:
+                f.seek(offset)
+            return f.read()
+
+    def _read_archive(self, seq, offset):
+        # Arsip bisa berpindah dari polos → .gz di tengah jalan; cari ulang bila hilang
+        for _ in range(3):
+            for archive in list_archives(self.path):
+                if archive_seq(archive) == seq:
+                    try:
+                        return self._read_from(archive, offset)
+                    except OSError:
+                        break
+            else:
+                return b""
+        return b""
+
+    def _open_current(self):
+        """Buka node.log + nomor segmennya secara konsisten (rotasi bisa terjadi bersamaan)."""
+        while True:
+            seq = current_seq(self.path)
+            try:
+                f = open(self.path, "rb")
+            except OSError:
+                f = None
+            if current_seq(self.path) == seq:
+                return seq, f
+            if f:
+                f.close()
+
+    def seek_end(self):
+        self.seq, f = self._open_current()
+        self.offset = 0
+        if f:
+            with f:
+                self.offset = os.fstat(f.fileno()).st_size
+        self._save()
+
+    def read_new(self):
+        seq, f = self._open_current()
+        chunks = []
+        if self.seq is not None and seq != self.seq:
+            # Sudah dirotasi: sisa segmen lama + segmen yang terlewat, dari arsip
+            for s in range(self.seq, seq):
+                chunks.append(self._read_archive(s, self.offset if s == self.seq else 0))
+            self.offset = 0
+        self.seq = seq
+        if f:
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                if size < self.offset:
+                    self.offset = 0  # file di-truncate
+                f.seek(self.offset)
+                data = f.read()
+                chunks.append(data)
+                self.offset += len(data)
+        self._save()
+        return b"".join(chunks)
+
+
+# =======================
+# Pencarian (--since / --until / --grep)
+# =======================
+def parse_time(text, now=None):
+    """
+    "2h" / "30m" / "1d" / "45s" (yang lalu), epoch, "YYYY-MM-DD[ HH:MM[:SS]]",
+    "HH:MM[:SS]" (hari ini) → epoch detik.
+    """
+    now = time.time() if now is None else now
+    text = text.strip()
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", text)
+    if m:
+        return now - float(m.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+    if re.fullmatch(r"\d{9,}(\.\d+)?", text):
+        return float(text)
+    if re.fullmatch(r"\d{1,2}:\d{2}(:\d{2})?", text):
+        text = time.strftime("%Y-%m-%d ", time.localtime(now)) + text
+    text = text.replace("T", " ")
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(text, fmt))
+        except ValueError:
+            pass
+    raise ValueError(f"format waktu tidak dikenal: {text!r} (contoh: 2h, 30m, 03:00, 2024-05-01 22:00)")
+
+
+def line_time(line):
+    """Timestamp di dalam baris str/bytes (YYYY-MM-DD HH:MM:SS / ISO), atau None."""
+    if isinstance(line, str):
+        m = TIMESTAMP_RE.search(line)
+        text = m and f"{m.group(1)} {m.group(2)}"
+    else:
+        m = _TIMESTAMP_BYTES_RE.search(line)
+        text = m and f"{m.group(1).decode()} {m.group(2).decode()}"
+    if not m:
+        return None
+    try:
+        return time.mktime(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
+    except ValueError:
+        return None
+
+
+def _byte_range(points, since, until):
+    """(start, end) byte segmen dari titik indeks; end None = sampai akhir segmen."""
+    if not points:
+        return 0, None
+    times = [t for t, _ in points]
+    start = end = 0
+    if since is not None:
+        i = bisect.bisect_right(times, since) - 1
+        start = points[i][1] if i >= 0 else 0
+    end = None
+    if until is not None:
+        j = bisect.bisect_right(times, until)
+        end = points[j][1] if j < len(points) else None
+    return start, end
+
+
+def _lines(buf, start, end, pattern):
+    """Baris utuh di buf[start:end] (start dimundurkan ke awal baris); pattern → hanya baris cocok."""
+    start = buf.rfind(b"\n", 0, start) + 1 if start else 0
+    if pattern is None:
+        pos = start
+        while pos < end:
+            nl = buf.find(b"\n", pos, end)
+            stop = end if nl < 0 else nl + 1
+            yield buf[pos:stop]
+            pos = stop
+        return
+    last = -1
+    # Regex dijalankan langsung di atas buffer (C), baris hanya dipotong di sekitar match
+    for m in pattern.finditer(buf, start, end):
+        if m.start() < last:
+            continue
+        ls = max(start, buf.rfind(b"\n", start, m.start()) + 1)
+        nl = buf.find(b"\n", m.end(), end)
+        last = end if nl < 0 else nl + 1
+        yield buf[ls:last]
+
+
+def _segment_lines(path, start, end, pattern, stats):
+    if path.endswith((".gz", ".zst")):
+        # Stream terkompresi: buang byte sebelum (start - 4 KB), sisanya diproses di memori
+        skip = max(0, start - 4096)
+        with open_segment(path) as f:
+            remaining = skip
+            while remaining > 0:
+                chunk = f.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+            data = f.read() if end is None else f.read(max(0, end - skip))
+        stats["bytes"] += len(data)
+        yield from _lines(data, start - skip, len(data), pattern)
+        return
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if end is None else min(end, size)
+        if size == 0 or start >= end:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stats["bytes"] += end - start
+            yield from _lines(mm, start, end, pattern)
+
+
+def search(path, since=None, until=None, grep=None, stats=None):
+    """
+    Baris log (bytes) dalam rentang waktu [since, until] yang cocok dengan regex grep,
+    dari arsip terlama sampai node.log aktif. Resolusi baris tanpa timestamp = jarak
+    antar titik indeks; baris bertimestamp difilter tepat.
+    stats (dict, opsional) diisi: segments, read, bytes.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(segments=0, read=0, bytes=0)
+    pattern = re.compile(grep.encode(), re.M) if grep else None
+    index = read_index(path)
+    segments = [(archive_seq(a), a) for a in list_archives(path)]
+    if os.path.exists(path):
+        segments.append((current_seq(path), path))
+    for seq, seg in segments:
+        stats["segments"] += 1
+        points = index.get(seq, [])
+        start, end = _byte_range(points, since, until)
+        if points and seg != path:
+            # Titik terakhir arsip = ukuran segmen → seluruh segmen di luar rentang bisa dilewati
+            seg_end = points[-1][1]
+            if start >= seg_end or (until is not None and points[0][0] > until):
+                continue
+        elif points and until is not None and points[0][0] > until:
+            continue
+        stats["read"] += 1
+        try:
+            for line in _segment_lines(seg, start, end, pattern, stats):
+                if since is not None or until is not None:
+                    t = line_time(line)
+                    if t is not None and ((since is not None and t < since) or (until is not None and t > until)):
+                        continue
+                yield line
+        except OSError:
+            continue
+
+
+def print_search(path, since=None, until=None, grep=None, out=None):
+    """CLI --since/--until/--grep: cetak baris cocok + ringkasan ke stderr. Return jumlah baris."""
+    out = out or sys.stdout
+    stats = {}
+    count = 0
+    for line in search(path, since, until, grep, stats):
+        out.write(line.decode("utf-8", "replace"))
+        count += 1
+    out.flush()
+    print(f"[i] {count} baris; {stats['read']}/{stats['segments']} segmen dibaca, "
+          f"{stats['bytes'] / 1e6:.1f} MB dipindai", file=sys.stderr)
+    return count
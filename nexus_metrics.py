@@ -0,0 +1,253 @@
+# nexus_metrics.py
+"""
+Exporter metrik throughput node Nexus, di-parse incremental dari log node.
+- Event: task diterima, proof terkirim, error, reconnect (+ durasi proof)
+- Counter + histogram format teks Prometheus → file .prom (textfile collector)
+  dan endpoint HTTP kecil http://127.0.0.1:9464/metrics
+- Sumber log default: ~/.nexus-run/node.log (bot.py --metrics / watchdog native),
+  $HOME/.nexus-run/node.log milik proot Ubuntu, dan ~/.nexus-fleet/*.log
+Pakai:  python nexus_metrics.py [--log PATH ...] [--port 9464] [--once]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from nexus_logs import LogFollower, line_time
+from proot_broker import proot_home
+from provision_cache import write_json, write_text
+
+DEFAULT_PORT = int(os.environ.get("NEXUS_METRICS_PORT", "9464"))
+BUCKETS = [1, 5, 10, 30, 60, 120, 300, 600, 1800, float("inf")]
+
+# Pola longgar: beda versi CLI beda kalimat. Urutan penting (proof dicek sebelum error).
+EVENT_PATTERNS = [
+    ("proof", re.compile(r"proof\s+(submitted|sent|accepted|completed|verified)|submitted\s+proof|step\s*4\s*of\s*4.*(done|success)", re.I)),
+    ("task", re.compile(r"\b(got|received|fetched|new|assigned)\s+(a\s+)?task\b|step\s*2\s*of\s*4", re.I)),
+    ("reconnect", re.compile(r"reconnect|connection\s+(lost|reset|closed|refused)|retrying", re.I)),
+    ("error", re.compile(r"\berror\b|\bfailed\b|\bpanic", re.I)),
+]
+DURATION_RE = re.compile(r"\b(?:in|took|after)\s+(\d+(?:\.\d+)?)\s*(ms|s|sec|secs|seconds)\b", re.I)
+ANSI_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+
+def default_logs():
+    logs = {}
+    native = os.path.join(os.path.expanduser("~"), ".nexus-run", "node.log")
+    proot = os.path.join(proot_home(), ".nexus-run", "node.log")
+    for name, path in (("native", native), ("proot", proot)):
+        if os.path.exists(path) or os.path.exists(path + ".seq"):
+            logs[name] = path
+    for path in sorted(glob.glob(os.path.join(os.path.expanduser("~"), ".nexus-fleet", "*.log"))):
+        logs["fleet:" + os.path.basename(path)[:-4]] = path
+    return logs
+
+
+def classify(line):
+    """Jenis event satu baris log node (proof/task/reconnect/error) atau None."""
+    line = ANSI_RE.sub("", line)
+    for event, pattern in EVENT_PATTERNS:
+        if pattern.search(line):
+            return event
+    return None
+
+
+def proof_seconds(line):
+    """Durasi proof yang dicetak CLI ("... in 12.3s" / "took 850ms") atau None."""
+    m = DURATION_RE.search(line)
+    if not m:
+        return None
+    val = float(m.group(1))
+    return val / 1000 if m.group(2).lower() == "ms" else val
+
+
+def _line_time(line, fallback):
+    t = line_time(line)
+    return fallback if t is None else t
+
+
+class NodeMetrics:
+    """Parser incremental untuk satu file log; state (counter + offset) persisten di samping log."""
+
+    def __init__(self, name, log_path):
+        self.name = name
+        self.log_path = log_path
+        self.state_path = log_path + ".metrics.json"
+        self.follower = LogFollower(log_path, log_path + ".metrics-follow.json")
+        self.partial = b""
+        self.lock = threading.Lock()
+        self.data = {
+            "tasks": 0, "proofs": 0, "errors": 0, "reconnects": 0, "bytes": 0,
+            "buckets": [0] * len(BUCKETS), "duration_sum": 0.0, "duration_count": 0,
+            "last_proof": 0.0, "task_started": None,
+        }
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                self.data.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        write_json(self.state_path, self.data, indent=None)
+
+    def observe_duration(self, seconds):
+        d = self.data
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b:
+                d["buckets"][i] += 1
+        d["duration_sum"] += seconds
+        d["duration_count"] += 1
+
+    def feed_line(self, line, now=None):
+        now = now if now is not None else time.time()
+        line = ANSI_RE.sub("", line)
+        d = self.data
+        event = classify(line)
+        if event is None:
+            return
+        t = _line_time(line, now)
+        if event == "task":
+            d["tasks"] += 1
+            d["task_started"] = t
+        elif event == "proof":
+            d["proofs"] += 1
+            d["last_proof"] = t
+            seconds = proof_seconds(line)
+            if seconds is not None:
+                self.observe_duration(seconds)
+            elif d["task_started"] is not None and t >= d["task_started"]:
+                self.observe_duration(t - d["task_started"])
+            d["task_started"] = None
+        elif event == "reconnect":
+            d["reconnects"] += 1
+        elif event == "error":
+            d["errors"] += 1
+
+    def update(self):
+        """Parse byte baru saja (offset disimpan); aman dipanggil berulang."""
+        with self.lock:
+            chunk = self.follower.read_new()
+            if not chunk:
+                return 0
+            self.data["bytes"] += len(chunk)
+            buf = self.partial + chunk
+            lines = re.split(rb"[\r\n]", buf)
+            self.partial = lines.pop()[-4096:]
+            now = time.time()
+            for raw in lines:
+                if raw.strip():
+                    self.feed_line(raw.decode("utf-8", "replace"), now)
+            self._save()
+            return len(chunk)
+
+
+def render(nodes):
+    """Format teks Prometheus untuk semua node."""
+    out = []
+
+    def family(name, kind, help_text):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+
+    counters = [
+        ("nexus_node_tasks_total", "tasks", "Task yang diterima node."),
+        ("nexus_node_proofs_total", "proofs", "Proof yang terkirim."),
+        ("nexus_node_errors_total", "errors", "Baris error di log node."),
+        ("nexus_node_reconnects_total", "reconnects", "Reconnect / koneksi terputus."),
+        ("nexus_node_log_bytes_total", "bytes", "Byte log yang sudah di-parse."),
+    ]
+    for metric, key, help_text in counters:
+        family(metric, "counter", help_text)
+        for n in nodes:
+            out.append(f'{metric}{{node="{n.name}"}} {n.data[key]}')
+    family("nexus_node_last_proof_timestamp_seconds", "gauge", "Waktu proof terakhir (unix).")
+    for n in nodes:
+        out.append(f'nexus_node_last_proof_timestamp_seconds{{node="{n.name}"}} {n.data["last_proof"]:.0f}')
+    family("nexus_node_proof_duration_seconds", "histogram", "Durasi task → proof.")
+    for n in nodes:
+        for b, count in zip(BUCKETS, n.data["buckets"]):
+            le = "+Inf" if b == float("inf") else f"{b:g}"
+            out.append(f'nexus_node_proof_duration_seconds_bucket{{node="{n.name}",le="{le}"}} {count}')
+        out.append(f'nexus_node_proof_duration_seconds_sum{{node="{n.name}"}} {n.data["duration_sum"]:.3f}')
+        out.append(f'nexus_node_proof_duration_seconds_count{{node="{n.name}"}} {n.data["duration_count"]}')
+    return "\n".join(out) + "\n"
+
+
+def serve(nodes, port=DEFAULT_PORT, host="127.0.0.1"):
+    """Endpoint HTTP /metrics (parse incremental tiap request).
+    Return None bila port tidak bisa dipakai (node tetap jalan, hanya tanpa endpoint)."""
+    # Diimpor di sini: http.server mahal (~40 ms) dan tidak dibutuhkan bot.py --status / nexus_tune
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            for n in nodes:
+                n.update()
+            body = render(nodes).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        httpd = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        # Mis. node --metrics kedua / exporter fleet sudah memegang port yang sama
+        print(f"[!] Metrik HTTP dimatikan: {host}:{port} tidak bisa dipakai ({e.strerror}). "
+              f"Pakai port lain lewat NEXUS_METRICS_PORT.")
+        return None
+    t = threading.Thread(target=httpd.serve_forever, daemon=True)
+    t.start()
+    return httpd
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Exporter metrik node Nexus (format Prometheus)")
+    ap.add_argument("--log", action="append", metavar="[NAME=]PATH", help="file log node (boleh berulang)")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 = tanpa HTTP")
+    ap.add_argument("--textfile", help="tulis metrik ke file .prom ini")
+    ap.add_argument("--interval", type=float, default=15.0)
+    ap.add_argument("--once", action="store_true", help="parse sekali, cetak metrik, keluar")
+    args = ap.parse_args(argv)
+
+    logs = {}
+    for spec in args.log or []:
+        name, _, path = spec.rpartition("=")
+        logs[name or os.path.basename(os.path.dirname(os.path.abspath(path)))] = path
+    logs = logs or default_logs()
+    if not logs:
+        print("[x] Tidak ada log node yang ditemukan. Pakai --log PATH.")
+        return 1
+    nodes = [NodeMetrics(name, path) for name, path in logs.items()]
+
+    if args.once:
+        for n in nodes:
+            n.update()
+        sys.stdout.write(render(nodes))
+        return 0
+    if args.port and serve(nodes, args.port):
+        print(f"[i] Metrik: http://127.0.0.1:{args.port}/metrics")
+    try:
+        while True:
+            for n in nodes:
+                n.update()
+            if args.textfile:
+                write_text(args.textfile, render(nodes))
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
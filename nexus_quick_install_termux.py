@@ -1,35 +1,59 @@
 # nexus_quick_install_termux.py
 import os
-import subprocess
 import shutil
+import sys
+import time
 from pathlib import Path
+import hashlib
+import json
 import re
 
+import nexus_trace
+# nexus_backends / nexus_tune / nexus_watchdog / nexus_sampler / proot_snapshot diimpor di fungsi
+# yang memakainya → import modul ini (dan helper status/stop) tidak membayar semuanya
+from nexus_logs import LogFollower, list_archives, parse_time, print_search, tail_lines
+from pkg_resolver import apt_ensure_script, termux_plan
+from provision_dag import Dag
+from proot_broker import direct_argv, proot_exec, proot_home, rootfs_path
+from provision_cache import ProvisionState, file_fingerprint, pid_alive, read_pid, state_dir, write_json
+from nexus_trace import span, traced
+from stream_exec import display, run_streaming
+
 PROOT_DISTRO = "ubuntu"
 PROOT_RUN_DIR = "$HOME/.nexus-run"   # di dalam Ubuntu (proot)
 PROOT_BIN = "$HOME/.nexus/bin/nexus-network"
+PROOT_APT_PKGS = ["curl", "ca-certificates", "procps"]
+NEXUS_INSTALL_URL = "https://cli.nexus.xyz/"
+CLI_REFRESH = float(os.environ.get("NEXUS_CLI_REFRESH_DAYS", "7")) * 86400
 
 # =======================
 # Util
 # =======================
-def run(cmd, env=None, print_cmd=True):
-    """Jalankan perintah shell, tangkap stdout/stderr. Return (ok, out, err, code)."""
+def run(cmd, env=None, print_cmd=True, echo=None):
+    """
+    Jalankan perintah (argv list, atau string; /bin/sh hanya dipakai bila perlu).
+    Output di-stream live (echo, default = print_cmd); yang disimpan hanya tail
+    N KB (ring buffer). Return (ok, out, err, code).
+    """
     if print_cmd:
-        print(f"\n>>> {cmd}")
-    p = subprocess.run(
-        cmd, shell=True, text=True, env=env,
-        stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    )
-    ok = (p.returncode == 0)
+        print(f"\n>>> {display(cmd)}")
+    if echo is None:
+        echo = print_cmd
+    with span(nexus_trace.short(cmd), cat="run", cmd=cmd) as sp:
+        code, out, err = run_streaming(cmd, env=env, echo=echo)
+        sp["rc"] = code
+    ok = (code == 0)
     if not ok:
-        print(f"[!] Command gagal (exit={p.returncode}): {cmd}")
-        if p.stdout:
-            print("--- stdout ---")
-            print(p.stdout.strip())
-        if p.stderr:
-            print("--- stderr ---")
-            print(p.stderr.strip())
-    return ok, (p.stdout or ""), (p.stderr or ""), p.returncode
+        print(f"[!] Command gagal (exit={code}): {display(cmd)}")
+        # Kalau tidak di-echo, tampilkan tail dari ring buffer
+        if not echo:
+            if out:
+                print("--- stdout ---")
+                print(out.strip())
+            if err:
+                print("--- stderr ---")
+                print(err.strip())
+    return ok, out, err, code
 
 def is_command_available(name: str) -> bool:
     return shutil.which(name) is not None
@@ -38,15 +62,14 @@ def is_termux() -> bool:
     return is_command_available("pkg")
 
 def pkg_ensure(pkgs):
+    """Install paket Termux yang belum ada: satu dpkg-query, satu `pkg install` (lihat pkg_resolver)."""
     if not is_termux():
         return
-    run("pkg update -y")
-    for p in pkgs:
-        if is_command_available(p):
-            continue
-        ok, *_ = run(f"dpkg -s {p} >/dev/null 2>&1", print_cmd=False)
+    todo = [p for p in pkgs if not is_command_available(p)]
+    for cmd in termux_plan(todo):
+        ok, *_ = run(cmd)
         if not ok:
-            run(f"pkg install -y {p}")
+            return
 
 def append_once(file: Path, text: str):
     file.parent.mkdir(parents=True, exist_ok=True)
@@ -81,16 +104,22 @@ def ensure_network():
 # =======================
 # Nexus CLI (native)
 # =======================
-def install_cli_termux():
-    """Coba install CLI di Termux; kalau tidak kompatibel, test_cli() akan False dan kita fallback proot."""
+@traced()
+def install_cli_termux(cli_ok=None, network_ok=None):
+    """Coba install CLI di Termux; kalau tidak kompatibel, test_cli() akan False dan kita fallback proot.
+
+    cli_ok/network_ok: hasil probe yang sudah dijalankan pemanggil (preflight); None = probe sendiri.
+    """
     if not is_termux():
         return False
-    if test_cli():
+    if test_cli() if cli_ok is None else cli_ok:
         print("[=] Nexus CLI sudah tersedia, lewati instalasi.")
         return True
 
-    pkg_ensure(["curl"])
-    if not ensure_network():
+    if network_ok is None:
+        pkg_ensure(["curl"])
+        network_ok = ensure_network()
+    if not network_ok:
         print("[!] Tidak bisa akses https://cli.nexus.xyz. Periksa koneksi.")
         return False
 
@@ -123,49 +152,172 @@ def test_cli() -> bool:
 def _show_help_snippet():
     cmd = _pick_cmd_path()
     run(f"{cmd} --help")
-    run(f"{cmd} start --help", print_cmd=False)
-    run(f"{cmd} node start --help", print_cmd=False)
+    run(f"{cmd} start --help", print_cmd=False, echo=True)
+    run(f"{cmd} node start --help", print_cmd=False, echo=True)
+
+# Urutan dicoba saat brute-force (fallback jika probe --help tidak bisa memutuskan)
+_START_SUBCMDS = ["start", "node start", "run"]
+_NODE_FLAGS = ["--node-id", "--node_id", "--nodeId", "-n"]
 
+def _dialect_cache_path() -> Path:
+    return Path(state_dir()) / "cli_dialect.json"
+
+def _resolve_bin_path():
+    found = shutil.which("nexus-network")
+    if found:
+        return os.path.realpath(found)
+    candidate = Path.home() / ".nexus" / "bin" / "nexus-network"
+    return str(candidate.resolve()) if candidate.exists() else None
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _load_dialects() -> dict:
+    try:
+        return json.loads(_dialect_cache_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _save_dialect(bin_path: str, st, sha: str, dialect: dict):
+    data = _load_dialects()
+    data[bin_path] = {"mtime": st.st_mtime, "size": st.st_size, "sha256": sha, "dialect": dialect}
+    write_json(_dialect_cache_path(), data)
+
+def forget_cli_dialect():
+    bin_path = _resolve_bin_path()
+    data = _load_dialects()
+    if bin_path in data:
+        del data[bin_path]
+        write_json(_dialect_cache_path(), data)
+
+def _help_commands(help_text: str) -> list:
+    """Ambil nama subcommand dari bagian 'Commands:' / 'Subcommands:' pada --help."""
+    cmds, in_section = [], False
+    for line in help_text.splitlines():
+        if re.match(r"^\s*(sub)?commands:?\s*$", line, re.IGNORECASE):
+            in_section = True
+            continue
+        if in_section:
+            m = re.match(r"^\s{2,}([a-z][\w-]*)\b", line)
+            if m:
+                cmds.append(m.group(1))
+            elif line.strip() and not line.startswith(" "):
+                in_section = False
+    return cmds
+
+def _probe_dialect(cmd_base: str):
+    """Parse `--help` lalu `<start> --help` sekali saja. Return dict dialect atau None."""
+    ok, top, err, _ = run(f"{cmd_base} --help", print_cmd=False)
+    top = top + "\n" + err
+    commands = _help_commands(top)
+    if "start" in commands:
+        sub = "start"
+    elif "node" in commands or re.search(r"\bnode\s+start\b", top, re.IGNORECASE):
+        sub = "node start"
+    elif "run" in commands:
+        sub = "run"
+    else:
+        return None
+
+    ok, sub_help, err, _ = run(f"{cmd_base} {sub} --help", print_cmd=False)
+    sub_help = sub_help + "\n" + err
+    options = sorted(set(re.findall(r"(?<![\w-])(--[A-Za-z][\w-]*)", sub_help)))
+    for flag in _NODE_FLAGS[:-1]:
+        if flag in options:
+            break
+    else:
+        if re.search(r"(?m)^\s*-n[,\s]", sub_help):
+            flag = "-n"
+        else:
+            return None
+    return {"subcommand": sub, "node_flag": flag, "options": options}
+
+@traced()
+def detect_cli_dialect(cmd_base: str = None):
+    """
+    Dialect start CLI (subcommand + flag node-id), di-cache per binari
+    (path, mtime, sha256). Cache hit = nol spawn tambahan.
+    """
+    bin_path = _resolve_bin_path()
+    if not bin_path:
+        return None
+    st = os.stat(bin_path)
+    rec = _load_dialects().get(bin_path)
+    if rec and rec.get("mtime") == st.st_mtime and rec.get("size") == st.st_size:
+        return rec["dialect"]
+    sha = _sha256_file(bin_path)
+    if rec and rec.get("sha256") == sha:
+        # Binari di-touch tapi isinya sama → dialect tetap berlaku
+        _save_dialect(bin_path, st, sha, rec["dialect"])
+        return rec["dialect"]
+    dialect = _probe_dialect(cmd_base or _pick_cmd_path())
+    if dialect:
+        _save_dialect(bin_path, st, sha, dialect)
+    return dialect
+
+def _remember_dialect(sub: str, flag: str):
+    bin_path = _resolve_bin_path()
+    if bin_path:
+        st = os.stat(bin_path)
+        _save_dialect(bin_path, st, _sha256_file(bin_path), {"subcommand": sub, "node_flag": flag, "options": []})
+
+def _needs_login(out: str, err: str) -> bool:
+    # out/err = tail dari ring buffer run(), bukan seluruh output
+    joined = (out + "\n" + err).lower()
+    return any(k in joined for k in ["login", "authenticate", "authorization"])
+
+@traced()
 def start_node_smart(node_id: str) -> bool:
-    """Coba beberapa variasi perintah start (native)."""
+    """Start node (native) dengan dialect CLI yang sudah di-cache; brute-force hanya jika perlu."""
     ensure_path_to_nexus_bin()
     cmd_base = _pick_cmd_path()
 
     if len(node_id) < 10:
         print(f"[?] Peringatan: node-id '{node_id}' tampak pendek. Pastikan benar.")
 
-    variants = [
-        f'{cmd_base} start --node-id "{node_id}"',
-        f'{cmd_base} start --node_id "{node_id}"',
-        f'{cmd_base} start --nodeId "{node_id}"',
-        f'{cmd_base} start -n "{node_id}"',
-        f'{cmd_base} node start --node-id "{node_id}"',
-        f'{cmd_base} node start --node_id "{node_id}"',
-        f'{cmd_base} node start --nodeId "{node_id}"',
-        f'{cmd_base} node start -n "{node_id}"',
-        f'{cmd_base} run --node-id "{node_id}"',
-        f'{cmd_base} run --node_id "{node_id}"',
-    ]
-
-    ok_h, help_out, *_ = run(f"{cmd_base} --help", print_cmd=False)
-    if ok_h and re.search(r"\bnode\s+start\b", help_out, re.IGNORECASE):
-        variants = [v for v in variants if "node start" in v] + [v for v in variants if "node start" not in v]
-
-    for cmd in variants:
+    dialect = detect_cli_dialect(cmd_base)
+    if dialect:
+        cmd = f'{cmd_base} {dialect["subcommand"]} {dialect["node_flag"]} "{node_id}"'
+        import nexus_tune
+
+        # Hasil tune (thread, affinity, nice); flag thread hanya jika dikenal dialect
+        cmd = nexus_tune.apply_on_start(cmd, dialect.get("options"))
         ok, out, err, _ = run(cmd)
         if ok:
             print("[✓] Node berhasil dijalankan dengan:", cmd)
             return True
-        joined = (out + "\n" + err).lower()
-        if any(k in joined for k in ["login", "authenticate", "authorization"]):
+        if _needs_login(out, err):
             print("[!] CLI minta login. Lihat help berikut lalu login, kemudian jalankan ulang.")
             _show_help_snippet()
+            return False
+        # Dialect hasil probe tidak cocok → buang cache, coba variasi lain
+        forget_cli_dialect()
+
+    variants = [(sub, flag) for sub in _START_SUBCMDS for flag in _NODE_FLAGS]
+    if dialect:
+        variants.remove((dialect["subcommand"], dialect["node_flag"]))
+
+    for sub, flag in variants:
+        cmd = f'{cmd_base} {sub} {flag} "{node_id}"'
+        ok, out, err, _ = run(cmd)
+        if ok:
+            print("[✓] Node berhasil dijalankan dengan:", cmd)
+            _remember_dialect(sub, flag)
+            return True
+        if _needs_login(out, err):
+            print("[!] CLI minta login. Lihat help berikut lalu login, kemudian jalankan ulang.")
+            break
     _show_help_snippet()
     return False
 
 # =======================
 # PROOT (Ubuntu)
 # =======================
+@traced()
 def ensure_proot_distro() -> bool:
     if not is_termux():
         return False
@@ -174,53 +326,155 @@ def ensure_proot_distro() -> bool:
     pkg_ensure(["proot-distro"])
     return is_command_available("proot-distro")
 
-def _proot(cmd_inside: str):
-    """Jalankan perintah di dalam Ubuntu (proot)."""
-    return run(
-        f'proot-distro login {PROOT_DISTRO} -- bash -lc "{cmd_inside}"'
-    )
+def _proot(cmd_inside: str, stream: bool = False):
+    """Jalankan perintah di dalam Ubuntu (proot) lewat broker shell. Return (ok, out, err, code).
+    stream=True: langkah panjang (apt / installer) → `proot-distro login` sendiri, output live,
+    broker tidak dipegang (klien lain tetap jalan) dan tanpa batas waktu broker."""
+    print(f"\n>>> [proot:{PROOT_DISTRO}] {cmd_inside.strip()}")
+    if stream:
+        return run(direct_argv(PROOT_DISTRO, cmd_inside), print_cmd=False, echo=True)
+    with span(nexus_trace.short(cmd_inside), cat="proot", cmd=cmd_inside) as sp:
+        code, out, err = proot_exec(cmd_inside, PROOT_DISTRO)
+        sp["rc"] = code
+    if out.strip():
+        print(out.rstrip())
+    if code != 0:
+        print(f"[!] Command gagal di proot (exit={code})")
+        if err.strip():
+            print("--- stderr ---")
+            print(err.strip())
+    return code == 0, out, err, code
+
+def _proot_bin_host() -> str:
+    return os.path.join(proot_home(PROOT_DISTRO), ".nexus", "bin", "nexus-network")
+
+@traced()
+def provision_proot() -> bool:
+    """
+    Install Ubuntu + dependency + Nexus CLI di proot. Langkah yang sudah siap dilewati (stamp).
+    NEXUS_SNAPSHOT di-set dan rootfs belum ada → extract snapshot (stamp ikut diimpor).
+    """
+    import proot_snapshot
+
+    proot_snapshot.restore_if_configured(PROOT_DISTRO)
+    state = ProvisionState()
+    cli_inputs = {"distro": PROOT_DISTRO, "url": NEXUS_INSTALL_URL}
+    installer = "/tmp/nexus_install.sh"
+    installer_host = os.path.join(rootfs_path(PROOT_DISTRO), installer.lstrip("/"))
+
+    def rootfs_ok():
+        return os.path.isdir(rootfs_path(PROOT_DISTRO))
+
+    def fetch_installer(_):
+        # Pakai curl Termux di host → berjalan paralel dengan apt di dalam proot
+        os.makedirs(os.path.dirname(installer_host), exist_ok=True)
+        run(["curl", "-fsSL", NEXUS_INSTALL_URL, "-o", installer_host])
+        # Gagal unduh bukan fatal: langkah nexus-cli mengunduh sendiri di dalam proot
+
+    dag = Dag()
+    dag.add("proot-rootfs", lambda _: state.step(
+        "proot-rootfs", {"distro": PROOT_DISTRO},
+        # Gagal install (mis. sudah ada) bukan kegagalan langkah; verify yang menentukan
+        lambda: run(["proot-distro", "install", PROOT_DISTRO])[0] or None,
+        verify=rootfs_ok,
+    ), outputs=["rootfs"])
+    dag.add("proot-apt", lambda _: state.step(
+        "proot-apt", {"distro": PROOT_DISTRO, "pkgs": PROOT_APT_PKGS},
+        lambda: _proot("set -e\n" + apt_ensure_script(PROOT_APT_PKGS) + "\nupdate-ca-certificates || true", stream=True)[0],
+        verify=rootfs_ok,
+    ), inputs=["rootfs"], locks=["dpkg:" + PROOT_DISTRO])
+    if not state.is_done("nexus-cli", cli_inputs, CLI_REFRESH):
+        dag.add("nexus-installer", fetch_installer, inputs=["rootfs"], outputs=["installer"])
+    dag.add("nexus-cli", lambda _: state.step(
+        "nexus-cli", cli_inputs,
+        lambda: _proot(f"""
+set -e
+[ -s {installer} ] || curl -fsSL {NEXUS_INSTALL_URL} -o {installer}
+bash {installer}
+rm -f {installer}
+""", stream=True)[0],
+        verify=lambda: os.path.isfile(_proot_bin_host()),
+        max_age=CLI_REFRESH,
+        info=lambda: {"binary": file_fingerprint(_proot_bin_host())},
+    ), deps=["proot-apt"], inputs=["installer"])
+    return dag.run()
+
+def _host_run_dir() -> str:
+    """PROOT_RUN_DIR dilihat dari host (dibaca langsung, tanpa proot login)."""
+    import nexus_watchdog
+
+    return nexus_watchdog.run_dir(PROOT_DISTRO)
+
+@traced()
+def start_in_proot_detached(node_id: str, watchdog: bool = False, governor: bool = False):
+    """
+    Start node di proot Ubuntu dalam mode detached, simpan PID & LOG.
+    Output node lewat nexus_watchdog → node.log dirotasi + dikompresi.
+    watchdog=True: node juga di-restart otomatis (backoff) dan dideteksi bila macet.
+    governor=True: node di-throttle menurut suhu SoC / baterai (nexus_governor).
+    """
+    import nexus_watchdog
 
-def start_in_proot_detached(node_id: str):
-    """Start node di proot Ubuntu dalam mode detached (nohup), simpan PID & LOG."""
     if not ensure_proot_distro():
         print("[x] proot-distro belum siap / bukan Termux.")
         return
 
-    # Install Ubuntu (idempotent) dan dependency, lalu jalankan di background
-    run(f"proot-distro install {PROOT_DISTRO} || true")
+    # Install Ubuntu + dependency (dilewati jika stamp valid), lalu jalankan di background
+    if not provision_proot():
+        print("[x] Provisioning proot gagal.")
+        return
 
-    cmd = f'''
-set -e
-export DEBIAN_FRONTEND=noninteractive
-apt-get update -yq
-apt-get install -yq curl ca-certificates procps
-update-ca-certificates || true
-
-# install Nexus CLI
-curl -fsSL https://cli.nexus.xyz/ -o /tmp/nexus_install.sh
-bash /tmp/nexus_install.sh
-
-export PATH="$HOME/.nexus/bin:$PATH"
-mkdir -p {PROOT_RUN_DIR}
-
-# jalankan background + PID + LOG
-nohup {PROOT_BIN} start --node-id "{node_id}" > {PROOT_RUN_DIR}/node.log 2>&1 &
-echo $! > {PROOT_RUN_DIR}/node.pid
-
-sleep 1
-if [ -s {PROOT_RUN_DIR}/node.pid ] && ps -p $(cat {PROOT_RUN_DIR}/node.pid) >/dev/null 2>&1; then
-  echo "[✓] Node berjalan (PID $(cat {PROOT_RUN_DIR}/node.pid))."
-  echo "[i] Log: {PROOT_RUN_DIR}/node.log"
-else
-  echo "[x] Gagal menjalankan node di background. Cek log jika ada."
-  [ -f {PROOT_RUN_DIR}/node.log ] && tail -n 80 {PROOT_RUN_DIR}/node.log || true
-  exit 1
-fi
-'''
-    _proot(cmd)
+    if nexus_watchdog.watchdog_pid(PROOT_DISTRO):
+        print("[i] Node sudah berjalan di background. Pakai proot_stop() dulu untuk restart.")
+        return
+    pid = nexus_watchdog.spawn_detached(node_id, PROOT_DISTRO, restart=watchdog, governor=governor)
+
+    time.sleep(2)
+    node_pid = read_pid(os.path.join(_host_run_dir(), "node.pid"))
+    log_path = os.path.join(_host_run_dir(), "node.log")
+    if node_pid and pid_alive(node_pid):
+        print(f"[✓] Node berjalan (PID {node_pid}).")
+        if watchdog:
+            print(f"[i] Watchdog PID {pid}: restart otomatis bila keluar/macet.")
+        print(f"[i] Log: {PROOT_RUN_DIR}/node.log")
+    elif watchdog and nexus_watchdog.watchdog_pid(PROOT_DISTRO):
+        print(f"[!] Node belum jalan; watchdog (PID {pid}) akan mencoba ulang. Cek proot_logs().")
+    else:
+        print("[x] Gagal menjalankan node di background. Cek log jika ada.")
+        sys.stdout.write(tail_lines(log_path, 80).decode("utf-8", "replace"))
+
+@traced()
+def start_node_auto(node_id: str, governor: bool = False):
+    """
+    Start node lewat backend terpilih (nexus_backends): NEXUS_BACKEND → hasil
+    `nexus_backends.py select` → proot (Termux) / native. test_cli() hanya tahu apakah
+    binari native jalan; select() mengukur backend mana yang paling cepat.
+    """
+    import nexus_backends
+
+    backend = nexus_backends.resolve(distro=PROOT_DISTRO)
+    print(f"[i] Backend: {backend.name}")
+    if backend.name == "native":
+        return start_node_smart(node_id)
+    if backend.name == "proot":
+        return start_in_proot_detached(node_id, watchdog=True, governor=governor)
+    pid = backend.start(node_id, governor=governor)
+    if pid:
+        print(f"[✓] Node ({backend.name}) berjalan di background (watchdog PID {pid}).")
+    return bool(pid)
 
 def proot_status():
-    """Cek status proses di proot."""
+    """Cek status proses di proot (+ ringkasan watchdog bila pernah dipakai)."""
+    import nexus_sampler
+    import nexus_watchdog
+
+    state = nexus_watchdog.read_state(PROOT_DISTRO)
+    if state:
+        print(nexus_watchdog.format_state(state, bool(nexus_watchdog.watchdog_pid(PROOT_DISTRO))))
+    sample = nexus_sampler.latest(_host_run_dir())
+    if sample and time.time() - sample["t"] < 3 * nexus_sampler.INTERVAL:
+        print(f"RESOURCE: CPU {sample['cpu']:.0f}%  RSS {sample['rss'] / 2**20:.0f} MB  "
+              f"thread {sample['threads']}  (bot.py --stats untuk p50/p95/tren)")
     cmd = f'''
 PID_FILE={PROOT_RUN_DIR}/node.pid
 if [ -s "$PID_FILE" ]; then
@@ -236,21 +490,45 @@ fi
 '''
     _proot(cmd)
 
-def proot_logs(tail_n: int = 80):
-    """Tampilkan log terakhir dari node di proot."""
-    cmd = f'''
-LOG={PROOT_RUN_DIR}/node.log
-if [ -f "$LOG" ]; then
-  echo "=== tail -n {tail_n} $LOG ==="
-  tail -n {tail_n} "$LOG"
-else
-  echo "[i] Belum ada log: $LOG"
-fi
-'''
-    _proot(cmd)
+def proot_logs(tail_n: int = 80, new_only: bool = False, follow: bool = False, since=None, until=None, grep=None):
+    """
+    Tampilkan log node di proot, dibaca langsung dari host.
+    new_only: hanya byte baru sejak cek terakhir (offset disimpan, aman walau log dirotasi).
+    follow: terus ikuti log (CTRL+C untuk keluar).
+    since/until ("2h", "03:00", epoch, ...) / grep (regex): cari di node.log + arsip lewat indeks waktu.
+    """
+    log_path = os.path.join(_host_run_dir(), "node.log")
+    if not os.path.exists(log_path) and not list_archives(log_path):
+        print(f"[i] Belum ada log: {PROOT_RUN_DIR}/node.log")
+        return
+    if since or until or grep:
+        print_search(log_path, since and parse_time(since), until and parse_time(until), grep)
+        return
+    follower = LogFollower(log_path)
+    if new_only or follow:
+        data = follower.read_new() if follower.seq is not None else b""
+        if follower.seq is None:
+            # Cek pertama: tampilkan tail lalu mulai dari ujung file
+            data = tail_lines(log_path, tail_n)
+            follower.seek_end()
+    else:
+        print(f"=== tail -n {tail_n} {PROOT_RUN_DIR}/node.log ===")
+        data = tail_lines(log_path, tail_n)
+    sys.stdout.write(data.decode("utf-8", "replace"))
+    try:
+        while follow:
+            time.sleep(1)
+            sys.stdout.write(follower.read_new().decode("utf-8", "replace"))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
 
 def proot_stop():
-    """Hentikan node di proot (berdasarkan PID)."""
+    """Hentikan node di proot (berdasarkan PID). Watchdog dihentikan dulu agar tidak me-restart."""
+    import nexus_watchdog
+
+    if nexus_watchdog.stop_watchdog(PROOT_DISTRO):
+        print("[✓] Watchdog dihentikan.")
     cmd = f'''
 PID_FILE={PROOT_RUN_DIR}/node.pid
 if [ -s "$PID_FILE" ]; then
@@ -275,16 +553,29 @@ fi
 # =======================
 # Preflight
 # =======================
+@traced()
 def preflight_ensure_ready():
     """
     Termux: coba install CLI (boleh gagal jika tidak kompatibel), siapkan proot-distro.
     Non-Termux: cek CLI saja.
     """
+    import nexus_backends
+
     status = {"termux": is_termux(), "cli_ready": False, "proot_ready": False}
     if status["termux"]:
-        status["cli_ready"] = install_cli_termux()
-        status["proot_ready"] = ensure_proot_distro()
+        # Probe jaringan, tes CLI dan pkg berjalan paralel; pkg dalam satu transaksi (lock dpkg)
+        probes = {}
+        dag = Dag()
+        dag.add("pkgs", lambda _: pkg_ensure(["curl", "proot-distro"]), locks=["dpkg"])
+        dag.add("cli-test", lambda _: probes.__setitem__("cli", test_cli()))
+        dag.add("network", lambda _: probes.__setitem__("network", ensure_network()), deps=["pkgs"])
+        dag.add("cli", lambda _: install_cli_termux(probes["cli"], probes["network"]), deps=["cli-test", "network"])
+        dag.add("proot-distro", lambda _: is_command_available("proot-distro"), deps=["pkgs"])
+        dag.run()
+        status["cli_ready"] = dag.results.get("cli") is True
+        status["proot_ready"] = dag.results.get("proot-distro") is True
     else:
         status["cli_ready"] = test_cli()
+    status["backend"] = nexus_backends.resolve(distro=PROOT_DISTRO).name
     print(f"[i] Status preflight: {status}")
     return status
@@ -0,0 +1,408 @@
+# nexus_sampler.py
+"""
+Sampler resource node dari /proc → ring file biner berukuran tetap.
+- Tiap NEXUS_SAMPLE_INTERVAL detik (default 10; 0 = nonaktif) baca /proc/<pid>/stat,
+  status dan io untuk pohon proses satu node (PID anak watchdog / bot.py + turunannya): CPU %,
+  RSS, swap, thread, I/O baca/tulis per detik, context switch paksa per detik, proses yang di-pause
+- Node lain di host (fleet, backend / rootfs lain) tidak ikut terhitung; scan semua proses
+  bernama nexus-network hanya untuk `nexus_sampler.py run` yang berdiri sendiri
+- Daftar PID di-cache; /proc hanya di-scan ulang bila ada PID hilang atau tiap RESCAN sampel
+- <run_dir>/samples.ring: header + NEXUS_SAMPLE_CAPACITY record (default 8640 = 24 jam
+  pada 10 detik) struct 48 byte, ditulis lewat mmap → ukuran file tidak pernah tumbuh
+- stats: p50/p95/max + tren per jam (regresi linear) untuk rentang waktu tertentu;
+  peringatan bila RSS naik terus (indikasi leak) atau CPU turun terus (starvation)
+Watchdog dan bot.py --metrics menjalankan sampler sebagai thread (samples.ring di run_dir).
+Pakai:  python bot.py --stats [--since 6h]
+        python nexus_sampler.py stats [--dir DIR] [--since 6h] [--json]
+        python nexus_sampler.py run [--dir DIR] [--interval 10]
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+INTERVAL = float(os.environ.get("NEXUS_SAMPLE_INTERVAL", "10"))
+CAPACITY = int(os.environ.get("NEXUS_SAMPLE_CAPACITY", "8640"))
+RESCAN = 6  # scan ulang /proc tiap N sampel → anak proses baru tetap tertangkap
+NODE_COMM = "nexus-network"
+
+MAGIC = b"NXRS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")  # magic, versi, ukuran record, kapasitas, jumlah record ditulis
+HEADER_SIZE = 32
+# t, cpu %, rss, swap, baca B/s, tulis B/s, nvcsw/s, thread, proses, di-pause, cadangan
+RECORD = struct.Struct("<dfQQfffHHHH")
+FIELDS = ("t", "cpu", "rss", "swap", "read_bps", "write_bps", "nvcsw_ps", "threads", "procs", "stopped", "_pad")
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def ring_path(run_dir):
+    return os.path.join(run_dir, "samples.ring")
+
+
+# =======================
+# Ring file
+# =======================
+class Ring:
+    """Array record berukuran tetap di atas mmap; record ke-n ada di slot n % kapasitas."""
+
+    def __init__(self, path, capacity=CAPACITY, writable=False):
+        self.path = path
+        self.writable = writable
+        if writable:
+            self._create_if_needed(capacity)
+        self.f = open(path, "r+b" if writable else "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, rsize, self.capacity, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION or rsize != RECORD.size:
+            self.close()
+            raise ValueError(f"bukan ring file sampler v{VERSION}: {path}")
+
+    def _create_if_needed(self, capacity):
+        try:
+            with open(self.path, "rb") as f:
+                magic, version, rsize, cap, _ = HEADER.unpack(f.read(HEADER.size))
+            if (magic, version, rsize) == (MAGIC, VERSION, RECORD.size) and \
+                    os.path.getsize(self.path) == HEADER_SIZE + cap * RECORD.size:
+                return  # kapasitas file lama dipertahankan (data tidak hilang saat env berubah)
+        except (OSError, struct.error):
+            pass
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, capacity, 0).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + capacity * RECORD.size)
+        os.replace(tmp, self.path)
+
+    @property
+    def count(self):
+        return HEADER.unpack_from(self.mm, 0)[4]
+
+    def append(self, values):
+        n = self.count
+        RECORD.pack_into(self.mm, HEADER_SIZE + (n % self.capacity) * RECORD.size, *values)
+        # Record dulu, baru counter → pembaca tidak pernah melihat slot setengah tertulis sebagai baru
+        struct.pack_into("<Q", self.mm, HEADER.size - 8, n + 1)
+
+    def records(self, since=None):
+        """Record dict terurut lama → baru (hanya t ≥ since bila diberikan)."""
+        n = self.count
+        first = max(0, n - self.capacity)
+        out = []
+        for i in range(first, n):
+            rec = dict(zip(FIELDS, RECORD.unpack_from(self.mm, HEADER_SIZE + (i % self.capacity) * RECORD.size)))
+            if since is None or rec["t"] >= since:
+                del rec["_pad"]
+                out.append(rec)
+        return out
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =======================
+# /proc
+# =======================
+def read_stat(pid, proc="/proc"):
+    """(comm, state, ppid, utime+stime ticks, thread, rss byte) dari /proc/<pid>/stat, atau None."""
+    try:
+        with open(f"{proc}/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm bisa berisi spasi / kurung → potong di kurung tutup terakhir
+    lp, rp = data.find(b"("), data.rfind(b")")
+    fields = data[rp + 2:].split()
+    try:
+        return (data[lp + 1:rp].decode("utf-8", "replace"), fields[0].decode(), int(fields[1]),
+                int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21]) * PAGE_SIZE)
+    except (IndexError, ValueError):
+        return None
+
+
+def _read_keys(path, keys):
+    """Baris "Key: nilai" (status / io) → {key: int}; key yang tidak ada / file tak terbaca dilewati."""
+    out = {}
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                key, _, value = line.partition(b":")
+                key = key.decode()
+                if key in keys:
+                    out[key] = int(value.split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+    return out
+
+
+def process_tree(proc="/proc", comm=NODE_COMM, roots=None):
+    """PID proses node (comm nexus-network, tidak terpotong di 15 char) + semua turunannya.
+    roots: PID akar lain (mis. PID container) → comm tidak dipakai."""
+    parents = {}
+    found = []
+    for entry in os.listdir(proc):
+        if not entry.isdigit():
+            continue
+        st = read_stat(entry, proc)
+        if st is None:
+            continue
+        parents.setdefault(st[2], []).append(int(entry))
+        if roots is None and st[0] == comm:
+            found.append(int(entry))
+    if roots is not None:
+        found = [p for p in roots if os.path.exists(f"{proc}/{p}")]
+    tree, todo = set(), list(found)
+    while todo:
+        pid = todo.pop()
+        if pid not in tree:
+            tree.add(pid)
+            todo.extend(parents.get(pid, ()))
+    return sorted(tree)
+
+
+def descendants(pid=None, proc="/proc"):
+    """Turunan pid (default proses ini), tanpa pid itu sendiri: node yang dijalankan bot.py di foreground."""
+    pid = os.getpid() if pid is None else pid
+    return [p for p in process_tree(proc, roots=[pid]) if p != pid]
+
+
+def each_task(pids, fn, proc="/proc"):
+    """fn(tid) untuk semua thread proses (nice & affinity di Linux per-thread).
+    Return False bila ada yang ditolak (proses user lain / turunkan nice tanpa root / core offline)."""
+    ok = True
+    for pid in pids:
+        try:
+            tids = os.listdir(f"{proc}/{pid}/task")
+        except OSError:
+            tids = [pid]
+        for tid in tids:
+            try:
+                fn(int(tid))
+            except (ProcessLookupError, FileNotFoundError):
+                pass
+            except OSError:
+                ok = False
+    return ok
+
+
+class Sampler:
+    def __init__(self, run_dir, interval=INTERVAL, capacity=CAPACITY, proc="/proc", pids=None):
+        # pids: callable → daftar PID node ini (watchdog: Watchdog.node_pids); None = semua
+        # proses nexus-network di host, hanya untuk sampler yang berdiri sendiri
+        self.path = ring_path(run_dir)
+        self.interval = interval
+        self.capacity = capacity
+        self.proc = proc
+        self.root_pids = pids
+        self._pids = []
+        self._n = 0
+        self._prev = None  # (t, {pid: (ticks, read, write, nvcsw)})
+        self.rated = False  # sampel terakhir punya laju yang valid (ada PID di kedua sampel)
+        self._stop = threading.Event()
+
+    def _tree(self):
+        if self.root_pids is None:
+            return process_tree(self.proc)
+        return sorted(set(self.root_pids()))
+
+    def pids(self):
+        if self._n % RESCAN == 0 or not self._pids or \
+                not all(os.path.exists(f"{self.proc}/{p}") for p in self._pids):
+            self._pids = self._tree()
+        self._n += 1
+        return self._pids
+
+    def sample(self):
+        """Satu sampel (tuple sesuai RECORD). Laju (CPU, I/O, ctx switch) = selisih vs sampel sebelumnya."""
+        now = time.time()
+        cur = {}
+        rss = swap = threads = stopped = 0
+        for pid in self.pids():
+            st = read_stat(pid, self.proc)
+            if st is None:
+                continue
+            status = _read_keys(f"{self.proc}/{pid}/status", ("VmSwap", "nonvoluntary_ctxt_switches"))
+            # read_bytes/write_bytes = I/O ke storage; butuh izin ptrace (proses milik user sendiri OK)
+            io = _read_keys(f"{self.proc}/{pid}/io", ("read_bytes", "write_bytes"))
+            cur[pid] = (st[3], io.get("read_bytes", 0), io.get("write_bytes", 0),
+                        status.get("nonvoluntary_ctxt_switches", 0))
+            rss += st[5]
+            swap += status.get("VmSwap", 0) * 1024
+            threads += st[4]
+            stopped += st[1] in ("T", "t")
+        cpu = rbps = wbps = nvcsw = 0.0
+        if self._prev:
+            dt = max(1e-6, now - self._prev[0])
+            before = self._prev[1]
+            # Hanya PID yang ada di kedua sampel; proses baru mulai dihitung di sampel berikutnya
+            deltas = [tuple(c - b for c, b in zip(cur[p], before[p])) for p in cur if p in before]
+            cpu = sum(max(0, d[0]) for d in deltas) / CLK_TCK / dt * 100
+            rbps = sum(max(0, d[1]) for d in deltas) / dt
+            wbps = sum(max(0, d[2]) for d in deltas) / dt
+            nvcsw = sum(max(0, d[3]) for d in deltas) / dt
+        self.rated = bool(self._prev and any(p in self._prev[1] for p in cur))
+        self._prev = (now, cur)
+        return (now, cpu, rss, swap, rbps, wbps, nvcsw, min(threads, 65535), min(len(cur), 65535), stopped, 0)
+
+    def run(self):
+        with Ring(self.path, self.capacity, writable=True) as ring:
+            self.sample()  # sampel pertama hanya jadi baseline laju
+            while not self._stop.wait(self.interval):
+                values = self.sample()
+                if self.rated:  # node tidak jalan (mis. jeda backoff) / baru start → tidak dicatat
+                    ring.append(values)
+
+    def stop(self):
+        self._stop.set()
+
+    def start_thread(self):
+        t = threading.Thread(target=self.run, name="sampler", daemon=True)
+        t.start()
+        return t
+
+
+# =======================
+# Statistik
+# =======================
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def trend(ts, values):
+    """(kemiringan per jam, korelasi r) regresi linear; (0, 0) bila data kurang."""
+    n = len(ts)
+    if n < 3:
+        return 0.0, 0.0
+    mt, mv = sum(ts) / n, sum(values) / n
+    stt = sum((t - mt) ** 2 for t in ts)
+    svv = sum((v - mv) ** 2 for v in values)
+    stv = sum((t - mt) * (v - mv) for t, v in zip(ts, values))
+    if stt == 0:
+        return 0.0, 0.0
+    r = stv / math.sqrt(stt * svv) if svv else 0.0
+    return stv / stt * 3600, r
+
+
+METRICS = ("cpu", "rss", "swap", "threads", "read_bps", "write_bps", "nvcsw_ps")
+
+
+def summarize(records):
+    """{metric: {p50, p95, max, per_hour, r}} + info rentang + peringatan."""
+    out = {"samples": len(records), "metrics": {}, "warnings": []}
+    if not records:
+        return out
+    ts = [r["t"] for r in records]
+    out.update(start=ts[0], end=ts[-1], paused=sum(1 for r in records if r["stopped"]) / len(records))
+    for name in METRICS:
+        values = [r[name] for r in records]
+        s = sorted(values)
+        slope, r = trend(ts, values)
+        out["metrics"][name] = {"p50": percentile(s, 0.5), "p95": percentile(s, 0.95), "max": s[-1],
+                                "per_hour": slope, "r": r}
+    hours = (ts[-1] - ts[0]) / 3600
+    rss = out["metrics"]["rss"]
+    # Naik konsisten (r tinggi) dan total kenaikan berarti → bukan sekadar fluktuasi cache
+    if hours >= 0.5 and rss["r"] > 0.8 and rss["per_hour"] * hours > max(0.1 * rss["p50"], 32 << 20):
+        out["warnings"].append(f"RSS naik terus {rss['per_hour'] / 2**20:+.1f} MB/jam (r={rss['r']:.2f}) → kemungkinan memory leak")
+    cpu = out["metrics"]["cpu"]
+    if hours >= 0.5 and cpu["r"] < -0.8 and -cpu["per_hour"] * hours > 0.2 * max(cpu["p50"], 1):
+        out["warnings"].append(f"CPU turun terus {cpu['per_hour']:+.0f}%/jam (r={cpu['r']:.2f}) → node kekurangan CPU "
+                               "(throttle suhu / proses lain / governor)")
+    if out["paused"] > 0.2:
+        out["warnings"].append(f"node di-pause (SIGSTOP) pada {out['paused'] * 100:.0f}% sampel")
+    return out
+
+
+def _fmt(name, value):
+    if name in ("rss", "swap"):
+        return f"{value / 2**20:.0f} MB"
+    if name in ("read_bps", "write_bps"):
+        return f"{value / 1024:.1f} KB/s"
+    if name == "cpu":
+        return f"{value:.0f}%"
+    return f"{value:.1f}" if name == "nvcsw_ps" else f"{value:.0f}"
+
+
+def format_summary(summary):
+    if not summary["samples"]:
+        return "[i] Tidak ada sampel di rentang ini (sampler jalan bersama watchdog / --restart / --metrics)."
+    span_h = (summary["end"] - summary["start"]) / 3600
+    start = time.strftime("%Y-%m-%d %H:%M", time.localtime(summary["start"]))
+    lines = [f"[i] {summary['samples']} sampel sejak {start} ({span_h:.1f} jam)",
+             f"{'METRIK':<10} {'P50':>11} {'P95':>11} {'MAX':>11} {'TREN/JAM':>12}"]
+    for name, m in summary["metrics"].items():
+        per_hour = _fmt(name, abs(m["per_hour"]))
+        per_hour = ("+" if m["per_hour"] >= 0 else "-") + per_hour
+        lines.append(f"{name:<10} {_fmt(name, m['p50']):>11} {_fmt(name, m['p95']):>11} {_fmt(name, m['max']):>11} "
+                     f"{per_hour:>12}")
+    lines += [f"[!] {w}" for w in summary["warnings"]]
+    return "\n".join(lines)
+
+
+def latest(run_dir):
+    """Sampel terakhir (dict) atau None; dipakai status singkat."""
+    try:
+        with Ring(ring_path(run_dir)) as ring:
+            recs = ring.records()[-1:]
+    except (OSError, ValueError):
+        return None
+    return recs[0] if recs else None
+
+
+def stats(run_dir, since=None):
+    try:
+        with Ring(ring_path(run_dir)) as ring:
+            return summarize(ring.records(since))
+    except (OSError, ValueError):
+        return summarize([])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sampler resource node (/proc → ring file)")
+    ap.add_argument("op", choices=["run", "stats"])
+    ap.add_argument("--dir", default=os.path.join(os.path.expanduser("~"), ".nexus-run"),
+                    help="direktori samples.ring (default ~/.nexus-run)")
+    ap.add_argument("--interval", type=float, default=INTERVAL or 10)
+    ap.add_argument("--since", help="stats: mulai waktu (2h, 30m, 03:00, ...); default semua sampel")
+    ap.add_argument("--json", action="store_true", help="stats: output JSON")
+    args = ap.parse_args(argv)
+
+    if args.op == "run":
+        sampler = Sampler(args.dir, args.interval)
+        print(f"[i] Sampler aktif: tiap {args.interval:.0f}s → {sampler.path}")
+        try:
+            sampler.run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    since = None
+    if args.since:
+        from nexus_logs import parse_time
+
+        since = parse_time(args.since)
+    summary = stats(args.dir, since)
+    print(json.dumps(summary, indent=1) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# nexus_trace.py
+"""
+Timing per langkah (span) untuk alur install/start.
+- span("nama") / @traced(): catat durasi; span boleh bersarang
+- Di akhir proses: file Chrome trace-event JSON (buka di chrome://tracing
+  atau https://ui.perfetto.dev) + tabel ringkasan langkah terlama
+Aktif lewat flag --trace (enable()) atau env NEXUS_TRACE=1 / NEXUS_TRACE=<file.json>.
+Tanpa itu span() hanya yield dict kosong (nyaris tanpa biaya).
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import shlex
+import sys
+import threading
+import time
+
+_events = []
+_lock = threading.Lock()
+_path = None
+_t0 = None
+
+
+def enabled():
+    return _path is not None
+
+
+def enable(path=None):
+    """Mulai merekam. Path default: <state_dir>/trace-<waktu>.json."""
+    global _path, _t0
+    if _path is None:
+        _t0 = time.perf_counter()
+        atexit.register(finish)
+    env = os.environ.get("NEXUS_TRACE", "")
+    path = path or (env if env not in ("", "0", "1") else None)
+    if not path:
+        from provision_cache import state_dir
+        path = os.path.join(state_dir(), f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    _path = path
+    return _path
+
+
+def short(cmd, limit=60):
+    """Label span dari perintah/script/argv: baris pertama yang tidak kosong, dipotong."""
+    if not isinstance(cmd, str):
+        cmd = shlex.join(cmd)
+    line = next((" ".join(ln.split()) for ln in str(cmd).splitlines() if ln.strip()), "")
+    return line if len(line) <= limit else line[:limit - 1] + "…"
+
+
+@contextlib.contextmanager
+def span(name, cat="step", **args):
+    """
+    with span("apt", cat="proot", cmd=cmd) as sp:
+        sp["rc"] = ...   # field tambahan masuk ke args event
+    """
+    if _path is None:
+        yield args
+        return
+    ts = time.time()
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        dur = time.perf_counter() - start
+        event = {
+            "name": name, "cat": cat, "ph": "X",
+            "ts": int(ts * 1e6), "dur": int(dur * 1e6),
+            "pid": os.getpid(), "tid": threading.get_ident(),
+            "args": {k: v for k, v in args.items() if v is not None},
+        }
+        with _lock:
+            _events.append(event)
+
+
+def traced(name=None, cat="step"):
+    """Decorator: seluruh pemanggilan fungsi menjadi satu span (default: nama fungsi)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            with span(name or fn.__name__, cat=cat):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+
+# =======================
+# Output
+# =======================
+def summary(events=None, wall=None, top=25):
+    """Tabel: total/maks/jumlah per (kategori, nama), urut total terbesar."""
+    events = _events if events is None else events
+    agg = {}
+    for e in events:
+        key = (e["cat"], e["name"])
+        n, total, peak = agg.get(key, (0, 0, 0))
+        agg[key] = (n + 1, total + e["dur"], max(peak, e["dur"]))
+    rows = sorted(agg.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+    width = max([len(name) for (_, name), _ in rows] + [8])
+    lines = [f"{'KATEGORI':<9} {'LANGKAH':<{width}} {'N':>4} {'TOTAL s':>9} {'MAKS s':>8} {'%':>5}"]
+    for (cat, name), (n, total, peak) in rows:
+        pct = f"{100.0 * total / wall:5.1f}" if wall else "    -"
+        lines.append(f"{cat:<9} {name:<{width}} {n:>4} {total / 1e6:>9.3f} {peak / 1e6:>8.3f} {pct}")
+    if wall:
+        lines.append(f"wall: {wall / 1e6:.3f}s  (span bersarang ikut dihitung di induknya)")
+    return "\n".join(lines)
+
+
+def write(path, events=None):
+    events = _events if events is None else events
+    meta = {"name": "process_name", "ph": "M", "pid": os.getpid(),
+            "args": {"name": os.path.basename(sys.argv[0] or "python")}}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": [meta] + events, "displayTimeUnit": "ms"}, f)
+    os.replace(tmp, path)
+
+
+def finish():
+    """Tulis trace + cetak ringkasan (dipanggil otomatis saat proses keluar)."""
+    global _path
+    if _path is None:
+        return None
+    path, _path = _path, None
+    with _lock:
+        events = list(_events)
+    wall = int((time.perf_counter() - _t0) * 1e6)
+    try:
+        write(path, events)
+    except OSError as e:
+        print(f"[!] Gagal menulis trace {path}: {e}")
+        path = None
+    print("\n=== Trace: durasi per langkah ===")
+    print(summary(events, wall))
+    if path:
+        print(f"[i] Trace JSON: {path}  (chrome://tracing / ui.perfetto.dev)")
+    return path
+
+
+if os.environ.get("NEXUS_TRACE", "") not in ("", "0"):
+    enable()
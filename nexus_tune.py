@@ -0,0 +1,364 @@
+# nexus_tune.py
+"""
+Auto-tune jumlah thread + penempatan CPU untuk `nexus-network start`.
+- Trial singkat berurutan: tiap kombinasi (set core × jumlah thread) menjalankan node
+  selama N detik; throughput = proof/menit dari output node (pola nexus_metrics)
+- Set core diturunkan dari cluster frekuensi (big.LITTLE): semua core, cluster besar,
+  semua kecuali cluster paling lambat. Thread hanya dicoba bila CLI punya flag
+  --max-threads (atau sejenis) di `start --help`
+- Konfigurasi terbaik disimpan per sidik jari perangkat (model CPU, jumlah core, arch)
+  di <state_dir>/tune.json dan dipakai otomatis saat start (bot.py, start_node_smart,
+  watchdog): flag thread ditambahkan ke argv, affinity + nice di-set sebelum exec
+NEXUS_TUNE=0 mematikan penerapan otomatis.
+Pakai:  python bot.py --node-id <ID> --tune [--tune-seconds 240]
+        python nexus_tune.py run --node-id <ID> [--seconds N] [--trials N] [--nice N]
+        python nexus_tune.py show | reset
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import select
+import signal
+import subprocess
+import sys
+import time
+
+from provision_cache import read_text, state_dir, write_json
+
+SECONDS = float(os.environ.get("NEXUS_TUNE_SECONDS", "240"))
+MAX_TRIALS = int(os.environ.get("NEXUS_TUNE_MAX_TRIALS", "6"))
+NICE = int(os.environ.get("NEXUS_TUNE_NICE", "0"))
+THREAD_FLAGS = ["--max-threads", "--threads", "--num-threads", "--worker-threads"]
+KILL_GRACE = 10.0
+
+
+def tune_path():
+    return os.path.join(state_dir(), "tune.json")
+
+
+# =======================
+# Sidik jari perangkat
+# =======================
+def cpu_model():
+    """Model CPU dari /proc/cpuinfo (x86: model name, ARM: Hardware / CPU part)."""
+    fields, parts = {}, []
+    for line in read_text("/proc/cpuinfo").splitlines():
+        key, _, value = line.partition(":")
+        key, value = key.strip(), value.strip()
+        if key == "CPU part":
+            parts.append(value)
+        elif key and value:
+            fields.setdefault(key, value)
+    for key in ("model name", "Hardware", "Processor", "cpu model"):
+        if fields.get(key):
+            return fields[key]
+    return "arm " + ",".join(sorted(set(parts))) if parts else platform.processor() or "unknown"
+
+
+def core_clusters():
+    """Core online dikelompokkan per frekuensi maks, cluster tercepat dulu: [[4,5,6,7],[0,1,2,3]]."""
+    try:
+        cpus = sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = list(range(os.cpu_count() or 1))
+    by_freq = {}
+    for cpu in cpus:
+        freq = read_text(f"/sys/devices/system/cpu/cpu{cpu}/cpufreq/cpuinfo_max_freq")
+        by_freq.setdefault(int(freq) if freq.isdigit() else 0, []).append(cpu)
+    return [by_freq[f] for f in sorted(by_freq, reverse=True)]
+
+
+def fingerprint():
+    clusters = core_clusters()
+    return {
+        "model": cpu_model(),
+        "cores": sum(len(c) for c in clusters),
+        "arch": platform.machine(),
+        "clusters": clusters,
+    }
+
+
+def device_key(fp):
+    raw = json.dumps([fp["model"], fp["cores"], fp["arch"]])
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+# =======================
+# Kandidat & penerapan
+# =======================
+def thread_flag(help_text):
+    for flag in THREAD_FLAGS:
+        if flag in (help_text or ""):
+            return flag
+    return None
+
+
+def cpu_list(cpus):
+    """[0,1,2,5] → "0-2,5" (format taskset / cgroup)."""
+    out, cpus = [], sorted(cpus)
+    start = prev = None
+    for c in cpus + [None]:
+        if start is not None and c == prev + 1:
+            prev = c
+            continue
+        if start is not None:
+            out.append(str(start) if start == prev else f"{start}-{prev}")
+        start = prev = c
+    return ",".join(out)
+
+
+def candidates(fp, flag=None, nice=NICE):
+    """Set core (semua / cluster besar / tanpa cluster terlambat) × thread (n, n/2)."""
+    clusters = fp["clusters"]
+    sets = [sorted(c for cl in clusters for c in cl)]
+    if len(clusters) > 1:
+        sets.append(sorted(clusters[0]))
+    if len(clusters) > 2:
+        sets.append(sorted(c for cl in clusters[:-1] for c in cl))
+    out = []
+    for cpus in sets:
+        threads = sorted({len(cpus), max(1, len(cpus) // 2)}, reverse=True) if flag else [None]
+        for n in threads:
+            cfg = {"cpus": cpus, "threads": n, "thread_flag": flag if n else None, "nice": nice}
+            if cfg not in out:
+                out.append(cfg)
+    return out
+
+
+def describe(cfg):
+    threads = cfg.get("threads") or "default"
+    return f"threads={threads} cpu={cpu_list(cfg.get('cpus') or []) or 'semua'} nice={cfg.get('nice', 0)}"
+
+
+def apply_argv(cmd, cfg, options=None):
+    """
+    Tambahkan flag thread hasil tune ke argv (list) atau perintah (string).
+    options = daftar flag dari `start --help` (dialect); flag yang tidak dikenal dilewati.
+    """
+    flag, n = (cfg or {}).get("thread_flag"), (cfg or {}).get("threads")
+    if not flag or not n or (options and flag not in options):
+        return cmd
+    if isinstance(cmd, str):
+        return cmd if flag in cmd else f"{cmd} {flag} {n}"
+    return cmd if flag in cmd else list(cmd) + [flag, str(n)]
+
+
+def place(cfg):
+    """Affinity + nice untuk proses ini (diwarisi node yang di-exec sesudahnya). Best-effort."""
+    if not cfg:
+        return
+    if cfg.get("cpus") and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cfg["cpus"])
+        except OSError:
+            pass  # core offline (hotplug Android) / tidak diizinkan → pakai default kernel
+    if cfg.get("nice"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, cfg["nice"])
+        except OSError:
+            pass
+
+
+def load():
+    try:
+        with open(tune_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"devices": {}}
+
+
+def save(data):
+    write_json(tune_path(), data)
+
+
+def load_best():
+    """Konfigurasi terbaik untuk perangkat ini, atau None (belum di-tune / NEXUS_TUNE=0)."""
+    if os.environ.get("NEXUS_TUNE", "1") == "0":
+        return None
+    rec = load()["devices"].get(device_key(fingerprint()))
+    return rec["best"] if rec else None
+
+
+def apply_on_start(cmd, options=None):
+    """Dipakai sebelum start node: return argv + flag thread, affinity/nice di-set ke proses ini."""
+    cfg = load_best()
+    if not cfg:
+        return cmd
+    print(f"[i] Konfigurasi tune: {describe(cfg)}")
+    place(cfg)
+    return apply_argv(cmd, cfg, options)
+
+
+# =======================
+# Trial
+# =======================
+def _stop(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    except ProcessLookupError:
+        proc.wait()
+
+
+def run_trial(argv, cfg, seconds=SECONDS):
+    """Jalankan node `seconds` detik dengan cfg; hitung proof/task dari output."""
+    # Hanya trial yang butuh parser log & sensor → start biasa / nexus_backends tetap ringan
+    from nexus_governor import max_temp
+    from nexus_metrics import classify, proof_seconds
+
+    counts = {"proof": 0, "task": 0, "error": 0, "reconnect": 0}
+    durations, tail = [], []
+    task_started = None
+    start = time.time()
+    proc = subprocess.Popen(
+        argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        start_new_session=True, preexec_fn=lambda: place(cfg),
+    )
+    fd, partial, exited = proc.stdout.fileno(), b"", False
+    try:
+        while time.time() - start < seconds:
+            ready, _, _ = select.select([fd], [], [], 1.0)
+            if not ready:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                exited = True
+                break
+            lines = (partial + chunk).replace(b"\r", b"\n").split(b"\n")
+            partial = lines.pop()[-4096:]
+            for raw in lines:
+                line = raw.decode("utf-8", "replace")
+                if line.strip():
+                    tail = (tail + [line])[-20:]
+                event = classify(line)
+                if event:
+                    counts[event] += 1
+                if event == "task":
+                    task_started = time.time()
+                elif event == "proof":
+                    seconds_taken = proof_seconds(line)
+                    if seconds_taken is None and task_started is not None:
+                        seconds_taken = time.time() - task_started
+                    if seconds_taken is not None:
+                        durations.append(seconds_taken)
+                    task_started = None
+    finally:
+        if proc.poll() is None:
+            _stop(proc)
+        proc.stdout.close()
+    elapsed = time.time() - start
+    return {
+        "config": cfg,
+        "seconds": round(elapsed, 1),
+        "proofs": counts["proof"],
+        "tasks": counts["task"],
+        "errors": counts["error"],
+        "proofs_per_min": round(counts["proof"] * 60.0 / max(elapsed, 1e-6), 3),
+        "proof_seconds": round(sum(durations) / len(durations), 2) if durations else None,
+        "temp_c": max_temp(),
+        "exit_code": proc.returncode if exited else None,
+        "tail": tail,
+    }
+
+
+def _score(r):
+    # proof/menit terbanyak; seri → proof lebih cepat, lalu core & thread lebih sedikit
+    dur = r["proof_seconds"] if r["proof_seconds"] is not None else float("inf")
+    cfg = r["config"]
+    return (-r["proofs_per_min"], -r["tasks"], dur, len(cfg["cpus"]), cfg["threads"] or 0)
+
+
+def tune(base_argv, wrap=None, help_argv=None, seconds=SECONDS, max_trials=MAX_TRIALS, nice=NICE):
+    """
+    base_argv = [nn, "start", "--node-id", ID] (sebelum dibungkus proot).
+    wrap(argv) → argv yang benar-benar di-exec (mis. direct_argv proot). Return cfg terbaik / None.
+    """
+    wrap = wrap or (lambda a: a)
+    help_argv = help_argv or list(base_argv[:2]) + ["--help"]
+    proc = subprocess.run(wrap(help_argv), stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    flag = thread_flag(proc.stdout + proc.stderr)
+    fp = fingerprint()
+    plan = candidates(fp, flag, nice)[:max(1, max_trials)]
+    print(f"[i] Perangkat: {fp['model']} · {fp['cores']} core · cluster {[cpu_list(c) for c in fp['clusters']]}")
+    print(f"[i] Flag thread: {flag or '(tidak ada — hanya set core yang dicoba)'}")
+    print(f"[i] {len(plan)} trial × {seconds:.0f}s ≈ {len(plan) * seconds / 60:.0f} menit. "
+          "Pastikan tidak ada node lain yang berjalan.")
+
+    results = []
+    for i, cfg in enumerate(plan, 1):
+        print(f"\n[→] Trial {i}/{len(plan)}: {describe(cfg)}")
+        r = run_trial(wrap(apply_argv(base_argv, cfg)), cfg, seconds)
+        results.append(r)
+        temp = f" · {r['temp_c']:.0f}°C" if r["temp_c"] is not None else ""
+        print(f"    {r['proofs']} proof, {r['tasks']} task, {r['errors']} error "
+              f"→ {r['proofs_per_min']:.2f} proof/menit{temp}")
+        if r["exit_code"] is not None and not r["proofs"] and not r["tasks"]:
+            # Node keluar sebelum bekerja (login, node-id salah, flag ditolak) → trial lain percuma
+            print(f"[x] Node keluar (exit={r['exit_code']}) tanpa task. Output terakhir:")
+            print("\n".join(r["tail"]))
+            return None
+
+    if not any(r["proofs"] or r["tasks"] for r in results):
+        print("[x] Tidak ada task/proof selama trial; tidak ada yang disimpan. Perbesar --seconds.")
+        return None
+    best = min(results, key=_score)["config"]
+    data = load()
+    data["devices"][device_key(fp)] = {
+        "fingerprint": fp,
+        "best": best,
+        "tuned_at": time.time(),
+        "trials": [{k: v for k, v in r.items() if k != "tail"} for r in results],
+    }
+    save(data)
+    print(f"\n[✓] Terbaik: {describe(best)} → disimpan ({tune_path()})")
+    return best
+
+
+def show():
+    data = load()
+    key = device_key(fingerprint())
+    if not data["devices"]:
+        print("[i] Belum ada hasil tune.")
+    for k, rec in data["devices"].items():
+        fp = rec["fingerprint"]
+        mark = "*" if k == key else " "
+        at = time.strftime("%Y-%m-%d %H:%M", time.localtime(rec["tuned_at"]))
+        print(f"{mark} {k}  {fp['model']} · {fp['cores']} core · {at}")
+        print(f"    terbaik: {describe(rec['best'])}")
+        for r in rec["trials"]:
+            print(f"    {describe(r['config']):<40} {r['proofs_per_min']:>7.2f} proof/menit")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Auto-tune thread + CPU untuk nexus-network")
+    ap.add_argument("op", choices=["run", "show", "reset"])
+    ap.add_argument("--node-id")
+    ap.add_argument("--bin", default=os.path.join(os.path.expanduser("~"), ".nexus", "bin", "nexus-network"))
+    ap.add_argument("--seconds", type=float, default=SECONDS, help="durasi tiap trial")
+    ap.add_argument("--trials", type=int, default=MAX_TRIALS, help="jumlah trial maksimum")
+    ap.add_argument("--nice", type=int, default=NICE, help="nilai nice untuk node (disimpan bersama hasil)")
+    args = ap.parse_args(argv)
+
+    if args.op == "show":
+        show()
+    elif args.op == "reset":
+        data = load()
+        data["devices"].pop(device_key(fingerprint()), None)
+        save(data)
+        print("[✓] Hasil tune perangkat ini dihapus.")
+    else:
+        if not args.node_id:
+            ap.error("run butuh --node-id")
+        best = tune([args.bin, "start", "--node-id", args.node_id],
+                    seconds=args.seconds, max_trials=args.trials, nice=args.nice)
+        return 0 if best else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+# nexus_watchdog.py
+"""
+Watchdog untuk node Nexus yang berjalan di background.
+- Restart otomatis saat node keluar: exponential backoff + jitter
+- Deteksi node macet: tidak ada output log selama NEXUS_WATCHDOG_STALL detik → kill & restart
+- Catat jumlah restart + alasannya di <run_dir>/watchdog.json
+- Output node ditulis ke node.log yang dirotasi + dikompresi (nexus_logs.RotatingLog)
+- --governor: governor suhu/baterai (nexus_governor) ikut berjalan; node di-restart
+  dengan thread lebih sedikit bila governor memintanya
+- --backend native|proot|podman|chroot: cara node dijalankan (nexus_backends); default
+  proot bila --proot diberikan, selain itu native
+- Sampler /proc (nexus_sampler) mencatat CPU/RSS/thread/I/O node ke <run_dir>/samples.ring
+  (NEXUS_SAMPLE_INTERVAL=0 untuk mematikan)
+Pakai:  python nexus_watchdog.py --node-id <ID> [--proot ubuntu] [--backend NAMA] [--detach] [--no-restart] [--governor]
+        python nexus_watchdog.py --stop [--proot ubuntu]
+"""
+import argparse
+import json
+import os
+import random
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import nexus_backends
+import nexus_sampler
+# nexus_tune / nexus_governor hanya untuk start → diimpor di main, --status / --stop tetap ringan
+from nexus_logs import RotatingLog
+from proot_broker import proot_home
+from provision_cache import pid_alive, read_pid, write_json
+
+BACKOFF_BASE = float(os.environ.get("NEXUS_WATCHDOG_BACKOFF", "5"))
+BACKOFF_MAX = float(os.environ.get("NEXUS_WATCHDOG_BACKOFF_MAX", "300"))
+STALL_TIMEOUT = float(os.environ.get("NEXUS_WATCHDOG_STALL", "900"))
+HEALTHY_AFTER = float(os.environ.get("NEXUS_WATCHDOG_HEALTHY", "300"))
+KILL_GRACE = 10.0
+HISTORY_MAX = 50
+
+
+def run_dir(distro=None):
+    """Direktori PID/LOG di host. Untuk proot = $HOME/.nexus-run milik Ubuntu."""
+    home = proot_home(distro) if distro else os.path.expanduser("~")
+    return os.path.join(home, ".nexus-run")
+
+
+def node_argv(node_id, distro=None, tuned=None, backend=None):
+    """tuned = hasil nexus_tune (flag thread ditambahkan ke perintah start)."""
+    # proot/chroot: $$ di bash = PID node setelah exec (tanpa PID namespace) → node.pid dari dalam
+    name = backend or ("proot" if distro else "native")
+    return nexus_backends.get(name, distro).node_argv(node_id, tuned)
+
+
+def backoff_delay(failures, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """base * 2^(n-1), dibatasi cap, jitter 50–100% (hindari restart serentak satu fleet)."""
+    delay = min(cap, base * (2 ** max(0, failures - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class Watchdog:
+    def __init__(self, argv, run_dir, stall_timeout=STALL_TIMEOUT, write_pid=True, restart=True, governor=None,
+                 tree=None):
+        # argv boleh callable → dibangun ulang tiap (re)start (thread dari governor)
+        # tree: PID anak → PID host node ini (Backend.node_pids); default anak + turunannya
+        self.argv = argv
+        self.run_dir = run_dir
+        self.stall_timeout = stall_timeout
+        self.restart = restart
+        self.write_pid = write_pid
+        self.log_path = os.path.join(run_dir, "node.log")
+        self.state_path = os.path.join(run_dir, "watchdog.json")
+        self.proc = None
+        self.stopping = False
+        self.restart_reason = None
+        self.governor = governor
+        self.logf = None
+        self.tree = tree or (lambda pid: nexus_sampler.process_tree(roots=[pid]))
+        self.sampler = nexus_sampler.Sampler(run_dir, pids=self.node_pids) if nexus_sampler.INTERVAL > 0 else None
+        self._log_lock = threading.Lock()
+        self.state = {"pid": os.getpid(), "argv": None if callable(argv) else argv, "restarts": 0, "history": []}
+        if governor:
+            # Hanya node watchdog ini: governor lain (backend / rootfs lain, fleet) punya node sendiri
+            governor.pids = self.node_pids
+            governor.on_threads = self.restart_with_threads
+            governor.log = lambda msg: self.logf and self.log(self.logf, msg)
+
+    # ---- state ----
+    def save_state(self, **kw):
+        self.state.update(kw, updated_at=time.time())
+        write_json(self.state_path, self.state)
+
+    def record(self, reason, code, uptime):
+        hist = self.state["history"]
+        hist.append({"at": time.time(), "reason": reason, "exit_code": code, "uptime": round(uptime, 1)})
+        del hist[:-HISTORY_MAX]
+
+    def log(self, logf, msg):
+        with self._log_lock:
+            logf.write(f"[watchdog {time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}\n".encode())
+            logf.flush()
+
+    def node_pids(self):
+        """PID node yang sedang dijalankan watchdog ini (kosong saat jeda backoff)."""
+        proc = self.proc
+        if proc is None or proc.returncode is not None:
+            return []
+        return self.tree(proc.pid)
+
+    def restart_with_threads(self, threads):
+        """Dipanggil thread governor; loop utama yang me-restart node."""
+        self.restart_reason = f"governor: threads {threads}"
+
+    # ---- child ----
+    def _kill(self, sig):
+        try:
+            os.killpg(self.proc.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _terminate(self):
+        self._kill(signal.SIGTERM)
+        try:
+            self.proc.wait(timeout=KILL_GRACE)
+        except subprocess.TimeoutExpired:
+            self._kill(signal.SIGKILL)
+            self.proc.wait()
+
+    def _run_once(self, logf, argv):
+        """Jalankan node sekali sampai keluar/macet. Return (reason, exit_code)."""
+        self.proc = subprocess.Popen(
+            argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, start_new_session=True,
+        )
+        if self.write_pid:
+            with open(os.path.join(self.run_dir, "node.pid"), "w", encoding="utf-8") as f:
+                f.write(str(self.proc.pid))
+        self.save_state(node_pid=self.proc.pid, started_at=time.time(), running=True)
+        fd = self.proc.stdout.fileno()
+        last_output = time.time()
+        reason = None
+        while True:
+            if self.stopping:
+                self._terminate()
+                reason = "stop"
+                break
+            if self.restart_reason:
+                reason, self.restart_reason = self.restart_reason, None
+                self.log(logf, reason + " → restart")
+                self._kill(signal.SIGCONT)  # node yang sedang di-pause governor tidak bisa keluar
+                self._terminate()
+                break
+            ready, _, _ = select.select([fd], [], [], 1.0)
+            if ready:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                with self._log_lock:
+                    logf.write(chunk)
+                    logf.flush()
+                last_output = time.time()
+            elif self.governor and self.governor.throttled():
+                last_output = time.time()  # sunyi karena di-pause governor, bukan macet
+            elif self.stall_timeout and time.time() - last_output > self.stall_timeout:
+                reason = f"stall: tidak ada output {int(self.stall_timeout)}s"
+                self.log(logf, reason + " → kill")
+                self._terminate()
+                break
+        code = self.proc.wait()
+        self.proc.stdout.close()
+        if reason is None:
+            reason = f"signal {-code}" if code < 0 else f"exit {code}"
+        return reason, code
+
+    def run(self):
+        os.makedirs(self.run_dir, exist_ok=True)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: setattr(self, "stopping", True))
+        with open(os.path.join(self.run_dir, "watchdog.pid"), "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        failures = 0
+        with RotatingLog(self.log_path) as logf:
+            self.logf = logf
+            if self.governor:
+                gov_thread = self.governor.start_thread()
+            if self.sampler:
+                self.sampler.start_thread()
+            while not self.stopping:
+                started = time.time()
+                argv = self.argv() if callable(self.argv) else self.argv
+                self.state["argv"] = argv
+                self.log(logf, f"start: {' '.join(argv)}")
+                try:
+                    reason, code = self._run_once(logf, argv)
+                except OSError as e:
+                    reason, code = f"spawn gagal: {e}", None
+                uptime = time.time() - started
+                if self.stopping:
+                    break
+                if reason.startswith("governor"):
+                    # Restart terencana (thread baru) → tanpa backoff, bukan kegagalan
+                    self.record(reason, code, uptime)
+                    continue
+                if not self.restart:
+                    self.record(reason, code, uptime)
+                    self.log(logf, f"node berhenti ({reason}, uptime {int(uptime)}s); tanpa restart")
+                    break
+                # Node yang sempat sehat cukup lama → backoff mulai dari awal lagi
+                failures = 1 if uptime >= HEALTHY_AFTER else failures + 1
+                delay = backoff_delay(failures)
+                self.state["restarts"] += 1
+                self.record(reason, code, uptime)
+                self.save_state(running=False, next_start_at=time.time() + delay)
+                self.log(logf, f"node berhenti ({reason}, uptime {int(uptime)}s); restart #{self.state['restarts']} dalam {delay:.1f}s")
+                deadline = time.time() + delay
+                while not self.stopping and time.time() < deadline:
+                    time.sleep(0.5)
+            if self.governor:
+                self.governor.stop()
+                gov_thread.join(timeout=5)
+            if self.sampler:
+                self.sampler.stop()
+            self.log(logf, "watchdog berhenti")
+            self.logf = None
+        self.save_state(running=False, stopped_at=time.time())
+        for name in ("watchdog.pid", "node.pid"):
+            try:
+                os.remove(os.path.join(self.run_dir, name))
+            except OSError:
+                pass
+        return 0
+
+
+# =======================
+# Kontrol dari luar
+# =======================
+def read_state(distro=None):
+    try:
+        with open(os.path.join(run_dir(distro), "watchdog.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def watchdog_pid(distro=None):
+    pid = read_pid(os.path.join(run_dir(distro), "watchdog.pid"))
+    return pid if pid and pid_alive(pid) else None
+
+
+def format_state(state, alive):
+    if not state:
+        return "[i] Watchdog belum pernah dijalankan."
+    lines = [f"WATCHDOG: {'RUNNING (PID %s)' % state.get('pid') if alive else 'NOT RUNNING'}"
+             f"  restarts={state.get('restarts', 0)}"]
+    for h in state.get("history", [])[-5:]:
+        at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(h["at"]))
+        lines.append(f"  {at}  {h['reason']}  (uptime {int(h['uptime'])}s)")
+    return "\n".join(lines)
+
+
+def stop_watchdog(distro=None, timeout=KILL_GRACE + 5):
+    pid = watchdog_pid(distro)
+    if not pid:
+        return False
+    os.kill(pid, signal.SIGTERM)
+    deadline = time.time() + timeout
+    while time.time() < deadline and pid_alive(pid):
+        time.sleep(0.2)
+    return True
+
+
+def spawn_detached(node_id, distro=None, restart=True, governor=False, backend=None):
+    """Jalankan watchdog sebagai proses background (lepas dari terminal)."""
+    argv = [sys.executable, os.path.abspath(__file__), "--node-id", node_id]
+    if distro:
+        argv += ["--proot", distro]
+    if backend:
+        argv += ["--backend", backend]
+    if not restart:
+        argv.append("--no-restart")
+    if governor:
+        argv.append("--governor")
+    p = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, start_new_session=True)
+    return p.pid
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Watchdog node Nexus (restart + deteksi macet)")
+    ap.add_argument("--node-id")
+    ap.add_argument("--proot", metavar="DISTRO", help="jalankan node di proot-distro (mis. ubuntu)")
+    ap.add_argument("--backend", choices=list(nexus_backends.BACKENDS),
+                    help="native / proot / podman / chroot (proot & chroot memakai rootfs --proot)")
+    ap.add_argument("--stall", type=float, default=STALL_TIMEOUT, help="detik tanpa output sebelum dianggap macet")
+    ap.add_argument("--detach", action="store_true", help="jalankan di background")
+    ap.add_argument("--no-restart", action="store_true", help="hanya rotasi log, tanpa restart / deteksi macet")
+    ap.add_argument("--governor", action="store_true", help="throttle node menurut suhu / baterai")
+    ap.add_argument("--status", action="store_true")
+    ap.add_argument("--stop", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.status:
+        print(format_state(read_state(args.proot), bool(watchdog_pid(args.proot))))
+        return 0
+    if args.stop:
+        print("[✓] Watchdog dihentikan." if stop_watchdog(args.proot) else "[i] Watchdog tidak berjalan.")
+        return 0
+    if not args.node_id:
+        ap.error("--node-id wajib untuk start")
+    if watchdog_pid(args.proot):
+        print(f"[x] Watchdog sudah berjalan (PID {watchdog_pid(args.proot)}).")
+        return 1
+    if args.detach:
+        pid = spawn_detached(args.node_id, args.proot, restart=not args.no_restart, governor=args.governor,
+                             backend=args.backend)
+        print(f"[✓] Watchdog berjalan di background (PID {pid}).")
+        return 0
+    import nexus_tune
+
+    rd = run_dir(args.proot)
+    # Affinity + nice hasil tune di-set di watchdog → diwarisi tiap (re)start node
+    tuned = nexus_tune.load_best()
+    nexus_tune.place(tuned)
+    governor = None
+    if args.governor:
+        import nexus_governor
+
+        # Thread hanya bisa diatur bila hasil tune tahu flag thread CLI
+        base = tuned.get("threads") if tuned and tuned.get("thread_flag") else None
+        governor = nexus_governor.Governor(threads=base)
+
+    def argv():
+        cfg = dict(tuned, threads=governor.threads) if governor and governor.threads else tuned
+        return node_argv(args.node_id, args.proot, cfg, args.backend)
+
+    # Di proot/chroot, node.pid ditulis dari dalam (PID node asli, bukan proot-distro)
+    backend = nexus_backends.get(args.backend or ("proot" if args.proot else "native"), args.proot)
+    return Watchdog(
+        argv, rd,
+        stall_timeout=0 if args.no_restart else args.stall,
+        write_pid=backend.write_pid, restart=not args.no_restart, governor=governor, tree=backend.node_pids,
+    ).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# pkg_resolver.py
+"""
+Resolver paket batch untuk `pkg` (Termux) dan `apt-get` (di dalam proot).
+- Status semua paket diambil dengan SATU `dpkg-query`
+- Hanya paket yang belum terpasang yang di-install, dalam satu transaksi
+- `pkg update` / `apt-get update` dilewati bila index lebih baru dari
+  NEXUS_PKG_INDEX_MAX_AGE detik (default 6 jam)
+"""
+import os
+import subprocess
+import time
+
+INDEX_MAX_AGE = float(os.environ.get("NEXUS_PKG_INDEX_MAX_AGE", str(6 * 3600)))
+DPKG_FORMAT = "${Package} ${db:Status-Abbrev}\\n"
+
+
+def parse_dpkg_query(text):
+    """Output dpkg-query -W -f='${Package} ${db:Status-Abbrev}\\n' → set paket terpasang."""
+    installed = set()
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[1].startswith("ii"):
+            installed.add(parts[0].split(":")[0])
+    return installed
+
+
+def installed_packages(pkgs):
+    """Satu dpkg-query untuk semua paket (host / Termux)."""
+    if not pkgs:
+        return set()
+    try:
+        p = subprocess.run(["dpkg-query", "-W", "-f=" + DPKG_FORMAT, *pkgs],
+                           text=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return set()
+    return parse_dpkg_query(p.stdout)
+
+
+def missing_packages(pkgs):
+    have = installed_packages(pkgs)
+    return [p for p in pkgs if p not in have]
+
+
+def termux_lists_dir():
+    return os.path.join(os.environ.get("PREFIX", "/data/data/com.termux/files/usr"), "var", "lib", "apt", "lists")
+
+
+def index_age(lists_dir=None):
+    """Umur (detik) file index terbaru; inf jika belum pernah update."""
+    lists_dir = lists_dir or termux_lists_dir()
+    newest = 0.0
+    try:
+        with os.scandir(lists_dir) as it:
+            for e in it:
+                if e.is_file():
+                    newest = max(newest, e.stat().st_mtime)
+    except OSError:
+        pass
+    return time.time() - newest if newest else float("inf")
+
+
+def termux_plan(pkgs, max_age=INDEX_MAX_AGE, upgrade=False):
+    """
+    Daftar perintah `pkg` yang benar-benar perlu dijalankan (bisa kosong).
+    upgrade=True: saat index basi, sekalian `pkg upgrade`.
+    """
+    missing = missing_packages(list(pkgs))
+    stale = index_age() > max_age
+    plan = []
+    if stale and (missing or upgrade):
+        plan.append("pkg update -y")
+        if upgrade:
+            plan.append("pkg upgrade -y")
+    if missing:
+        plan.append("pkg install -y " + " ".join(missing))
+    return plan
+
+
+def apt_ensure_script(pkgs, max_age=INDEX_MAX_AGE):
+    """
+    Script bash (untuk dijalankan di dalam proot dalam satu panggilan) yang
+    memeriksa semua paket dengan satu dpkg-query lalu install yang kurang saja.
+    """
+    want = " ".join(pkgs)
+    return f"""
+export DEBIAN_FRONTEND=noninteractive
+__want="{want}"
+__have=" $(dpkg-query -W -f='{DPKG_FORMAT}' $__want 2>/dev/null | awk '$2 ~ /^ii/ {{sub(/:.*/, "", $1); printf "%s ", $1}}')"
+__missing=""
+for __p in $__want; do
+  case "$__have" in *" $__p "*) ;; *) __missing="$__missing $__p" ;; esac
+done
+if [ -n "$__missing" ]; then
+  __fresh=$(find /var/lib/apt/lists -maxdepth 1 -type f -newermt "@$(( $(date +%s) - {int(max_age)} ))" 2>/dev/null | head -n 1)
+  if [ -z "$__fresh" ]; then
+    apt-get update -yq
+  fi
+  apt-get install -yq $__missing
+else
+  echo "[=] Paket sudah terpasang: $__want"
+fi
+""".strip()
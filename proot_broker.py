@@ -0,0 +1,359 @@
+# proot_broker.py
+"""
+Broker shell untuk proot-distro — satu `proot-distro login` berumur panjang.
+- Host mengirim perintah sebagai frame (satu baris base64) lewat pipe stdin
+- Di dalam Ubuntu, bash loop menjalankan perintah dan membalas
+  "<token> <exit> <len_stdout> <len_stderr>\\n" + stdout + stderr
+- Daemon (python proot_broker.py serve) memegang shell itu dan melayani
+  banyak proses lewat unix socket, jadi tiap perintah = satu round trip IPC
+- Hanya untuk perintah pendek (status, inspect, podman update): output baru dikirim setelah
+  perintah selesai dan klien lain menunggu. Tiap perintah dibatasi NEXUS_PROOT_BROKER_TIMEOUT
+  detik (default 120, 0 = tanpa batas). Langkah panjang (apt, installer, podman save/load)
+  → `proot-distro login` sendiri lewat direct_argv + stream_exec.run_streaming (output live)
+- Fallback ke `proot-distro login` langsung hanya bila perintah belum terkirim (daemon tidak bisa
+  dihubungi / di-spawn). Setelah terkirim perintah mungkin sudah jalan → tidak diulang: timeout = 124,
+  gagal lain = 255 + pesan di stderr. Timeout membunuh seluruh process group (termasuk proses di proot)
+Matikan dengan NEXUS_PROOT_BROKER=0 (langsung `proot-distro login` per perintah).
+Shell di proot bukan login shell (profil tidak di-source); NEXUS_PROOT_LOGIN=1 untuk bash -l.
+"""
+import base64
+import json
+import os
+import shlex
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+DEFAULT_DISTRO = "ubuntu"
+IDLE_TIMEOUT = float(os.environ.get("NEXUS_PROOT_BROKER_IDLE", "600"))
+CONNECT_WAIT = 5.0
+TIMEOUT = float(os.environ.get("NEXUS_PROOT_BROKER_TIMEOUT", "120"))
+LOGIN_SHELL = os.environ.get("NEXUS_PROOT_LOGIN") == "1"
+
+# Loop di dalam proot (PATH ke ~/.nexus/bin di-set sendiri, tidak perlu profil login).
+_LOOP = r'''
+export PATH="$HOME/.nexus/bin:$PATH"
+__nx_dir=$(mktemp -d)
+trap 'rm -rf "$__nx_dir"' EXIT
+while IFS= read -r __nx_line; do
+  __nx_tok=${__nx_line%% *}
+  __nx_cmd=$(printf '%s' "${__nx_line#* }" | base64 -d)
+  ( eval "$__nx_cmd" ) >"$__nx_dir/out" 2>"$__nx_dir/err" </dev/null
+  __nx_rc=$?
+  printf '%s %d %d %d\n' "$__nx_tok" "$__nx_rc" "$(wc -c <"$__nx_dir/out")" "$(wc -c <"$__nx_dir/err")"
+  cat "$__nx_dir/out" "$__nx_dir/err"
+done
+'''
+
+
+class BrokerError(Exception):
+    pass
+
+
+class BrokerUnavailable(BrokerError):
+    """Perintah belum terkirim ke daemon → aman diulang lewat direct_exec."""
+
+
+def rootfs_path(distro=DEFAULT_DISTRO):
+    """Lokasi rootfs distro di host (bisa dicek tanpa spawn proot)."""
+    prefix = os.environ.get("PREFIX", "/data/data/com.termux/files/usr")
+    return os.path.join(prefix, "var", "lib", "proot-distro", "installed-rootfs", distro)
+
+
+def proot_home(distro=DEFAULT_DISTRO):
+    """$HOME user root di dalam proot, dilihat dari host."""
+    return os.path.join(rootfs_path(distro), "root")
+
+
+def socket_path(distro=DEFAULT_DISTRO):
+    return os.path.join(tempfile.gettempdir(), f"nexus-proot-{distro}-{os.getuid()}.sock")
+
+
+def direct_argv(distro, cmd, login=None):
+    """argv `proot-distro login`. cmd list = exec langsung (tanpa bash), string = script bash."""
+    if not isinstance(cmd, str):
+        return ["proot-distro", "login", distro, "--", *cmd]
+    login = LOGIN_SHELL if login is None else login
+    return ["proot-distro", "login", distro, "--", "bash", "-lc" if login else "-c", cmd]
+
+
+def _killpg(proc):
+    """Bunuh proot-distro beserta semua proses di dalamnya (satu session/process group)."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        proc.kill()
+
+
+def direct_exec(cmd, distro=DEFAULT_DISTRO, timeout=None):
+    """Cara lama: satu `proot-distro login` penuh per perintah."""
+    p = subprocess.Popen(direct_argv(distro, cmd), text=True, start_new_session=True,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        out, err = p.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _killpg(p)
+        out, err = p.communicate()
+        return 124, out or "", err or ""
+    return p.returncode, out or "", err or ""
+
+
+# =======================
+# Shell di dalam proot
+# =======================
+class ProotShell:
+    """Bash login di dalam proot; perintah diserialisasi lewat lock."""
+
+    def __init__(self, distro=DEFAULT_DISTRO, argv=None):
+        self.argv = argv or direct_argv(distro, _LOOP)
+        self.proc = None
+        self.lock = threading.Lock()
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+
+    def close(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            _killpg(self.proc)
+        self.proc = None
+
+    def _read_exact(self, n):
+        data = b""
+        while len(data) < n:
+            chunk = self.proc.stdout.read(n - len(data))
+            if not chunk:
+                raise BrokerError("broker shell tertutup")
+            data += chunk
+        return data
+
+    def _request(self, cmd):
+        tok = uuid.uuid4().hex
+        frame = tok + " " + base64.b64encode(cmd.encode()).decode() + "\n"
+        self.proc.stdin.write(frame.encode())
+        self.proc.stdin.flush()
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise BrokerError("broker shell tertutup")
+            parts = line.decode("utf-8", "replace").split()
+            # Abaikan noise (motd / profil login) sebelum header frame
+            if len(parts) == 4 and parts[0] == tok:
+                break
+        code, n_out, n_err = (int(x) for x in parts[1:])
+        out = self._read_exact(n_out).decode("utf-8", "replace")
+        err = self._read_exact(n_err).decode("utf-8", "replace")
+        return code, out, err
+
+    def execute(self, cmd, timeout=None):
+        with self.lock:
+            if not self.alive():
+                self.start()
+            timer = None
+            if timeout:
+                timer = threading.Timer(timeout, _killpg, args=(self.proc,))
+                timer.start()
+            try:
+                return self._request(cmd)
+            except (BrokerError, OSError):
+                self.close()
+                if timer and not timer.is_alive():
+                    return 124, "", f"timeout setelah {timeout}s"
+                raise BrokerError("broker shell gagal")
+            finally:
+                if timer:
+                    timer.cancel()
+
+
+# =======================
+# Framing unix socket
+# =======================
+def _send_msg(sock, obj):
+    data = json.dumps(obj).encode()
+    sock.sendall(struct.pack(">I", len(data)) + data)
+
+
+def _recv_msg(sock):
+    head = b""
+    while len(head) < 4:
+        chunk = sock.recv(4 - len(head))
+        if not chunk:
+            raise BrokerError("koneksi broker terputus")
+        head += chunk
+    (n,) = struct.unpack(">I", head)
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(min(65536, n - len(data)))
+        if not chunk:
+            raise BrokerError("koneksi broker terputus")
+        data += chunk
+    return json.loads(data)
+
+
+def serve(distro=DEFAULT_DISTRO, path=None, idle_timeout=IDLE_TIMEOUT):
+    """Daemon: satu ProotShell, banyak klien lewat unix socket. Keluar setelah idle."""
+    path = path or socket_path(distro)
+    shell = ProotShell(distro)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        srv.bind(path)
+    finally:
+        os.umask(old_umask)
+    srv.listen(16)
+    srv.settimeout(1.0)
+    last_used = [time.time()]
+    shutdown = threading.Event()
+
+    def handle(conn):
+        with conn:
+            try:
+                req = _recv_msg(conn)
+                if req.get("op") == "ping":
+                    _send_msg(conn, {"ok": True, "shell": shell.alive()})
+                    return
+                if req.get("op") == "shutdown":
+                    shutdown.set()
+                    _send_msg(conn, {"ok": True})
+                    return
+                code, out, err = shell.execute(req["cmd"], req.get("timeout"))
+                _send_msg(conn, {"code": code, "stdout": out, "stderr": err})
+            except (BrokerError, OSError, ValueError, KeyError) as e:
+                try:
+                    _send_msg(conn, {"error": str(e)})
+                except OSError:
+                    pass
+            finally:
+                last_used[0] = time.time()
+
+    try:
+        while not shutdown.is_set() and time.time() - last_used[0] < idle_timeout:
+            try:
+                conn, _ = srv.accept()
+            except socket.timeout:
+                continue
+            last_used[0] = time.time()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+    finally:
+        srv.close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        shell.close()
+
+
+def _spawn_daemon(distro):
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve", distro],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def broker_exec(cmd, distro=DEFAULT_DISTRO, timeout=None):
+    """Kirim satu perintah ke daemon broker (start daemon bila belum ada).
+
+    BrokerUnavailable: perintah belum terkirim. BrokerError: terkirim lalu gagal (mungkin sudah jalan).
+    """
+    path = socket_path(distro)
+    try:
+        sock = _connect(path)
+    except OSError:
+        _spawn_daemon(distro)
+        deadline = time.time() + CONNECT_WAIT
+        while True:
+            time.sleep(0.05)
+            try:
+                sock = _connect(path)
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise BrokerUnavailable("daemon broker tidak merespons")
+    with sock:
+        try:
+            # sendall gagal → daemon tidak pernah menerima frame utuh, perintah tidak jalan
+            _send_msg(sock, {"cmd": cmd, "timeout": timeout})
+        except OSError as e:
+            raise BrokerUnavailable(f"kirim ke broker gagal: {e}")
+        # Cadangan bila daemon sendiri macet; timer di daemon biasanya membalas 124 lebih dulu
+        sock.settimeout(timeout + CONNECT_WAIT if timeout else None)
+        try:
+            resp = _recv_msg(sock)
+        except socket.timeout:
+            return 124, "", f"timeout setelah {timeout}s"
+        except (OSError, ValueError) as e:
+            raise BrokerError(f"koneksi broker terputus: {e}")
+    if "error" in resp:
+        raise BrokerError(resp["error"])
+    return resp["code"], resp["stdout"], resp["stderr"]
+
+
+def proot_exec(cmd, distro=DEFAULT_DISTRO, timeout=None):
+    """Jalankan `cmd` (script bash atau argv) di dalam proot. Return (code, stdout, stderr).
+    timeout None = NEXUS_PROOT_BROKER_TIMEOUT; lewat batas → exit 124.
+    Broker gagal setelah perintah terkirim → exit 255 (tidak diulang: kill/podman stop bukan idempoten)."""
+    timeout = (TIMEOUT if timeout is None else timeout) or None
+    if not isinstance(cmd, str):
+        cmd = shlex.join(cmd)
+    if os.environ.get("NEXUS_PROOT_BROKER", "1") != "0":
+        try:
+            return broker_exec(cmd, distro, timeout)
+        except BrokerUnavailable:
+            pass
+        except BrokerError as e:
+            return 255, "", f"[x] broker proot: {e}"
+    return direct_exec(cmd, distro, timeout)
+
+
+def stop_broker(distro=DEFAULT_DISTRO):
+    """Minta daemon broker berhenti (shell proot ikut ditutup)."""
+    try:
+        with _connect(socket_path(distro)) as sock:
+            _send_msg(sock, {"op": "shutdown"})
+            _recv_msg(sock)
+        return True
+    except (OSError, BrokerError):
+        return False
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "serve":
+        serve(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DISTRO)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "stop":
+        stop_broker(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DISTRO)
+    else:
+        code, out, err = proot_exec(" ".join(sys.argv[1:]) or "uname -a")
+        sys.stdout.write(out)
+        sys.stderr.write(err)
+        sys.exit(code)
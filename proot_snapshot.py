@@ -0,0 +1,271 @@
+# proot_snapshot.py
+"""
+Snapshot "golden" rootfs Ubuntu proot → provisioning HP berikutnya = satu extract lokal.
+- create : tar rootfs (zstd jika ada, selain itu gzip) atau `proot-distro backup`,
+           plus manifest: paket dpkg + versi, Nexus CLI / podman / installer Tashi,
+           stamp provisioning (provision.json), sha256 arsip
+- restore: extract ke installed-rootfs/<distro>, verifikasi sha256, impor stamp
+           sehingga langkah proot-rootfs / proot-apt / nexus-cli langsung dilewati
+- Snapshot disimpan di <state_dir>/snapshots/<nama>.tar.{zst,gz} + <nama>.json
+NEXUS_SNAPSHOT=<file|nama>: provisioning memakai snapshot ini saat rootfs belum ada.
+Pakai:  python proot_snapshot.py create [--name N] [--method tar|proot-distro]
+        python proot_snapshot.py restore <file|nama> [--force]
+        python proot_snapshot.py list
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+from proot_broker import DEFAULT_DISTRO, rootfs_path, stop_broker
+from provision_cache import ProvisionState, file_fingerprint, state_dir, write_json
+
+# Stamp yang isinya ikut di dalam rootfs (stamp Termux host seperti termux-pkgs tidak)
+ROOTFS_STEPS = ("proot-rootfs", "proot-apt", "nexus-cli")
+# Relatif terhadap rootfs; data runtime / cache besar tidak ikut
+EXCLUDES = [
+    "./tmp/*", "./var/tmp/*", "./var/cache/apt/archives/*.deb", "./var/lib/apt/lists/*",
+    "./root/.nexus-run", "./root/.cache/tashi/image-*.tar", "./proc/*", "./sys/*", "./dev/*",
+]
+MANIFEST_IN_ROOTFS = "root/.nexus-snapshot.json"
+
+
+def snapshot_dir():
+    path = os.path.join(state_dir(), "snapshots")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def dpkg_packages(rootfs):
+    """Paket terpasang {nama: versi} dibaca langsung dari var/lib/dpkg/status (tanpa spawn proot)."""
+    pkgs = {}
+    try:
+        with open(os.path.join(rootfs, "var", "lib", "dpkg", "status"), encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return pkgs
+    for para in text.split("\n\n"):
+        fields = {}
+        for line in para.splitlines():
+            if line and not line[0].isspace() and ":" in line:
+                key, _, value = line.partition(":")
+                fields[key] = value.strip()
+        if fields.get("Package") and fields.get("Status", "").endswith(" installed"):
+            pkgs[fields["Package"]] = fields.get("Version", "")
+    return pkgs
+
+
+def build_manifest(name, distro, method):
+    rootfs = rootfs_path(distro)
+    home = os.path.join(rootfs, "root")
+    steps = ProvisionState().data["steps"]
+    return {
+        "name": name,
+        "distro": distro,
+        "method": method,
+        "created_at": time.time(),
+        "arch": platform.machine(),
+        "packages": dpkg_packages(rootfs),
+        "tools": {
+            "nexus-network": file_fingerprint(os.path.join(home, ".nexus", "bin", "nexus-network")),
+            "podman": file_fingerprint(os.path.join(rootfs, "usr", "bin", "podman")),
+            "tashi-installer": file_fingerprint(os.path.join(home, ".cache", "tashi", "install.sh")),
+        },
+        "stamps": {k: v for k, v in steps.items() if k in ROOTFS_STEPS},
+    }
+
+
+def _compressor():
+    if shutil.which("zstd"):
+        return ".tar.zst", ["-I", "zstd -T0 -3"]
+    return ".tar.gz", ["-z"]
+
+
+def create(name=None, distro=DEFAULT_DISTRO, method="tar"):
+    """Buat snapshot rootfs. Return path manifest (.json)."""
+    rootfs = rootfs_path(distro)
+    if not os.path.isdir(rootfs):
+        raise SystemExit(f"[x] Rootfs {distro} belum ada: {rootfs}")
+    name = name or f"{distro}-{time.strftime('%Y%m%d-%H%M%S')}"
+    out_dir = snapshot_dir()
+    # Shell broker masih memegang rootfs; hentikan supaya isi arsip konsisten
+    stop_broker(distro)
+    manifest = build_manifest(name, distro, method)
+    write_json(os.path.join(rootfs, MANIFEST_IN_ROOTFS), manifest, sort_keys=True)
+
+    if method == "proot-distro":
+        archive = os.path.join(out_dir, name + ".tar.xz")
+        argv = ["proot-distro", "backup", "--output", archive, distro]
+    else:
+        ext, zflags = _compressor()
+        archive = os.path.join(out_dir, name + ext)
+        argv = ["tar", "-C", rootfs, *zflags, "-cf", archive + ".tmp"]
+        argv += [f"--exclude={p}" for p in EXCLUDES] + ["."]
+    print(f"[i] Snapshot {distro} → {archive}")
+    t0 = time.time()
+    rc = subprocess.run(argv).returncode
+    # tar exit 1 = "file changed as we read it" (log dll.) → arsip tetap valid
+    if rc not in (0, 1) or not os.path.exists(archive + ("" if method == "proot-distro" else ".tmp")):
+        try:
+            os.remove(archive + ".tmp")  # arsip setengah jadi
+        except OSError:
+            pass
+        raise SystemExit(f"[x] Snapshot gagal (exit={rc}).")
+    if method != "proot-distro":
+        os.replace(archive + ".tmp", archive)
+    manifest.update(file=os.path.basename(archive), size=os.path.getsize(archive), sha256=_sha256(archive))
+    manifest_path = os.path.join(out_dir, name + ".json")
+    write_json(manifest_path, manifest, sort_keys=True)
+    print(f"[✓] Snapshot {name}: {manifest['size'] / 1e6:.0f} MB, {len(manifest['packages'])} paket, "
+          f"{time.time() - t0:.0f}s")
+    return manifest_path
+
+
+def resolve(spec):
+    """Nama snapshot / path arsip / path manifest → (manifest dict, path arsip)."""
+    candidates = [spec, os.path.join(snapshot_dir(), spec + ".json")]
+    if not spec.endswith(".json"):
+        for ext in (".tar.zst", ".tar.gz", ".tar.xz"):
+            if spec.endswith(ext):
+                candidates.insert(0, spec[: -len(ext)] + ".json")
+    for path in candidates:
+        if path.endswith(".json") and os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            return manifest, os.path.join(os.path.dirname(os.path.abspath(path)), manifest["file"])
+    if os.path.isfile(spec):
+        return None, spec  # arsip tanpa manifest samping; manifest dibaca dari rootfs setelah extract
+    raise SystemExit(f"[x] Snapshot tidak ditemukan: {spec}")
+
+
+def import_stamps(manifest):
+    """Salin stamp provisioning dari snapshot → langkah yang sudah ada di rootfs dilewati."""
+    stamps = (manifest or {}).get("stamps") or {}
+    if not stamps:
+        return 0
+    state = ProvisionState()
+    state.data["steps"].update(stamps)
+    state.save()
+    return len(stamps)
+
+
+def arch_mismatch(manifest):
+    """Pesan bila snapshot dibuat di arsitektur lain (binari di dalamnya tidak akan jalan), selain itu None."""
+    arch = (manifest or {}).get("arch")
+    if arch and arch != platform.machine():
+        return f"snapshot untuk {arch}, perangkat ini {platform.machine()}"
+    return None
+
+
+def restore(spec, distro=None, force=False):
+    """force: timpa rootfs yang sudah ada dan abaikan beda arsitektur (stamp tidak diimpor)."""
+    manifest, archive = resolve(spec)
+    distro = distro or (manifest or {}).get("distro") or DEFAULT_DISTRO
+    rootfs = rootfs_path(distro)
+    exists = os.path.isdir(rootfs) and os.listdir(rootfs)
+    if exists and not force:
+        raise SystemExit(f"[x] Rootfs {distro} sudah ada. Pakai --force untuk menimpa.")
+    if arch_mismatch(manifest) and not force:
+        raise SystemExit(f"[x] {arch_mismatch(manifest)}. Pakai --force bila yakin.")
+    if manifest and manifest.get("sha256"):
+        if _sha256(archive) != manifest["sha256"]:
+            raise SystemExit(f"[x] sha256 arsip tidak cocok dengan manifest: {archive}")
+    if exists:
+        stop_broker(distro)
+        shutil.rmtree(rootfs)
+    print(f"[i] Restore {archive} → {rootfs}")
+    try:
+        if (manifest or {}).get("method") == "proot-distro" or archive.endswith(".tar.xz"):
+            rc = subprocess.run(["proot-distro", "restore", archive]).returncode
+        else:
+            os.makedirs(rootfs, exist_ok=True)
+            zflags = ["-I", "zstd -d"] if archive.endswith(".zst") else ["-z"]
+            rc = subprocess.run(["tar", "-C", rootfs, *zflags, "-xf", archive]).returncode
+    except KeyboardInterrupt:
+        rc = None
+    if rc != 0:
+        # Rootfs setengah jadi dianggap terpasang oleh semua pemeriksa (dir tidak kosong) → hapus
+        shutil.rmtree(rootfs, ignore_errors=True)
+        raise SystemExit(f"[x] Restore gagal (exit={rc}); rootfs setengah jadi dihapus.")
+    if manifest is None:
+        try:
+            with open(os.path.join(rootfs, MANIFEST_IN_ROOTFS), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        # Arsip tanpa manifest samping: arsitektur baru diketahui setelah extract
+        if arch_mismatch(manifest) and not force:
+            shutil.rmtree(rootfs, ignore_errors=True)
+            raise SystemExit(f"[x] {arch_mismatch(manifest)}. Rootfs dihapus lagi; pakai --force bila yakin.")
+    if arch_mismatch(manifest):
+        # Stamp dari arsitektur lain akan melewati langkah yang justru perlu diulang
+        print(f"[!] {arch_mismatch(manifest)}: stamp provisioning tidak diimpor.")
+        manifest = None
+    n = import_stamps(manifest)
+    print(f"[✓] Rootfs {distro} dipulihkan dari snapshot ({n} stamp provisioning diimpor).")
+    return True
+
+
+def restore_if_configured(distro=DEFAULT_DISTRO):
+    """Dipakai langkah proot-rootfs: NEXUS_SNAPSHOT di-set & rootfs belum ada → restore. Return bool."""
+    spec = os.environ.get("NEXUS_SNAPSHOT")
+    if not spec or os.path.isdir(rootfs_path(distro)):
+        return False
+    manifest, _ = resolve(spec)
+    if arch_mismatch(manifest):
+        print(f"[!] NEXUS_SNAPSHOT dilewati ({arch_mismatch(manifest)}); provisioning biasa.")
+        return False
+    return restore(spec, distro)
+
+
+def list_snapshots():
+    rows = []
+    for fn in sorted(os.listdir(snapshot_dir())):
+        if fn.endswith(".json"):
+            with open(os.path.join(snapshot_dir(), fn), encoding="utf-8") as f:
+                m = json.load(f)
+            rows.append(m)
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Snapshot / restore rootfs Ubuntu proot")
+    ap.add_argument("op", choices=["create", "restore", "list"])
+    ap.add_argument("target", nargs="?", help="restore: nama snapshot, file arsip, atau file manifest")
+    ap.add_argument("--name", help="create: nama snapshot")
+    ap.add_argument("--distro", default=None)
+    ap.add_argument("--method", choices=["tar", "proot-distro"], default="tar")
+    ap.add_argument("--force", action="store_true", help="restore: timpa rootfs yang sudah ada / abaikan beda arsitektur")
+    args = ap.parse_args(argv)
+
+    if args.op == "create":
+        create(args.name, args.distro or DEFAULT_DISTRO, args.method)
+    elif args.op == "restore":
+        if not args.target:
+            ap.error("restore butuh nama / file snapshot")
+        restore(args.target, args.distro, args.force)
+    else:
+        rows = list_snapshots()
+        if not rows:
+            print("[i] Belum ada snapshot.")
+        for m in rows:
+            at = time.strftime("%Y-%m-%d %H:%M", time.localtime(m["created_at"]))
+            print(f"{m['name']:<32} {at}  {m.get('size', 0) / 1e6:>7.0f} MB  {len(m.get('packages', {})):>4} paket  {m['file']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
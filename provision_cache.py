@@ -0,0 +1,152 @@
+# provision_cache.py
+"""
+Stamp/state cache untuk langkah provisioning (pkg, proot-distro, apt, installer).
+- Tiap langkah dicatat dengan hash dari input-nya (daftar paket, URL installer, ...)
+- Langkah yang input-nya sama dan verify()-nya lolos akan dilewati
+- File state: ~/.cache/nexus-bot/provision.json (override: NEXUS_STATE_DIR)
+Paksa ulang semua langkah dengan NEXUS_REPROVISION=1.
+Juga util bersama modul lain: read_text (sysfs/procfs), write_text / write_json (atomik), read_pid / pid_alive, fmt_uptime.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from nexus_trace import span
+
+
+def state_dir():
+    base = os.environ.get("NEXUS_STATE_DIR")
+    if not base:
+        cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(cache, "nexus-bot")
+    os.makedirs(base, exist_ok=True)
+    return base
+
+
+def read_text(path):
+    """Isi file teks (tanpa spasi di ujung), "" bila tidak ada / tidak terbaca (sysfs, /proc, cgroupfs)."""
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def write_text(path, text):
+    """Tulis file teks atomik (tmp + os.replace): pembaca lain tidak pernah melihat file setengah jadi."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_json(path, data, indent=1, sort_keys=False):
+    write_text(path, json.dumps(data, indent=indent, sort_keys=sort_keys))
+
+
+def read_pid(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # ada, milik user lain
+    return True
+
+
+def fmt_uptime(seconds):
+    if seconds is None:
+        return "-"
+    d, rem = divmod(int(seconds), 86400)
+    h, rem = divmod(rem, 3600)
+    return f"{d} hari {h}j {rem // 60}m" if d else f"{h}j {rem // 60}m"
+
+
+def input_hash(inputs):
+    blob = json.dumps(inputs, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def file_fingerprint(path):
+    """Fingerprint murah (ukuran + mtime) untuk binari/skrip; None jika tidak ada."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_size}:{int(st.st_mtime)}"
+
+
+class ProvisionState:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(state_dir(), "provision.json")
+        self.force = os.environ.get("NEXUS_REPROVISION") == "1"
+        self.data = self._load()
+        self._lock = threading.RLock()  # langkah DAG paralel bisa mark() bersamaan
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {"steps": {}}
+        data.setdefault("steps", {})
+        return data
+
+    def save(self):
+        with self._lock:
+            write_json(self.path, self.data, sort_keys=True)
+
+    def is_done(self, step, inputs, max_age=None):
+        if self.force:
+            return False
+        rec = self.data["steps"].get(step)
+        if not rec or rec.get("hash") != input_hash(inputs):
+            return False
+        if max_age is not None and time.time() - rec.get("at", 0) > max_age:
+            return False
+        return True
+
+    def mark(self, step, inputs, **info):
+        with self._lock:
+            self.data["steps"][step] = dict(info, hash=input_hash(inputs), inputs=inputs, at=time.time())
+            self.save()
+
+    def invalidate(self, step=None):
+        if step is None:
+            self.data["steps"] = {}
+        else:
+            self.data["steps"].pop(step, None)
+        self.save()
+
+    def step(self, step, inputs, fn, verify=None, max_age=None, info=None):
+        """
+        Jalankan fn() hanya jika stamp tidak valid. fn() yang return False = gagal (tidak di-stamp).
+        verify() (opsional) harus murah — cek file di host, bukan spawn proot.
+        """
+        with span(step, cat="provision") as sp:
+            if self.is_done(step, inputs, max_age) and (verify is None or verify()):
+                print(f"[=] {step}: sudah siap, lewati.")
+                sp["skipped"] = True
+                return True
+            result = fn()
+            if result is False:
+                sp["ok"] = False
+                return False
+            if verify is not None and not verify():
+                print(f"[!] {step}: selesai dijalankan tapi verifikasi gagal (tidak di-stamp).")
+                sp["ok"] = False
+                return False
+            self.mark(step, inputs, **(info() if callable(info) else (info or {})))
+            return True
@@ -0,0 +1,131 @@
+# provision_dag.py
+"""
+Executor provisioning berbasis DAG.
+- Tiap langkah mendeklarasikan deps (nama langkah) dan/atau inputs/outputs (nama artefak);
+  langkah yang input-nya dihasilkan langkah lain otomatis menunggu langkah itu
+- Langkah independen jalan paralel (maks NEXUS_DAG_WORKERS thread, default 4)
+- locks: langkah dengan lock yang sama (mis. "dpkg" untuk pkg Termux, "dpkg:ubuntu"
+  untuk apt di proot) tidak pernah jalan bersamaan
+- fn(results) menerima hasil langkah sebelumnya; return False / exception = gagal,
+  langkah turunannya dilewati
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from nexus_trace import span
+
+WORKERS = int(os.environ.get("NEXUS_DAG_WORKERS", "4"))
+
+
+class DagError(Exception):
+    pass
+
+
+class Step:
+    def __init__(self, name, fn, deps=(), locks=(), inputs=(), outputs=()):
+        self.name = name
+        self.fn = fn
+        self.deps = set(deps)
+        self.locks = tuple(sorted(locks))  # urutan tetap → tidak ada deadlock antar lock
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+
+class Dag:
+    def __init__(self, workers=WORKERS, verbose=True):
+        self.workers = max(1, workers)
+        self.verbose = verbose
+        self.steps = {}
+        self.results = {}
+        self.errors = {}
+        self.skipped = []
+        self.durations = {}
+        self._locks = {}
+
+    def add(self, name, fn, deps=(), locks=(), inputs=(), outputs=()):
+        if name in self.steps:
+            raise DagError(f"langkah ganda: {name}")
+        self.steps[name] = Step(name, fn, deps, locks, inputs, outputs)
+        return self
+
+    def _resolve(self):
+        producers = {}
+        for s in self.steps.values():
+            for out in s.outputs:
+                producers[out] = s.name
+        for s in self.steps.values():
+            s.deps |= {producers[i] for i in s.inputs if i in producers and producers[i] != s.name}
+            unknown = s.deps - set(self.steps)
+            if unknown:
+                raise DagError(f"{s.name}: dependensi tidak dikenal {sorted(unknown)}")
+        # Deteksi siklus (Kahn)
+        indeg = {n: len(s.deps) for n, s in self.steps.items()}
+        ready = [n for n, d in indeg.items() if d == 0]
+        seen = 0
+        while ready:
+            n = ready.pop()
+            seen += 1
+            for m, s in self.steps.items():
+                if n in s.deps:
+                    indeg[m] -= 1
+                    if indeg[m] == 0:
+                        ready.append(m)
+        if seen != len(self.steps):
+            raise DagError("graf provisioning punya siklus")
+
+    def _log(self, msg):
+        if self.verbose:
+            print(msg, flush=True)
+
+    def _run_step(self, step):
+        locks = [self._locks.setdefault(n, threading.Lock()) for n in step.locks]
+        for lk in locks:
+            lk.acquire()
+        start = time.perf_counter()
+        try:
+            self._log(f"[→] {step.name}")
+            with span(step.name, cat="dag", locks=",".join(step.locks) or None):
+                return step.fn(self.results)
+        finally:
+            self.durations[step.name] = time.perf_counter() - start
+            for lk in reversed(locks):
+                lk.release()
+
+    def run(self):
+        """Jalankan semua langkah. Return True jika tidak ada yang gagal."""
+        self._resolve()
+        pending = dict(self.steps)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dag") as pool:
+            while pending or running:
+                failed = set(self.errors) | set(self.skipped)
+                for name, step in list(pending.items()):
+                    if step.deps & failed:
+                        del pending[name]
+                        self.skipped.append(name)
+                        self._log(f"[-] {name}: dilewati (dependensi gagal)")
+                    elif step.deps <= set(self.results) and len(running) < self.workers:
+                        del pending[name]
+                        running[pool.submit(self._run_step, step)] = name
+                if not running:
+                    if pending:
+                        continue  # sisa langkah baru saja dilewati; ulangi evaluasi
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    try:
+                        result = fut.result()
+                    except BaseException as e:  # SystemExit dari helper lama juga dihitung gagal
+                        self.errors[name] = str(e) or type(e).__name__
+                        self._log(f"[x] {name}: {self.errors[name]}")
+                        continue
+                    if result is False:
+                        self.errors[name] = "gagal"
+                        self._log(f"[x] {name}: gagal ({self.durations[name]:.1f}s)")
+                    else:
+                        self.results[name] = result
+                        self._log(f"[✓] {name} ({self.durations[name]:.1f}s)")
+        return not self.errors
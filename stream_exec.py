@@ -0,0 +1,119 @@
+# stream_exec.py
+"""
+Executor streaming dengan memori terbatas.
+- stdout/stderr child di-tee live ke terminal
+- Yang disimpan hanya ring buffer N KB terakhir per stream (NEXUS_RUN_RING_KB, default 64)
+  untuk laporan error dan pencocokan keyword (mis. deteksi login)
+- Perintah string tanpa fitur shell (pipe, redirect, $VAR, glob, builtin) di-exec
+  langsung sebagai argv → tidak ada fork /bin/sh (lihat resolve_command)
+"""
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+
+RING_KB = int(os.environ.get("NEXUS_RUN_RING_KB", "64"))
+_SHELL_CHARS = set("|&;<>()$`*?[]{}~#!\\\n")
+_SHELL_BUILTINS = {"cd", "export", "source", ".", "set", "unset", "exit", "eval", "exec", "ulimit", "umask", "alias", "true", "false"}
+
+
+def simple_argv(cmd):
+    """argv untuk cmd jika bisa di-exec tanpa shell; None jika butuh /bin/sh."""
+    if not isinstance(cmd, str):
+        return list(cmd)
+    if _SHELL_CHARS.intersection(cmd):
+        return None
+    try:
+        argv = shlex.split(cmd)
+    except ValueError:
+        return None
+    if not argv or "=" in argv[0] or argv[0] in _SHELL_BUILTINS:
+        return None
+    # Binari tidak ditemukan → biarkan shell yang melapor (exit 127, bukan exception)
+    if shutil.which(argv[0]) is None:
+        return None
+    return argv
+
+
+def resolve_command(cmd, shell=None):
+    """(args, shell) untuk subprocess. shell=None: otomatis — argv langsung bila memungkinkan."""
+    if shell is None:
+        argv = simple_argv(cmd)
+        return (argv, False) if argv is not None else (cmd, True)
+    return cmd, shell
+
+
+def display(cmd):
+    return cmd if isinstance(cmd, str) else shlex.join(cmd)
+
+
+class TailBuffer:
+    """Ring buffer byte: hanya `limit` byte terakhir yang dipertahankan (maks 2x limit di memori)."""
+
+    def __init__(self, limit=RING_KB * 1024):
+        self.limit = limit
+        self.total = 0
+        self._buf = bytearray()
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        with self._lock:
+            self.total += len(data)
+            self._buf += data
+            if len(self._buf) > 2 * self.limit:
+                del self._buf[:-self.limit]
+
+    def getvalue(self):
+        with self._lock:
+            return bytes(self._buf[-self.limit:])
+
+    def text(self):
+        return self.getvalue().decode("utf-8", "replace")
+
+    def contains_any(self, keywords):
+        low = self.text().lower()
+        return any(k in low for k in keywords)
+
+
+def _pump(src, ring, sink, on_chunk):
+    fd = src.fileno()
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        ring.write(chunk)
+        if sink is not None:
+            sink.write(chunk)
+            sink.flush()
+        if on_chunk is not None:
+            on_chunk(chunk)
+    src.close()
+
+
+def run_streaming(cmd, env=None, shell=None, echo=True, ring_bytes=None, on_chunk=None):
+    """
+    Jalankan cmd (string atau argv), tee output live (jika echo) dan simpan tail-nya saja.
+    Return (code, stdout_tail, stderr_tail).
+    """
+    limit = ring_bytes or RING_KB * 1024
+    out_ring, err_ring = TailBuffer(limit), TailBuffer(limit)
+    args, shell = resolve_command(cmd, shell)
+    p = subprocess.Popen(args, shell=shell, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out_sink = sys.stdout.buffer if echo else None
+    err_sink = sys.stderr.buffer if echo else None
+    if echo:
+        sys.stdout.flush()
+    t_err = threading.Thread(target=_pump, args=(p.stderr, err_ring, err_sink, on_chunk), daemon=True)
+    t_err.start()
+    try:
+        _pump(p.stdout, out_ring, out_sink, on_chunk)
+        code = p.wait()
+    except KeyboardInterrupt:
+        # SIGINT juga diterima child (satu process group); tunggu dia selesai
+        p.wait()
+        raise
+    finally:
+        t_err.join(timeout=5)
+    return code, out_ring.text(), err_ring.text()
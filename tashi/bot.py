@@ -5,37 +5,86 @@ Tashi DePIN Worker — Termux helper (EXPERIMENTAL)
 - Termux -> proot-distro (Ubuntu) -> Podman (rootless) -> Tashi install.sh
 - Commands:
     install   : full setup & run installer
-    status    : show container status
-    logs      : follow worker logs
+    status    : show container status (--json: satu `podman inspect`, cache TTL pendek)
+    logs      : follow worker logs (--tail N: N baris terakhir lalu keluar;
+                --since/--until/--grep: cari rentang waktu, difilter podman + regex)
     restart   : restart worker container
+    stop      : stop worker container
     uninstall : remove worker + auth volume
+    bundle    : export/import image worker + installer ke cache lokal
+                (content-addressed; bisa di share LAN lewat NEXUS_TASHI_BUNDLE_DIR)
+    snapshot  : create/restore rootfs Ubuntu (podman + deps) -> HP berikutnya cukup extract
 """
 import argparse
+import hashlib
+import json
 import os
 import platform
+import re
+import shlex
 import shutil
 import subprocess
 import sys
+import time
+from datetime import datetime
 from textwrap import dedent
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pkg_resolver import apt_ensure_script, termux_plan  # noqa: E402
+from provision_dag import Dag  # noqa: E402
+import nexus_trace  # noqa: E402
+import proot_snapshot  # noqa: E402
+from nexus_trace import span, traced  # noqa: E402
+from proot_broker import direct_argv, proot_exec, rootfs_path  # noqa: E402
+from provision_cache import fmt_uptime, state_dir, write_json  # noqa: E402
+from stream_exec import display, resolve_command  # noqa: E402
+
 UBUNTU_DISTRO = "ubuntu"
+TERMUX_PKGS = ["proot-distro", "curl", "wget", "tar", "ca-certificates", "git", "openssh"]
+UBUNTU_PKGS = ["bash", "ca-certificates", "curl", "wget", "iproute2", "uidmap", "slirp4netns", "fuse-overlayfs", "podman"]
 INSTALL_URL_PRIMARY = "https://depin.tashi.network/install.sh"  # official one-liner uses this
 INSTALL_URL_ALT = "https://raw.githubusercontent.com/tashigg/tashi-depin-worker/refs/heads/main/install.sh"
 
 CONTAINER_NAME = "tashi-depin-worker"
 AUTH_VOLUME = "tashi-depin-worker-auth"
+# Installer terakhir disimpan di dalam rootfs (untuk bundle export; dipakai lagi hanya bila
+# ditaruh `bundle import` atau saat offline — selain itu tiap install mengunduh versi terbaru)
+PROOT_CACHE = "/root/.cache/tashi"
+INSTALLER = f"{PROOT_CACHE}/install.sh"
+BUNDLE_MARKER = f"{INSTALLER}.bundle"  # isi: sha256 installer yang ditaruh bundle import
+BUNDLE_DIR = os.environ.get("NEXUS_TASHI_BUNDLE_DIR", "")
+# Dashboard yang polling tiap beberapa detik memakai hasil cache ini (tanpa spawn proot/podman)
+STATUS_TTL = float(os.environ.get("NEXUS_TASHI_STATUS_TTL", "5"))
 
-def run(cmd, check=True, shell=True, env=None):
-    print(f"\n>> {cmd}")
-    proc = subprocess.run(cmd, shell=shell, env=env)
+def run(cmd, check=True, shell=None, env=None):
+    # cmd: argv list (exec langsung) atau string; shell=None -> /bin/sh hanya jika perlu (pipe, ||, $VAR)
+    print(f"\n>> {display(cmd)}")
+    args, shell = resolve_command(cmd, shell)
+    with span(nexus_trace.short(cmd), cat="run", cmd=display(cmd)) as sp:
+        proc = subprocess.run(args, shell=shell, env=env)
+        sp["rc"] = proc.returncode
     if check and proc.returncode != 0:
-        raise SystemExit(f"[!] Command failed (exit={proc.returncode}): {cmd}")
+        raise SystemExit(f"[!] Command failed (exit={proc.returncode}): {display(cmd)}")
     return proc.returncode
 
-def in_proot(cmd, check=True):
-    # Execute inside Ubuntu proot-distro with bash -lc
-    full = f'proot-distro login {UBUNTU_DISTRO} -- bash -lc "{cmd}"'
-    return run(full, check=check, shell=True)
+def in_proot(cmd, check=True, interactive=False, capture=False, stream=False):
+    # cmd: argv list (tanpa bash di proot) atau script bash (bash -c, tanpa profil login).
+    # Interactive/follow commands need a TTY -> full proot-distro login.
+    # stream: langkah panjang (apt, podman save/load) -> login sendiri juga: output live,
+    # broker (dipakai status / budget planner) tidak terkunci, tanpa batas waktu broker.
+    if interactive or stream:
+        return run(direct_argv(UBUNTU_DISTRO, cmd), check=check)
+    # Everything else goes through the long-lived broker shell (one IPC round trip).
+    print(f"\n>> [proot] {display(cmd)}")
+    with span(nexus_trace.short(cmd), cat="proot", cmd=display(cmd)) as sp:
+        code, out, err = proot_exec(cmd, UBUNTU_DISTRO)
+        sp["rc"] = code
+    if not capture:
+        sys.stdout.write(out)
+    sys.stderr.write(err)
+    if check and code != 0:
+        raise SystemExit(f"[!] Command failed (exit={code}): {display(cmd)}")
+    return (code, out) if capture else code
 
 def is_cmd(name):
     return shutil.which(name) is not None
@@ -43,6 +92,7 @@ def is_cmd(name):
 def is_termux():
     return os.path.exists("/data/data/com.termux/files/usr")
 
+@traced()
 def preflight():
     print("=== Preflight ===")
     if not is_termux():
@@ -56,45 +106,92 @@ def preflight():
     if not is_cmd("pkg"):
         raise SystemExit("[x] Perintah 'pkg' tidak ditemukan. Pastikan kamu memakai Termux.")
 
+@traced()
 def install_termux_prereqs():
     print("\n=== Step 1: Install paket Termux (proot-distro, curl, dll) ===")
-    run("yes | pkg update -y || true", check=False)
-    run("yes | pkg upgrade -y || true", check=False)
-    run("yes | pkg install -y proot-distro curl wget tar ca-certificates git openssh", check=True)
+    # Satu dpkg-query; update/upgrade hanya jika index basi, install hanya yang kurang
+    plan = termux_plan(TERMUX_PKGS, upgrade=True)
+    if not plan:
+        print("[=] Paket Termux sudah lengkap, lewati.")
+    for cmd in plan:
+        if cmd.startswith("pkg install"):
+            run(f"yes | {cmd}", check=True)
+        else:
+            run(f"yes | {cmd} || true", check=False)
 
+@traced()
 def ensure_ubuntu_proot():
     print("\n=== Step 2: Install Ubuntu (proot-distro) ===")
     # List and install if missing
-    run("proot-distro list", check=False)
-    # Install or re-install ubuntu if not present
-    ret = subprocess.run(f"proot-distro list | grep -E '^\\s*{UBUNTU_DISTRO}\\b'", shell=True)
-    if ret.returncode != 0:
-        run(f"proot-distro install {UBUNTU_DISTRO} || true", check=False)
+    # NEXUS_SNAPSHOT: extract rootfs golden (podman + deps sudah ada) alih-alih install dari nol
+    proot_snapshot.restore_if_configured(UBUNTU_DISTRO)
+    # Cek rootfs langsung di host (tanpa `proot-distro list | grep`)
+    if os.path.isdir(rootfs_path(UBUNTU_DISTRO)):
+        print(f"[=] {UBUNTU_DISTRO} sudah terpasang, lewati.")
+        return
+    run(["proot-distro", "install", UBUNTU_DISTRO], check=False)
 
+@traced()
 def setup_inside_ubuntu():
     print("\n=== Step 3: Siapkan dependensi di Ubuntu (rootless Podman + tools) ===")
-    in_proot("apt-get update -y")
-    in_proot("DEBIAN_FRONTEND=noninteractive apt-get install -y "
-             "bash ca-certificates curl wget iproute2 uidmap slirp4netns fuse-overlayfs podman")
+    in_proot(apt_ensure_script(UBUNTU_PKGS), stream=True)
     # Try a quick sanity check
-    in_proot("podman --version || true")
+    in_proot(["podman", "--version"], check=False)
     # Minimal rootless config is usually automatic on Debian/Ubuntu for the user namespace.
     # Quick functional check (won't fail the whole script if it errors).
-    in_proot("podman info >/dev/null 2>&1 || true")
+    in_proot(["podman", "info"], check=False, capture=True)
+
+@traced()
+def fetch_installer():
+    """Unduh install.sh terbaru dari host (curl Termux) ke cache rootfs, paralel dengan apt di proot.
+    Installer dari bundle import dipakai apa adanya; cache lama hanya cadangan saat offline."""
+    dst = _host_path(INSTALLER)
+    if _bundled_installer():
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    for url in (INSTALL_URL_PRIMARY, INSTALL_URL_ALT):
+        if run(["curl", "-fsSL", url, "-o", dst + ".tmp"], check=False) == 0:
+            os.replace(dst + ".tmp", dst)
+            return
+    if os.path.isfile(dst):
+        print(f"[!] Installer tidak bisa diunduh; memakai salinan cache lama: {INSTALLER}")
+    # Gagal di host bukan fatal: run_tashi_install mengunduh sendiri di dalam proot
+
+def _bundled_installer():
+    """True bila install.sh di cache ditaruh `bundle import` dan isinya belum berubah."""
+    path = _host_path(INSTALLER)
+    try:
+        with open(_host_path(BUNDLE_MARKER), encoding="utf-8") as f:
+            digest = f.read().strip()
+        return bool(digest) and _sha256(path) == digest
+    except OSError:
+        return False
 
+@traced()
 def run_tashi_install():
     print("\n=== Step 4: Jalankan installer resmi Tashi (mode interaktif) ===")
-    # Prefer official bootstrap endpoint; fall back to raw GitHub if blocking
+    # Installer sudah diunduh fetch_installer (atau dari bundle import); bila host gagal
+    # mengunduh, coba di dalam proot (official endpoint, fallback raw GitHub) ke cache dulu
+    # supaya `bundle export` bisa menyimpannya.
+    installer = INSTALLER
+    if _bundled_installer():
+        print(f"[=] Memakai installer dari bundle: {installer}")
     cmd = dedent(f"""
         set -e
-        if command -v curl >/dev/null 2>&1; then
-            bash -lc 'curl -fsSL {INSTALL_URL_PRIMARY} | bash -s -' || bash -lc 'curl -fsSL {INSTALL_URL_ALT} | bash -s -'
-        else
-            bash -lc 'wget -qO- {INSTALL_URL_PRIMARY} | bash -s -' || bash -lc 'wget -qO- {INSTALL_URL_ALT} | bash -s -'
+        mkdir -p {PROOT_CACHE}
+        if [ ! -s {installer} ]; then
+            if command -v curl >/dev/null 2>&1; then
+                curl -fsSL {INSTALL_URL_PRIMARY} -o {installer}.tmp || curl -fsSL {INSTALL_URL_ALT} -o {installer}.tmp
+            else
+                wget -qO {installer}.tmp {INSTALL_URL_PRIMARY} || wget -qO {installer}.tmp {INSTALL_URL_ALT}
+            fi
+            mv {installer}.tmp {installer}
         fi
-    """).strip().replace("\n", " ")
+        bash {installer}
+    """).strip()
     # This will run checks (CPU/RAM/disk/container runtime), lalu meminta bonding via URL + token
-    in_proot(cmd, check=True)
+    in_proot(cmd, check=True, interactive=True)
+    invalidate_status()
 
 def show_next_steps():
     print(dedent(f"""
@@ -107,58 +204,373 @@ def show_next_steps():
 
     Perintah cepat:
       python {os.path.basename(__file__)} status     # lihat container & versi
+      python {os.path.basename(__file__)} status --json   # untuk dashboard (cache {STATUS_TTL:g}s)
       python {os.path.basename(__file__)} logs       # lihat log worker (follow)
       python {os.path.basename(__file__)} restart    # restart worker
+      python {os.path.basename(__file__)} stop       # hentikan worker
       python {os.path.basename(__file__)} uninstall  # hapus container + auth volume (reset bonding)
+      python {os.path.basename(__file__)} bundle export   # simpan image + installer ke cache lokal
+      python {os.path.basename(__file__)} bundle import   # HP lain / reinstall: muat dari cache, tanpa unduh
 
     Tips:
     - Jika Podman gagal berjalan di Termux/proot (umum terjadi), jalankan script ini di VPS/PC Linux x86-64.
     """))
 
-def cmd_status():
+def _status_cache_path():
+    return os.path.join(state_dir(), "tashi-status.json")
+
+def _parse_time(value):
+    # Podman: 2024-05-01T10:00:00.123456789+07:00 (nanodetik) -> potong ke mikrodetik
+    if not value or value.startswith("0001-"):
+        return None
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+    value = re.sub(r"\s+[A-Z]{3,}$", "", value)  # buang suffix zona " UTC"
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+def parse_inspect(text, now=None):
+    """Output JSON `podman inspect` -> dict status ringkas."""
+    now = now or time.time()
+    info = {"container": CONTAINER_NAME, "exists": False, "state": "missing", "running": False,
+            "image": None, "started_at": None, "uptime_s": None, "restart_count": None,
+            "health": None, "exit_code": None}
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return info
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if not isinstance(data, dict):
+        return info
+    state = data.get("State") or {}
+    health = state.get("Health") or state.get("Healthcheck") or {}
+    started = _parse_time(state.get("StartedAt"))
+    running = bool(state.get("Running")) or state.get("Status") == "running"
+    info.update(
+        exists=True,
+        state=state.get("Status") or ("running" if running else "unknown"),
+        running=running,
+        image=data.get("ImageName") or (data.get("Config") or {}).get("Image"),
+        started_at=started.isoformat() if started else None,
+        uptime_s=int(now - started.timestamp()) if running and started else None,
+        restart_count=data.get("RestartCount"),
+        health=health.get("Status") or None,
+        exit_code=state.get("ExitCode"),
+    )
+    return info
+
+def fetch_status(max_age=STATUS_TTL):
+    """Status worker dari satu `podman inspect` (lewat broker), di-cache max_age detik."""
+    path = _status_cache_path()
+    if max_age > 0:
+        try:
+            with open(path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if time.time() - cached.get("checked_at", 0) < max_age:
+                cached["cached"] = True
+                return cached
+        except (OSError, ValueError):
+            pass
+    if not os.path.isdir(rootfs_path(UBUNTU_DISTRO)):
+        info = parse_inspect("")
+        info["state"] = "no-proot"
+    else:
+        cmd = ["podman", "inspect", "--type", "container", CONTAINER_NAME]
+        with span("podman inspect", cat="proot", cmd=" ".join(cmd)) as sp:
+            code, out, _ = proot_exec(cmd, UBUNTU_DISTRO)
+            sp["rc"] = code
+        info = parse_inspect(out if code == 0 else "")
+    info["checked_at"] = time.time()
+    write_json(path, info, indent=None)
+    info["cached"] = False
+    return info
+
+def invalidate_status():
+    try:
+        os.remove(_status_cache_path())
+    except OSError:
+        pass
+
+@traced()
+def cmd_status(as_json=False, max_age=STATUS_TTL):
+    info = fetch_status(max_age)
+    if as_json:
+        print(json.dumps(info, indent=1, sort_keys=True))
+        return
     print("=== Status Worker ===")
-    in_proot(f"podman ps -a --format 'table {{.Names}}\t{{.Image}}\t{{.Status}}' | (grep -E '({CONTAINER_NAME}|NAMES)' || true)")
-    in_proot(f"podman inspect {CONTAINER_NAME} >/dev/null 2>&1 && podman inspect {CONTAINER_NAME} --format '{{{{.State.Status}}}} {{{{.Config.Image}}}}' || true")
+    if not info["exists"]:
+        print(f"[i] Container {CONTAINER_NAME} tidak ditemukan ({info['state']}). Jalankan 'install' dulu.")
+        return
+    health = f" ({info['health']})" if info["health"] else ""
+    print(f"{info['container']}: {info['state']}{health}")
+    print(f"  image    : {info['image'] or '-'}")
+    print(f"  uptime   : {fmt_uptime(info['uptime_s'])}")
+    print(f"  restarts : {info['restart_count'] if info['restart_count'] is not None else '-'}")
+    if not info["running"] and info["exit_code"] is not None:
+        print(f"  exit code: {info['exit_code']}")
+    if info.get("cached"):
+        print(f"[i] Dari cache (< {max_age:g}s).")
+    if os.path.exists(os.path.join(state_dir(), "budget.json")):
+        # Planner CPU/RAM bersama node Nexus (python bot.py --budget N)
+        import nexus_budget
+
+        data = nexus_budget.load_report()
+        if data:
+            print(nexus_budget.format_workload("budget", data["workloads"]["tashi"]))
+
+# =======================
+# Bundle offline (image + installer)
+# =======================
+def _host_path(proot_path):
+    """Path di dalam Ubuntu (/root/...) -> path yang sama dilihat dari host Termux."""
+    return os.path.join(rootfs_path(UBUNTU_DISTRO), proot_path.lstrip("/"))
+
+def bundle_dir(path=None):
+    return path or BUNDLE_DIR or os.path.join(state_dir(), "tashi-bundles")
 
-def cmd_logs():
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _blob_path(root, digest):
+    return os.path.join(root, "blobs", "sha256", digest)
+
+def _store_blob(root, src, move=False):
+    """Simpan file ke cache content-addressed. Return (digest, size); blob yang sama tidak ditulis ulang."""
+    digest = _sha256(src)
+    dst = _blob_path(root, digest)
+    if os.path.exists(dst):
+        if move:
+            os.remove(src)
+        return digest, os.path.getsize(dst)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = dst + ".tmp"
+    if move:
+        try:
+            os.replace(src, tmp)  # satu filesystem: tanpa salin
+        except OSError:
+            shutil.copyfile(src, tmp)
+            os.remove(src)
+    else:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+    return digest, os.path.getsize(dst)
+
+def _place_blob(root, digest, dst, link=False):
+    """Salin blob ke dst setelah cek hash. link=True: hardlink (hanya untuk file sementara yang read-only)."""
+    src = _blob_path(root, digest)
+    if _sha256(src) != digest:
+        raise SystemExit(f"[x] Blob rusak (hash tidak cocok): {src}")
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if os.path.exists(dst):
+        os.remove(dst)
+    if link:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+def _proot_out(cmd):
+    code, out, _ = proot_exec(cmd, UBUNTU_DISTRO)
+    return out.strip() if code == 0 else None
+
+def _image_id(image):
+    out = _proot_out(["podman", "image", "inspect", "--format", "{{.Id}}", image])
+    return out.split(":")[-1] if out else None
+
+@traced()
+def bundle_export(root=None, image=None):
+    root = bundle_dir(root)
+    print(f"=== Bundle export -> {root} ===")
+    image = image or fetch_status(max_age=0)["image"]
+    if not image:
+        raise SystemExit("[x] Image worker tidak diketahui (container belum ada). Pakai --image NAMA.")
+    image_id = _image_id(image)
+    if not image_id:
+        raise SystemExit(f"[x] Image {image} tidak ada di podman.")
+    manifest_path = os.path.join(root, "manifests", f"{image_id[:12]}.json")
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if not os.path.exists(_blob_path(root, manifest["image_blob"])):
+            manifest = None
+    if manifest:
+        print(f"[=] Image {image} ({image_id[:12]}) sudah ada di cache, lewati podman save.")
+    else:
+        tar = f"{PROOT_CACHE}/image-{image_id[:12]}.tar"
+        in_proot(["podman", "save", "-o", tar, image], stream=True)  # docker-archive: nama repo:tag ikut tersimpan
+        digest, size = _store_blob(root, _host_path(tar), move=True)
+        manifest = {"image": image, "image_id": image_id, "image_blob": digest, "image_size": size,
+                    "arch": platform.machine(), "created_at": time.time()}
+    installer = _host_path(INSTALLER)
+    if os.path.isfile(installer):
+        manifest["installer_blob"], _ = _store_blob(root, installer)
+    else:
+        print("[!] Installer belum ada di cache proot (jalankan 'install' sekali); bundle tanpa installer.")
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    for path in (manifest_path, os.path.join(root, "latest.json")):
+        write_json(path, manifest, sort_keys=True)
+    print(f"[✓] Bundle: {manifest_path}  (image {manifest['image_size'] / 1e6:.0f} MB)")
+
+@traced()
+def bundle_import(source=None):
+    """source: file manifest, atau direktori cache (memakai latest.json)."""
+    source = source or bundle_dir()
+    if os.path.isdir(source):
+        root, manifest_path = source, os.path.join(source, "latest.json")
+    else:
+        manifest_path = source
+        root = os.path.dirname(os.path.dirname(os.path.abspath(source)))
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"[x] Manifest bundle tidak terbaca: {manifest_path} ({e})")
+    print(f"=== Bundle import {manifest['image']} ({manifest['image_id'][:12]}) ===")
+    if not os.path.isdir(rootfs_path(UBUNTU_DISTRO)):
+        raise SystemExit("[x] Ubuntu proot belum ada. Jalankan dulu 'install'.")
+    if manifest.get("installer_blob"):
+        _place_blob(root, manifest["installer_blob"], _host_path(INSTALLER))
+        # Penanda → install berikutnya memakai installer ini, bukan mengunduh ulang
+        with open(_host_path(BUNDLE_MARKER), "w", encoding="utf-8") as f:
+            f.write(manifest["installer_blob"])
+        print(f"[+] Installer -> {INSTALLER}")
+    if _image_id(manifest["image"]) == manifest["image_id"]:
+        print("[=] Image sudah ada di podman, lewati load.")
+        return
+    tar = f"{PROOT_CACHE}/image-{manifest['image_id'][:12]}.tar"
+    _place_blob(root, manifest["image_blob"], _host_path(tar), link=True)
+    try:
+        in_proot(["podman", "load", "-i", tar], stream=True)
+    finally:
+        os.remove(_host_path(tar))
+    invalidate_status()
+    print("[✓] Image dimuat dari bundle lokal. 'install' berikutnya memakai installer + image ini.")
+
+def cmd_logs(tail=None, since=None, until=None, grep=None):
+    """tail=N: cetak N baris terakhir lalu keluar (non-interaktif, untuk nexus_hosts); default follow.
+    since/until: rentang waktu dipotong podman sendiri (tidak men-dump seluruh log); grep: regex per baris."""
+    if since or until or grep:
+        from nexus_logs import parse_time
+
+        cmd = ["podman", "logs"]
+        if since:
+            cmd += ["--since", f"{parse_time(since):.0f}"]
+        if until:
+            cmd += ["--until", f"{parse_time(until):.0f}"]
+        if tail is not None:
+            cmd += ["--tail", str(tail)]
+        # podman menulis stdout+stderr container ke stream masing-masing; gabungkan sebelum grep
+        code, out = in_proot(shlex.join(cmd + [CONTAINER_NAME]) + " 2>&1", check=False, capture=True)
+        pattern = re.compile(grep) if grep else None
+        lines = [ln for ln in out.splitlines(keepends=True) if pattern is None or pattern.search(ln)]
+        sys.stdout.write("".join(lines))
+        print(f"[i] {len(lines)} baris", file=sys.stderr)
+        sys.exit(code)
+    if tail is not None:
+        sys.exit(in_proot(["podman", "logs", "--tail", str(tail), CONTAINER_NAME], check=False))
     print("=== Logs (CTRL+C untuk keluar) ===")
-    in_proot(f"podman logs -f {CONTAINER_NAME}")
+    in_proot(["podman", "logs", "-f", CONTAINER_NAME], interactive=True)
 
+@traced()
 def cmd_restart():
     print("=== Restart Worker ===")
-    in_proot(f"podman restart {CONTAINER_NAME}")
+    invalidate_status()
+    in_proot(["podman", "restart", CONTAINER_NAME])
+
+@traced()
+def cmd_stop():
+    print("=== Stop Worker ===")
+    invalidate_status()
+    in_proot(["podman", "stop", CONTAINER_NAME])
 
+@traced()
 def cmd_uninstall():
     print("=== Uninstall Worker ===")
+    invalidate_status()
     # remove container
-    in_proot(f"podman rm -f {CONTAINER_NAME} || true")
+    in_proot(["podman", "rm", "-f", CONTAINER_NAME], check=False)
     # remove old container name if any
-    in_proot(f"podman rm -f {CONTAINER_NAME}-old || true")
+    in_proot(["podman", "rm", "-f", f"{CONTAINER_NAME}-old"], check=False)
     # remove auth volume so you can re-bond to different wallet later
-    in_proot(f"podman volume rm {AUTH_VOLUME} || true")
+    in_proot(["podman", "volume", "rm", AUTH_VOLUME], check=False)
+    # Installer cache / dari bundle ikut dibuang → install ulang memakai versi terbaru
+    for path in (INSTALLER, BUNDLE_MARKER):
+        try:
+            os.remove(_host_path(path))
+        except OSError:
+            pass
     print("[i] Selesai uninstall. Kamu bisa jalankan 'install' lagi untuk pemasangan ulang.")
 
 def main():
     ap = argparse.ArgumentParser(description="Tashi DePIN Worker helper for Termux (experimental)")
-    ap.add_argument("action", choices=["install", "status", "logs", "restart", "uninstall"],
+    ap.add_argument("action", choices=["install", "status", "logs", "restart", "stop", "uninstall", "bundle", "snapshot"],
                     help="Apa yang ingin dilakukan")
+    ap.add_argument("op", nargs="?", choices=["export", "import", "create", "restore", "list"],
+                    help="bundle: export/import; snapshot: create/restore/list")
+    ap.add_argument("path", nargs="?", help="bundle: direktori cache / file manifest (default NEXUS_TASHI_BUNDLE_DIR); "
+                                            "snapshot: nama (create) atau nama/file (restore)")
+    ap.add_argument("--force", action="store_true", help="snapshot restore: timpa rootfs yang sudah ada / abaikan beda arsitektur")
+    ap.add_argument("--image", help="bundle export: nama image (default: image container worker)")
+    ap.add_argument("--trace", action="store_true",
+                    help="Catat durasi tiap langkah (ringkasan + Chrome trace JSON)")
+    ap.add_argument("--json", action="store_true", help="status: output JSON (state, image, uptime, restart, health)")
+    ap.add_argument("--tail", type=int, metavar="N", help="logs: N baris terakhir lalu keluar (tanpa follow)")
+    ap.add_argument("--since", metavar="T", help="logs: mulai waktu T (2h, 30m, 03:00, 2024-05-01 22:00, epoch)")
+    ap.add_argument("--until", metavar="T", help="logs: sampai waktu T")
+    ap.add_argument("--grep", metavar="REGEX", help="logs: hanya baris yang cocok")
+    ap.add_argument("--max-age", type=float, default=STATUS_TTL,
+                    help="status: pakai cache jika lebih muda dari N detik (0 = selalu cek; default %(default)s)")
     args = ap.parse_args()
+    if args.trace:
+        nexus_trace.enable()
 
     if args.action == "install":
-        preflight()
-        install_termux_prereqs()
-        ensure_ubuntu_proot()
-        setup_inside_ubuntu()
-        run_tashi_install()
+        # Graf langkah: unduh installer berjalan paralel dengan apt di Ubuntu
+        dag = Dag()
+        dag.add("preflight", lambda _: preflight())
+        dag.add("termux-pkgs", lambda _: install_termux_prereqs(), deps=["preflight"], locks=["dpkg"])
+        dag.add("ubuntu", lambda _: ensure_ubuntu_proot(), deps=["termux-pkgs"])
+        dag.add("ubuntu-deps", lambda _: setup_inside_ubuntu(), deps=["ubuntu"], locks=["dpkg:" + UBUNTU_DISTRO])
+        dag.add("installer", lambda _: fetch_installer(), deps=["ubuntu"])
+        dag.add("tashi-install", lambda _: run_tashi_install(), deps=["ubuntu-deps", "installer"])
+        if not dag.run():
+            raise SystemExit("[x] Install gagal: " + "; ".join(f"{k}: {v}" for k, v in dag.errors.items()))
         show_next_steps()
     elif args.action == "status":
-        cmd_status()
+        cmd_status(args.json, args.max_age)
     elif args.action == "logs":
-        cmd_logs()
+        cmd_logs(args.tail, args.since, args.until, args.grep)
     elif args.action == "restart":
         cmd_restart()
+    elif args.action == "stop":
+        cmd_stop()
     elif args.action == "uninstall":
         cmd_uninstall()
+    elif args.action == "bundle":
+        if args.op == "export":
+            bundle_export(args.path, args.image)
+        elif args.op == "import":
+            bundle_import(args.path)
+        else:
+            ap.error("bundle butuh 'export' atau 'import'")
+    elif args.action == "snapshot":
+        if args.op not in ("create", "restore", "list"):
+            ap.error("snapshot butuh 'create', 'restore' atau 'list'")
+        argv = [args.op, "--distro", UBUNTU_DISTRO]
+        if args.op == "create" and args.path:
+            argv += ["--name", args.path]
+        elif args.op == "restore":
+            argv = [args.op, args.path or "", "--distro", UBUNTU_DISTRO] + (["--force"] if args.force else [])
+        sys.exit(proot_snapshot.main(argv))
 
 if __name__ == "__main__":
     main()